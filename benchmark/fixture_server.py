@@ -0,0 +1,191 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import threading
+import secrets
+import time
+
+
+SESSION_COOKIE = "bench_session"
+CHUNK = b"0123456789abcdef" * 4096
+
+
+def _page(title:str, body:str, script:str="") -> bytes:
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title></head>"
+        f"<body><h1 id='title'>{title}</h1>{body}{script}</body></html>"
+    ).encode("utf-8")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    ### FixtureHandler
+    Fixture pages of the benchmark (the sizes and delays are query parameters):
+        -   /table?rows=500&columns=6: large table
+        -   /delayed?delay_ms=500: element "#late" added by a script after the delay (Chrome only)
+        -   /slow?delay_ms=500: page answered after the delay
+        -   /files?count=4&size_kb=256: links to "/download" files
+        -   /download?size_kb=256&name=file.bin: file of "size_kb" KB
+        -   /list?page=1&pages=5&items=50: paginated list, links to all pages in "nav"
+        -   /login (GET form, POST user/password) and /account (needs the login cookie)
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "WebEngineFixture/1.0"
+
+    def log_message(self, format, *args) -> None:
+        ...
+
+    def _get_params(self) -> dict:
+        return {key: values[-1] for key, values in parse_qs(urlparse(self.path).query).items()}
+
+    def _send(self, body:bytes, status:int=200, content_type:str="text/html; charset=utf-8", headers:dict=None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _base_url(self) -> str:
+        return f"http://{self.headers.get('Host')}"
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        params = self._get_params()
+        routes = {
+            "/table": self._table,
+            "/delayed": self._delayed,
+            "/slow": self._slow,
+            "/files": self._files,
+            "/download": self._download,
+            "/list": self._list,
+            "/login": self._login_form,
+            "/account": self._account,
+        }
+        if path not in routes:
+            self._send(_page("Not found", ""), status=404)
+            return
+        routes[path](params)
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/login":
+            self._send(_page("Not found", ""), status=404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        form = {key: values[-1] for key, values in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+        if form.get("username") != self.server.username or form.get("password") != self.server.password:
+            self._send(_page("Login", "<p id='error'>invalid user</p>"), status=401)
+            return
+
+        session = secrets.token_hex(16)
+        self.server.sessions.add(session)
+        self._send(b"", status=303, headers={"Location": f"{self._base_url()}/account", "Set-Cookie": f"{SESSION_COOKIE}={session}; Path=/"})
+
+    def _table(self, params:dict) -> None:
+        rows, columns = int(params.get("rows", 500)), int(params.get("columns", 6))
+        header = "".join(f"<th>column_{column}</th>" for column in range(columns))
+        body = "".join(
+            "<tr>" + "".join(f"<td class='c{column}'>row {row} value {column}</td>" for column in range(columns)) + "</tr>"
+            for row in range(rows)
+        )
+        self._send(_page("Table", f"<table id='data'><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>"))
+
+    def _delayed(self, params:dict) -> None:
+        delay_ms = int(params.get("delay_ms", 500))
+        script = (
+            "<script>setTimeout(function () {"
+            "var element = document.createElement('p'); element.id = 'late'; element.textContent = 'loaded';"
+            f"document.body.appendChild(element);}}, {delay_ms});</script>"
+        )
+        self._send(_page("Delayed", "<p id='early'>waiting</p>", script))
+
+    def _slow(self, params:dict) -> None:
+        time.sleep(int(params.get("delay_ms", 500)) / 1000)
+        self._send(_page("Slow", "<p id='late'>loaded</p>"))
+
+    def _files(self, params:dict) -> None:
+        count, size_kb = int(params.get("count", 4)), int(params.get("size_kb", 256))
+        links = "".join(
+            f"<li><a class='file' href='/download?size_kb={size_kb}&name=file_{index}.bin'>file {index}</a></li>"
+            for index in range(count)
+        )
+        self._send(_page("Files", f"<ul id='files'>{links}</ul>"))
+
+    def _download(self, params:dict) -> None:
+        size = int(params.get("size_kb", 256)) * 1024
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.send_header("Content-Disposition", f"attachment; filename=\"{params.get('name', 'file.bin')}\"")
+        self.end_headers()
+        while size > 0:
+            chunk = CHUNK[:size]
+            self.wfile.write(chunk)
+            size -= len(chunk)
+
+    def _list(self, params:dict) -> None:
+        page, pages, items = int(params.get("page", 1)), int(params.get("pages", 5)), int(params.get("items", 50))
+        nav = "".join(
+            f"<a class='page' href='{self._base_url()}/list?page={number}&pages={pages}&items={items}'>{number}</a>"
+            for number in range(1, pages + 1)
+        )
+        body = "".join(f"<li class='item'><span class='name'>item {page}-{item}</span></li>" for item in range(items))
+        self._send(_page(f"List {page}", f"<nav>{nav}</nav><ul id='items'>{body}</ul>"))
+
+    def _login_form(self, params:dict) -> None:
+        form = (
+            "<form id='login' method='post' action='/login'>"
+            "<input id='username' name='username' type='text'>"
+            "<input id='password' name='password' type='password'>"
+            "<button id='submit' type='submit'>Login</button>"
+            "</form>"
+        )
+        self._send(_page("Login", form))
+
+    def _account(self, params:dict) -> None:
+        cookies = dict(
+            cookie.strip().split("=", 1) for cookie in self.headers.get("Cookie", "").split(";") if "=" in cookie
+        )
+        if cookies.get(SESSION_COOKIE) not in self.server.sessions:
+            self._send(b"", status=303, headers={"Location": f"{self._base_url()}/login"})
+            return
+        self._send(_page("Account", "<p id='welcome'>welcome</p>"))
+
+
+class FixtureServer():
+    """
+    ### FixtureServer
+    Local HTTP server with the benchmark fixture pages, in a daemon thread;
+    Use "port=0" to a free port, the url is in "self.base_url".
+    """
+    def __init__(self, host:str="127.0.0.1", port:int=0, username:str="bench", password:str="bench") -> None:
+        self.server = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.server.daemon_threads = True
+        self.server.username = username
+        self.server.password = password
+        self.server.sessions = set()
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'FixtureServer':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    with FixtureServer(port=8800) as fixture_server:
+        print(f"fixture server: {fixture_server.base_url}")
+        try:
+            fixture_server.thread.join()
+        except KeyboardInterrupt:
+            ...
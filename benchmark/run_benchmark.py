@@ -0,0 +1,306 @@
+"""
+End-to-end benchmark of WebEngine and WebMultithread against the local fixture server;
+Each scenario (command file) is executed sequentially by WebEngine and by WebMultithread with each "limit", the
+results (contents/minute, p50/p95 of each command, peak RSS) are written in a JSON file to compare runs:
+    >>> python run_benchmark.py --backend http --limits 1 4 8 --contents 16
+    >>> python run_benchmark.py --backend chrome --scenarios table login --compare results/benchmark_old.json
+"""
+from fixture_server import FixtureServer
+import sys
+import os
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from source.web_engine import WebEngine
+from source.web_multithread import WebMultithread
+from source.background_writer import BackgroundWriter
+from source.metrics import CommandMetrics, Histogram
+from contextlib import redirect_stdout
+import subprocess
+import threading
+import platform
+import argparse
+import datetime
+import tempfile
+import shutil
+import time
+import json
+
+
+COMMANDS_FOLDER = pathlib.Path(__file__).resolve().parent / "commands"
+RESULTS_FOLDER = pathlib.Path(__file__).resolve().parent / "results"
+
+SCENARIOS = {
+    # large table read in a page snapshot, one parquet row to each table row
+    "table": {"commands_path": "table.json", "backends": ("chrome", "http")},
+    # each page of the "nav" links is loaded and its title and last item are saved (a "for_each" inside the
+    # pages loop can't use "this", it would be replaced by the page link)
+    "pagination": {"commands_path": "pagination.json", "backends": ("chrome", "http")},
+    # login form, the account page is only loaded with the session cookie
+    "login": {"commands_path": "login.json", "backends": ("chrome", "http")},
+    # file links downloaded over HTTP with the driver cookies
+    "downloads": {"commands_path": "downloads.json", "backends": ("chrome", "http")},
+    # element added by a script after a delay
+    "delayed": {"commands_path": "delayed.json", "backends": ("chrome",)},
+}
+
+
+class PeakMemorySampler():
+    """
+    ### PeakMemorySampler
+    Peak RSS (MB) of the process and its children (Chrome, chromedriver) sampled each "interval" seconds;
+    Without psutil only the Python process is measured ("resource" peak, not available on Windows).
+    """
+    def __init__(self, interval:float=0.1) -> None:
+        self.interval = interval
+        self.peak_rss_mb = 0.0
+        self.source = "psutil"
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _get_rss_mb(self) -> float:
+        try:
+            import psutil
+        except ImportError:
+            psutil = None
+
+        if psutil:
+            process = psutil.Process()
+            rss = 0
+            for child in [process] + process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    ...
+            return rss / 1024 ** 2
+
+        try:
+            import resource
+        except ImportError:
+            self.source = "unavailable"
+            return 0.0
+        self.source = "resource (python process only)"
+        # KB on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / 1024 ** 2 if sys.platform == "darwin" else max_rss / 1024
+
+    def _run(self) -> None:
+        while not self.stop_event.is_set():
+            self.peak_rss_mb = max(self.peak_rss_mb, self._get_rss_mb())
+            self.stop_event.wait(self.interval)
+
+    def __enter__(self) -> 'PeakMemorySampler':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop_event.set()
+        self.thread.join()
+        self.peak_rss_mb = max(self.peak_rss_mb, self._get_rss_mb())
+
+
+def get_contents(scenario:str, args:argparse.Namespace, base_url:str, run_folder:str) -> list[dict]:
+    output_folder = os.path.join(run_folder, "output")
+    contents = []
+    for index in range(args.contents):
+        contents.append({
+            "commands_path": str(COMMANDS_FOLDER / SCENARIOS[scenario]["commands_path"]),
+            "driver_backend": args.backend,
+            "download_temp_path": os.path.join(run_folder, "download_temp", str(index)),
+            "download_path": os.path.join(run_folder, "downloads"),
+            "content_variables": {
+                "$base_url": base_url,
+                "$index": index,
+                "$output_folder": output_folder,
+                "$table_rows": args.table_rows,
+                "$pages": args.pages,
+                "$page_items": args.page_items,
+                "$download_count": args.download_count,
+                "$download_size_kb": args.download_size_kb,
+                "$delay_ms": args.delay_ms,
+                "$username": "bench",
+                "$password": "bench",
+                "content_name": scenario,
+            },
+            "performance_profile": args.performance_profile,
+        })
+    return contents
+
+
+def get_command_stats() -> dict:
+    """
+    ### get_command_stats
+    p50/p95 of each command (all contents, depths and outcomes) from the CommandMetrics of the run;
+    """
+    histograms = {}
+    errors = {}
+    for (command, _, _, outcome), histogram in CommandMetrics.get_state()["command_seconds"].items():
+        histograms.setdefault(command, Histogram()).merge(histogram)
+        if outcome != "ok":
+            errors[command] = errors.get(command, 0) + histogram.count
+    return {
+        command: {
+            "count": histogram.count,
+            "errors": errors.get(command, 0),
+            "p50_ms": round(histogram.quantile(0.5) * 1000, 3),
+            "p95_ms": round(histogram.quantile(0.95) * 1000, 3),
+            "max_ms": round(histogram.max * 1000, 3),
+        }
+        for command, histogram in sorted(histograms.items())
+    }
+
+
+def execute_engine(contents:list[dict]) -> list:
+    result = []
+    for content in contents:
+        try:
+            WebEngine(**content).execute_commands()
+            result.append(True)
+        except Exception:
+            result.append(False)
+    BackgroundWriter.close_all()
+    return result
+
+
+def run_case(scenario:str, mode:str, limit:int, args:argparse.Namespace, base_url:str) -> dict:
+    """
+    ### run_case
+    Execute the contents of a scenario with WebEngine (sequential) or WebMultithread("limit") and measure it;
+    """
+    run_folder = tempfile.mkdtemp(prefix=f"bench_{scenario}_")
+    contents = get_contents(scenario, args, base_url, run_folder)
+    if args.warmup:
+        # first use of the commands (lazy imports, compiled command files) is not measured
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull if not args.verbose else sys.stdout):
+            execute_engine(get_contents(scenario, args, base_url, os.path.join(run_folder, "warmup"))[:args.warmup])
+    CommandMetrics.reset()
+    try:
+        with PeakMemorySampler() as memory_sampler, open(os.devnull, "w") as devnull:
+            init_time = time.perf_counter()
+            with redirect_stdout(devnull if not args.verbose else sys.stdout):
+                if mode == "engine":
+                    result = execute_engine(contents)
+                else:
+                    result = WebMultithread(contents, limit=limit, reuse_drivers=args.reuse_drivers).execute_all_contents()
+            seconds = time.perf_counter() - init_time
+    finally:
+        if not args.keep_files:
+            shutil.rmtree(run_folder, ignore_errors=True)
+
+    return {
+        "scenario": scenario,
+        "mode": mode,
+        "limit": limit,
+        "contents": len(contents),
+        "failed_contents": result.count(False),
+        "seconds": round(seconds, 3),
+        "contents_per_minute": round(len(contents) / seconds * 60, 2),
+        "peak_rss_mb": round(memory_sampler.peak_rss_mb, 1),
+        "rss_source": memory_sampler.source,
+        "commands": get_command_stats(),
+    }
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=pathlib.Path(__file__).parent
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare_results(results:list[dict], previous_path:str, threshold:float) -> list[str]:
+    """
+    ### compare_results
+    Cases slower than the previous run by more than "threshold" (0.1 = 10%) in contents/minute or command p95;
+    """
+    with open(previous_path, encoding="utf-8") as file:
+        previous = {(case["scenario"], case["mode"], case["limit"]): case for case in json.load(file)["cases"]}
+
+    regressions = []
+    for case in results:
+        previous_case = previous.get((case["scenario"], case["mode"], case["limit"]))
+        if not previous_case:
+            continue
+        name = f"{case['scenario']}/{case['mode']}/limit={case['limit']}"
+        if case["contents_per_minute"] < previous_case["contents_per_minute"] * (1 - threshold):
+            regressions.append(f"{name}: contents/minute {previous_case['contents_per_minute']} -> {case['contents_per_minute']}")
+        for command, stats in case["commands"].items():
+            previous_stats = previous_case["commands"].get(command)
+            if previous_stats and stats["p95_ms"] > previous_stats["p95_ms"] * (1 + threshold):
+                regressions.append(f"{name}: {command} p95 {previous_stats['p95_ms']}ms -> {stats['p95_ms']}ms")
+    return regressions
+
+
+def print_case(case:dict) -> None:
+    print(
+        f"{case['scenario']:<11} {case['mode']:<12} limit={case['limit']:<3} "
+        f"{case['contents_per_minute']:>9} contents/min  {case['seconds']:>8}s  "
+        f"failed={case['failed_contents']}  peak_rss={case['peak_rss_mb']}MB"
+    )
+    for command, stats in case["commands"].items():
+        print(f"    {command:<20} n={stats['count']:<6} p50={stats['p50_ms']}ms  p95={stats['p95_ms']}ms  errors={stats['errors']}")
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="WebEngine end-to-end benchmark")
+    parser.add_argument("--backend", choices=("chrome", "http"), default="chrome")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--limits", nargs="+", type=int, default=[1, 4, 8], help="WebMultithread limits")
+    parser.add_argument("--contents", type=int, default=8, help="contents of each case")
+    parser.add_argument("--warmup", type=int, default=1, help="contents executed before each case, not measured")
+    parser.add_argument("--no-engine", dest="engine", action="store_false", help="skip the sequential WebEngine case")
+    parser.add_argument("--reuse-drivers", action="store_true")
+    parser.add_argument("--performance-profile", action="store_true")
+    parser.add_argument("--table-rows", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--page-items", type=int, default=50)
+    parser.add_argument("--download-count", type=int, default=4)
+    parser.add_argument("--download-size-kb", type=int, default=1024)
+    parser.add_argument("--delay-ms", type=int, default=500)
+    parser.add_argument("--output", default=False, help="result file, default results/benchmark_<datetime>.json")
+    parser.add_argument("--compare", default=False, help="previous result file to compare")
+    parser.add_argument("--threshold", type=float, default=0.1, help="regression threshold of --compare")
+    parser.add_argument("--keep-files", action="store_true", help="keep the downloads and parquet files")
+    parser.add_argument("--verbose", action="store_true", help="show the output of the commands")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = get_args()
+    cases = []
+    with FixtureServer() as fixture_server:
+        for scenario in args.scenarios:
+            if args.backend not in SCENARIOS[scenario]["backends"]:
+                print(f"{scenario}: skipped, needs the {SCENARIOS[scenario]['backends']} backend")
+                continue
+            modes = ([("engine", 1)] if args.engine else []) + [("multithread", limit) for limit in args.limits]
+            for mode, limit in modes:
+                case = run_case(scenario, mode, limit, args, fixture_server.base_url)
+                print_case(case)
+                cases.append(case)
+
+    output_path = args.output if args.output else str(RESULTS_FOLDER / f"benchmark_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as file:
+        json.dump({
+            "datetime": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_commit": get_git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "arguments": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "cases": cases,
+        }, file, indent=4)
+    print(f"results: {output_path}")
+
+    if args.compare:
+        regressions = compare_results(cases, args.compare, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
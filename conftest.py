@@ -0,0 +1,2 @@
+# "initial_test" is a manual example that launches Chrome, not a pytest module
+collect_ignore = ["initial_test"]
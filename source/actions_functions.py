@@ -1,44 +1,41 @@
 
 from functools import wraps
 from pathlib import Path
-import pandas as pd
 import ast
 import glob
-import pyautogui
 import pathlib
 import os
 import datetime
 import time
-import pywinauto
 import warnings
-import cv2
 import logging
+from .command_plan import CommandPlan
+from .lazy_import import LazyModule
+from .command_registry import CommandSet, command
 
 warnings.simplefilter('ignore', category=UserWarning)
-pyautogui.FAILSAFE = False
 
-class ActionsFunctions():
+def _set_pyautogui(module) -> None:
+    module.FAILSAFE = False
+
+# desktop dependencies, imported on the first action command (Windows with a display)
+pyautogui = LazyModule("pyautogui", plugin="desktop actions", package="PyAutoGUI", on_import=_set_pyautogui)
+pywinauto = LazyModule("pywinauto", plugin="desktop actions")
+cv2 = LazyModule("cv2", plugin="desktop actions", package="opencv-python")
+
+class ActionsFunctions(CommandSet):
     def __init__(self) -> None:
         self._set_actions_functions()
 
-    def _execute_action_commands(self, driver, action_commands: list):
-        command_line: dict
-        for command_line in action_commands:
-            for command, param in command_line.items():
-                result, message = self.functions[command](driver, **param)
-                if not result:
-                    self.close()
-                    message = f'[ActionsFunctions>execute_commands: ERROR] {command} {param}\nMessage: {message}'
-                    self._error_message(message)
+    def _execute_action_commands(self, driver, action_commands: list|CommandPlan):
+        for step in CommandPlan.compile(action_commands, self.functions):
+            result, message = self.functions[step.command](driver, **step.kwargs())
+            if not result:
+                message = f'[ActionsFunctions>execute_commands: ERROR] {step}\nMessage: {message}'
+                self._error_message(message)
 
     def _set_actions_functions(self) -> None:
-        functions = {}
-        for function_name in dir(self):
-            if function_name[0] != "_":
-                functions[function_name] = getattr(self, function_name)
-                self.functions = functions
-        functions.pop("get_actions_functions")
-        self.functions = functions
+        self.functions = self._get_bound_commands()
 
     def get_actions_functions(self):
         return self.functions
@@ -95,6 +92,7 @@ class ActionsFunctions():
             #     return False, e
         return _validation
 
+    @command(side_effects=("desktop",))
     @__validation
     def wait_window_open(self, driver, window_name: str, action_commands: list = [], wait_time: int = 2):
         self._execute_action_commands(driver, action_commands)
@@ -108,6 +106,7 @@ class ActionsFunctions():
             current_time = datetime.datetime.now() - init_time
             time.sleep(5)
 
+    @command(side_effects=("desktop",))
     @__validation
     def wait_number_of_windows(self, driver, app_name:str, window_names_contains:str, count_window:int|str, action_commands: list = [], wait_time:int|str=1):
         self._execute_action_commands(driver, action_commands)
@@ -123,6 +122,7 @@ class ActionsFunctions():
             current_time = datetime.datetime.now() - init_time
             time.sleep(5)
 
+    @command(side_effects=("desktop",))
     @__validation
     def drag_drop(self, driver, init_image_path:str, finish_image_path:str, search_time:float=5.0):
         init_image_cords = self._image_locate(os.path.join(driver.images_folder, init_image_path), search_time=search_time)
@@ -142,6 +142,7 @@ class ActionsFunctions():
             self._error_message(message)
 
 
+    @command(side_effects=("desktop",))
     @__validation
     def click_image(self, driver, image_path: str, check:bool=False, search_time:float=5.0, x: int = 0, y: int = 0):
         if check:
@@ -155,6 +156,7 @@ class ActionsFunctions():
             cords = self._image_locate(os.path.join(driver.images_folder, image_path), x, y, search_time)
             pyautogui.click(*cords)
 
+    @command(side_effects=("desktop",))
     @__validation
     def wait_image(self, driver, image_path:str, type:str="APPEAR", wait_time:str|int=1, search_time:float=5.0):
         if type == "APPEAR":
@@ -175,14 +177,17 @@ class ActionsFunctions():
                 message = f'[ActionsFunctions>wait_image: ERROR] "{image_path}" not disappear!'
             self._error_message(message)
 
+    @command(side_effects=("desktop",))
     @__validation
     def write(self, driver, text: str, interval: bool = 0):
         pyautogui.write(text, interval=interval)
 
+    @command(side_effects=("desktop",))
     @__validation
     def press_key(self, driver, keys: str, presses:int=1):
         pyautogui.press(keys, presses=presses)
 
+    @command(side_effects=("desktop",))
     @__validation
     def focus_on_the_window(self, driver, app_name:str, window_names_contains:str):
         for w in self._found_app(app_name).windows():
@@ -190,12 +195,14 @@ class ActionsFunctions():
                 w.type_keys('{VK_RIGHT}')
                 break
         
+    @command(side_effects=("desktop",))
     @__validation
     def close_windows(self, driver, app_name:str, window_names_contains:str):
         for w in self._found_app(app_name).windows():
             if window_names_contains in w.window_text():
                 w.close()
 
+    @command(side_effects=("desktop",))
     @__validation
     def search_window(self, driver, app_name:str, window_names_contains:str, search_image:str, search_time:int|str=5):
         find = False
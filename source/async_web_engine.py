@@ -0,0 +1,192 @@
+from .web_engine import WebEngine
+from .web_multithread import WebMultithread
+from .async_web_functions import AsyncWebFunctions
+from .background_writer import BackgroundWriter
+from .log_store import LogStore
+from .metrics import CommandMetrics
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import logging
+import time
+
+
+class AsyncWebEngine(WebEngine):
+    """
+    ### AsyncWebEngine
+    WebEngine driven by a asyncio event loop: "async_execute_commands" awaits the coroutine commands of
+    AsyncWebFunctions (sleep, wait, download_action, try_while) and runs the other (blocking) commands in "executor";
+    Use "AsyncWebEngine.create" to launch the driver without blocking the event loop.
+
+    The commands executed inside a blocking command (for_each, block_commands, ...) use the inherited
+    "execute_commands" in the executor thread.
+    """
+    def __init__(self, *args, executor:ThreadPoolExecutor=None, semaphores:dict[str:asyncio.Semaphore]=None, **kwargs) -> None:
+        self.executor = executor
+        self.semaphores = semaphores if semaphores else {}
+        super().__init__(*args, **kwargs)
+        self.async_functions = AsyncWebFunctions(self).get_async_functions()
+
+    @classmethod
+    async def create(cls, *args, executor:ThreadPoolExecutor=None, **kwargs) -> 'AsyncWebEngine':
+        """
+        ### create
+        Create the engine in "executor" (launching Chrome is blocking);
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(cls, *args, executor=executor, **kwargs))
+
+    async def _run(self, function, *args, **kwargs):
+        """
+        ### _run
+        Run a blocking function (WebDriver calls) in the engine executor;
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(function, *args, **kwargs))
+
+    async def _async_execute_command(self, driver, command:str, params:dict) -> tuple:
+        """
+        ### _async_execute_command
+        Await a coroutine command, observed in CommandMetrics like "_execute_command";
+        """
+        init_time = time.perf_counter()
+        outcome = "error"
+        try:
+            result, message = await self.async_functions[command](driver, **params)
+            outcome = "ok" if result else "failed"
+            return result, message
+        finally:
+            CommandMetrics.observe_command(command, self.content_name, self.execution_depth, outcome, time.perf_counter() - init_time)
+
+    async def _execute_command_function(self, driver, command:str, params:dict) -> tuple:
+        if command in self.async_functions:
+            function = partial(self._async_execute_command, driver, command, params)
+        else:
+            function = partial(self._run, self._execute_command, driver, command, params)
+
+        if command in self.semaphores:
+            init_time = time.perf_counter()
+            async with self.semaphores[command]:
+                CommandMetrics.observe_wait(command, self.content_name, time.perf_counter() - init_time)
+                return await function()
+        return await function()
+
+    async def async_execute_commands(self, driver=False, commands=False):
+        """
+        ### async_execute_commands
+        Execute the commands like "execute_commands", awaiting each command;
+        If the task is cancelled, the top level execution still quits (or releases) the driver.
+        """
+        driver = self.driver if not driver else driver
+        commands = self._get_plan(self.commands if not commands else commands)
+        message_error = False
+        step = False
+        self.execution_depth += 1
+        try:
+            first_index = await self._run(self._get_resume_index, driver, commands)
+            for step in self._iter_steps(commands, first_index):
+                command = step.command
+                self._set_startup_time()
+                command_driver = await self._run(self._get_command_driver, driver, command)
+                result, message = await self._execute_command_function(command_driver, command, step.kwargs())
+                if not result:
+                    message_error = \
+                        f"[AsyncWebEngine>async_execute_commands: ERROR]\n" \
+                        f"command: {step}\n error: {message}"
+                    break
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            message_error = \
+                f"[AsyncWebEngine>async_execute_commands: ERROR]\n" \
+                f"command: {step}\n error: {e}\n" \
+                f"content_variables: {self.content_variables}"
+        finally:
+            self.execution_depth -= 1
+            if self.execution_depth == 0:
+                await asyncio.shield(self._run(self._check_to_quit, driver))
+
+        if message_error:
+            self._error_message(message_error)
+            raise Exception(message_error)
+        if self.execution_depth == 0:
+            self._remove_checkpoint()
+
+
+class AsyncWebMultithread(WebMultithread):
+    """
+    ### AsyncWebMultithread
+    Execute the contents with AsyncWebEngine in one event loop, at most "limit" contents at the same time;
+    The blocking WebDriver calls use a executor of "executor_workers" threads (default: 2 to each running content),
+    while the waits, sleeps and download polls don't use a thread.
+    """
+    def __init__(self, contents, limit=10, reuse_drivers:bool=False, export_logs_excel:bool=False, executor_workers:int=False, metrics_folder:str=False, checkpoints:bool|str=False) -> None:
+        super().__init__(contents, limit=limit, reuse_drivers=reuse_drivers, export_logs_excel=export_logs_excel, metrics_folder=metrics_folder, checkpoints=checkpoints)
+        self.executor_workers = executor_workers if executor_workers else limit * 2
+
+    async def execute_content_commands(self, content:dict, index:int, result:list, semaphores:dict, executor:ThreadPoolExecutor) -> None:
+        try:
+            web_engine = await AsyncWebEngine.create(executor=executor, semaphores=semaphores, driver_pool=self.driver_pool, **self.get_checkpoint_content(content))
+            await web_engine.async_execute_commands()
+            result[index] = True
+        except asyncio.CancelledError:
+            result[index] = False
+            raise
+        except Exception as e:
+            logging.error(f"[AsyncWebMultithread>execute_content_commands: ERROR] content {index}: {e}")
+            result[index] = False
+
+    async def execute_all_contents(self, quit_driver_pool:bool=True) -> list:
+        """
+        ### execute_all_contents
+        Execute all contents and return the result of each one (True if it executed correctly);
+        """
+        result = [None] * len(self.contents)
+        limit = asyncio.Semaphore(self.limit)
+        # one asyncio lock to each command serialized in "get_semaphores"
+        semaphores = {command: asyncio.Semaphore(1) for command in self.get_semaphores()}
+
+        async def execute_content(index:int, content:dict) -> None:
+            async with limit:
+                await self.execute_content_commands(content, index, result, semaphores, executor)
+
+        executor = ThreadPoolExecutor(max_workers=self.executor_workers)
+        try:
+            await asyncio.gather(*(execute_content(index, content) for index, content in enumerate(self.contents)))
+        finally:
+            executor.shutdown(wait=False)
+            if self.export_logs_excel:
+                LogStore.export_all_excel()
+            BackgroundWriter.close_all()
+            self.export_metrics()
+            if quit_driver_pool:
+                self.quit_driver_pool()
+        return result
+
+    async def execute_all_contents_util_no_errors(self, attempts:int=2) -> list:
+        initial_attempts = attempts
+        all_results = []
+
+        while attempts != 0:
+            running_result = await self.execute_all_contents(quit_driver_pool=False)
+            all_results.append(running_result)
+            error_results = self.get_error_results(running_result)
+            if error_results == []:
+                break
+            else:
+                self.set_contents(error_results)
+            attempts -= 1
+        self.quit_driver_pool()
+
+        if attempts == 0:
+            print(f"[AsyncWebMultithread>execute_all_contents_util_no_errors: WARNING] cannot be execute with {initial_attempts} attempts!")
+        return all_results
+
+    def run(self, attempts:int=1) -> list:
+        """
+        ### run
+        Execute the contents in a new event loop, from synchronous code;
+        """
+        if attempts > 1:
+            return asyncio.run(self.execute_all_contents_util_no_errors(attempts))
+        return asyncio.run(self.execute_all_contents())
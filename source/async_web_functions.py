@@ -0,0 +1,179 @@
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.support import expected_conditions as EC
+from functools import partial, wraps
+import asyncio
+import datetime
+import time
+
+
+def _async_validation(func):
+    """
+    ### _async_validation
+    Async "WebFunctionsEngine._validation" and "_get_web_element_atributte": resolve the tags of the parameters
+    (in the engine executor) and return if the command executed corretly;
+    """
+    @wraps(func)
+    async def _async_validation(self, driver, **kwargs):
+        try:
+            if any(isinstance(value, str) and "{" in value for value in kwargs.values()):
+                kwargs = await self.web_engine._run(self._get_params, driver, kwargs)
+            await func(self, driver, **kwargs)
+            return True, ''
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return False, e
+    return _async_validation
+
+
+class AsyncWebFunctions():
+    """
+    ### AsyncWebFunctions
+    Coroutine versions of the WebFunctions commands that wait (sleep, wait, download_action, try_while);
+    The waits are done with "asyncio.sleep" and short WebDriver calls in the engine executor, so a waiting content
+    doesn't park a thread and can be cancelled between the checks. The other commands are executed by the
+    AsyncWebEngine in its executor.
+    """
+    ASYNC_COMMANDS = ("sleep", "wait", "download_action", "try_while")
+
+    def __init__(self, web_engine) -> None:
+        self.web_engine = web_engine
+        self.web_functions = web_engine.web_functions
+
+    def get_async_functions(self) -> dict:
+        return {name: getattr(self, name) for name in self.ASYNC_COMMANDS}
+
+    def _get_params(self, driver:WebDriver, kwargs:dict) -> dict:
+        memo = {}
+        return {key: self.web_functions._get_web_element_tag_result(driver, value, memo) for key, value in kwargs.items()}
+
+    @_async_validation
+    async def sleep(self, driver:WebDriver, timesec:str) -> None:
+        await asyncio.sleep(int(timesec))
+
+    @_async_validation
+    async def wait(
+        self,
+        driver:WebDriver,
+        type_wait:str,
+        element:str="*",
+        timeout:int=3000,
+        quiet_time:float=0.5,
+        max_request_time:float=30,
+        poll_time:float=0.25,
+    ) -> None:
+        """
+        ### wait
+        Same wait types of "WebFunctions.wait";
+        Each check is a short WebDriver call in the engine executor (the element checks don't wait inside the page),
+        and the content awaits "poll_time" seconds between the checks, so a waiting content doesn't hold a thread.
+        """
+        type_wait = type_wait.upper()
+        timeout = float(timeout)
+        run = self.web_engine._run
+
+        if type_wait == "NETWORK_IDLE":
+            network_requests = getattr(driver, "network_requests", None)
+            if network_requests is None:
+                message = "[AsyncWebFunctions>wait: ERROR] NETWORK_IDLE needs a WebEngine with 'network_events=True'."
+                self.web_functions._error_message(message)
+
+            deadline = time.monotonic() + timeout
+            idle_time = False
+            while True:
+                current_time = time.monotonic()
+                if await run(self.web_functions._check_network_idle, driver, network_requests, float(max_request_time)):
+                    idle_time = idle_time or current_time
+                    if current_time - idle_time >= float(quiet_time):
+                        return
+                else:
+                    idle_time = False
+
+                if current_time >= deadline:
+                    message = f"[AsyncWebFunctions>wait: ERROR] timeout of {timeout}s waiting NETWORK_IDLE, requests in flight: {len(network_requests)}"
+                    self.web_functions._error_message(message)
+                await asyncio.sleep(0.1)
+
+        if type_wait in ("APPEAR", "DISAPPEAR", "CLICKABLE", "PRESENCE"):
+            element_params = tuple(self.web_functions._get_element_prop(element, accept_web_element=False))
+            check = partial(self.web_functions._check_wait_element, driver, type_wait, element_params, 0)
+            type_wait = f"{type_wait} {element_params}"
+        elif type_wait == "DOCUMENT_READY":
+            check = partial(self.web_functions._check_document_ready, driver)
+        elif type_wait == "ALERT":
+            check = partial(EC.alert_is_present(), driver)
+        elif type_wait == "WINDOW":
+            window_handles = await run(lambda: driver.window_handles)
+            check = partial(EC.new_window_is_opened(window_handles), driver)
+        elif type_wait == "TAB":
+            check = partial(EC.number_of_windows_to_be(2), driver)
+        else:
+            message = "[AsyncWebFunctions>wait: ERROR] Select a valid appear value (APPEAR, DISAPPEAR, CLICKABLE, PRESENCE, ALERT, WINDOW, DOCUMENT_READY, NETWORK_IDLE)."
+            self.web_functions._error_message(message)
+
+        deadline = time.monotonic() + timeout
+        while not await run(check):
+            if time.monotonic() >= deadline:
+                message = f"[AsyncWebFunctions>wait: ERROR] timeout of {timeout}s waiting {type_wait}"
+                self.web_functions._error_message(message)
+            await asyncio.sleep(float(poll_time))
+
+    @_async_validation
+    async def download_action(
+        self,
+        driver:WebDriver,
+        action_commands:list,
+        wait_time:str|int,
+        finish_action_commands:list=False,
+        folder_element_name:str=False,
+        folder_name:str=False,
+        folder_name_date_format:dict=False,
+        file_name:str=False,
+        element_file_name=False,
+        file_extension=False,
+        file_name_date_format=False,
+        poll_time:float=1,
+    ) -> None:
+        """
+        ### download_action
+        Same parameters of "WebFunctions.download_action", the download temp folder is checked each "poll_time"
+        seconds with "asyncio.sleep";
+        """
+        run = self.web_engine._run
+        file_name = await run(self.web_functions._get_download_file_name, driver, file_name, element_file_name, file_name_date_format)
+        folder_name = await run(self.web_functions._get_download_folder_name, driver, folder_name, folder_element_name, folder_name_date_format)
+        download_key = f"download_action|{folder_name}|{file_name}" if file_name else False
+        if download_key and self.web_engine._get_completed_download(download_key):
+            return
+
+        await self.web_engine.async_execute_commands(driver, action_commands)
+
+        deadline = datetime.datetime.now() + datetime.timedelta(minutes=int(wait_time))
+        while datetime.datetime.now() <= deadline:
+            file_path = await run(self.web_functions._move_downloaded_file, driver, file_name, folder_name, file_extension)
+            if file_path:
+                if download_key:
+                    self.web_engine._add_completed_download(download_key, file_path)
+                break
+            await asyncio.sleep(float(poll_time))
+
+        if finish_action_commands:
+            await self.web_engine.async_execute_commands(driver, finish_action_commands)
+
+    @_async_validation
+    async def try_while(self, driver:WebDriver, action_command:list, wait_time:str|int=2) -> None:
+        deadline = datetime.datetime.now() + datetime.timedelta(minutes=int(wait_time))
+        last_error = False
+        while datetime.datetime.now() <= deadline:
+            try:
+                await self.web_engine.async_execute_commands(driver, action_command)
+                last_error = False
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                last_error = e
+            await asyncio.sleep(5)
+        if last_error:
+            message = f"[AsyncWebFunctions>try_while: WARNING] {last_error}"
+            self.web_functions._warning_message(message)
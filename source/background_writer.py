@@ -0,0 +1,223 @@
+from abc import ABC, abstractmethod
+from queue import Queue, Empty
+import threading
+import logging
+import weakref
+import atexit
+import glob
+import time
+import os
+
+
+class BackgroundWriter(ABC):
+    """
+    ### BackgroundWriter
+    Single writer to a file, the rows from all threads are put in a queue and written by one background thread
+    in batches, when the buffer has "max_rows" rows or "max_seconds" after the first buffered row;
+    Use "get_writer" to share the same writer to each file, the subclasses implement "_write", "merge_shards"
+    and optionally "_close".
+    """
+    writers = {}
+    writers_lock = threading.Lock()
+    # set in the WebMultiprocess worker processes: each process writes its own "<file>.<shard>" file, merged at the end
+    shard = False
+    opened_paths = set()
+
+    def __init__(self, path:str, max_rows:int=1000, max_seconds:float=5.0) -> None:
+        self.path = path
+        self.file_path = self.get_file_path(path)
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.queue = Queue()
+        self.closed = False
+        # engines that use the writer, see "release_writers"
+        self.users = weakref.WeakSet()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def get_writer(cls, path:str, user=None, **kwargs) -> 'BackgroundWriter':
+        """
+        ### get_writer
+        Return the writer of "path", creating it in the first call;
+
+        @param user: object (WebEngine) that uses the writer, the writer is closed by "release_writers" only
+        when all its users released it
+        """
+        key = (cls, str(path))
+        with cls.writers_lock:
+            writer = cls.writers.get(key)
+            if writer is None or writer.closed:
+                writer = cls(str(path), **kwargs)
+                cls.writers[key] = writer
+                BackgroundWriter.opened_paths.add(key)
+            if user is not None:
+                writer.users.add(user)
+            return writer
+
+    @classmethod
+    def release_writers(cls, user) -> None:
+        """
+        ### release_writers
+        Remove "user" from the writers it used, and close the writers without other users;
+        Writers still used by other engines are kept open (they are closed by their last user or "close_all").
+        """
+        with cls.writers_lock:
+            writers = []
+            for key, writer in list(cls.writers.items()):
+                if user not in writer.users:
+                    continue
+                writer.users.discard(user)
+                if not writer.users:
+                    cls.writers.pop(key)
+                    writers.append(writer)
+        for writer in writers:
+            writer.close()
+
+    @classmethod
+    def get_file_path(cls, path:str) -> str:
+        """
+        ### get_file_path
+        File written by this process: "path", or "<name>.<shard><extension>" in a shard process;
+        """
+        if not BackgroundWriter.shard:
+            return path
+        root, extension = os.path.splitext(path)
+        return f"{root}.{BackgroundWriter.shard}{extension}"
+
+    @classmethod
+    def get_shard_paths(cls, path:str) -> list[str]:
+        root, extension = os.path.splitext(path)
+        return sorted(glob.glob(f"{glob.escape(root)}.shard*{glob.escape(extension)}"))
+
+    @classmethod
+    @abstractmethod
+    def merge_shards(cls, path:str) -> None:
+        """
+        ### merge_shards
+        Add the rows of the shard files of "path" in the file, and remove the shard files;
+        """
+
+    @classmethod
+    def get_open_writer(cls, path:str) -> 'BackgroundWriter|None':
+        """
+        ### get_open_writer
+        Return the open writer of "path", without creating it;
+        """
+        with cls.writers_lock:
+            writer = cls.writers.get((cls, str(path)))
+        return writer if writer is not None and not writer.closed else None
+
+    @classmethod
+    def close_writer(cls, path:str, user=None) -> bool:
+        """
+        ### close_writer
+        Write the buffered rows and close the writer of "path", if it exists and no other user (running WebEngine)
+        than "user" uses it; Return False if the writer is kept open to its other users.
+        """
+        with cls.writers_lock:
+            writer = cls.writers.get((cls, str(path)))
+            if writer is not None and set(writer.users) - {user}:
+                return False
+            cls.writers.pop((cls, str(path)), None)
+        if writer is not None:
+            writer.close()
+        return True
+
+    @classmethod
+    def close_all(cls) -> None:
+        """
+        ### close_all
+        Write the buffered rows and close all writers of this class (and subclasses);
+        """
+        with cls.writers_lock:
+            writers = [writer for writer in cls.writers.values() if isinstance(writer, cls)]
+            for writer in writers:
+                cls.writers.pop((type(writer), writer.path), None)
+        for writer in writers:
+            writer.close()
+
+    def put(self, row) -> None:
+        if self.closed:
+            message = f"[{type(self).__name__}>put: ERROR] writer is closed: {self.path}"
+            raise Exception(message)
+        self.queue.put(("row", row))
+
+    def flush(self) -> None:
+        """
+        ### flush
+        Wait until all rows put before this call are written;
+        """
+        event = threading.Event()
+        self.queue.put(("flush", event))
+        event.wait()
+
+    def call(self, function, *args) -> None:
+        """
+        ### call
+        Execute "function" in the writer thread after the rows already put, and wait it;
+        """
+        event = threading.Event()
+        self.queue.put(("call", (function, args, event)))
+        event.wait()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(("close", None))
+        self.thread.join()
+
+    def _run(self) -> None:
+        buffer = []
+        first_row_time = False
+        while True:
+            timeout = None
+            if buffer:
+                timeout = max(0, self.max_seconds - (time.monotonic() - first_row_time))
+            try:
+                action, value = self.queue.get(timeout=timeout)
+            except Empty:
+                action, value = "timeout", None
+
+            if action == "row":
+                if not buffer:
+                    first_row_time = time.monotonic()
+                buffer.append(value)
+                if len(buffer) < self.max_rows:
+                    continue
+
+            buffer = self._write_buffer(buffer)
+            if action == "flush":
+                value.set()
+            elif action == "call":
+                function, args, event = value
+                self._safe_call(function, *args)
+                event.set()
+            elif action == "close":
+                self._safe_call(self._close)
+                break
+
+    def _write_buffer(self, buffer:list) -> list:
+        if buffer:
+            self._safe_call(self._write, buffer)
+        return []
+
+    def _safe_call(self, function, *args) -> None:
+        try:
+            function(*args)
+        except Exception as e:
+            logging.error(f"[{type(self).__name__}>{function.__name__}: ERROR] {self.path}\n{e}")
+
+    @abstractmethod
+    def _write(self, rows:list) -> None:
+        """
+        ### _write
+        Write a batch of rows in the file, executed only by the writer thread;
+        """
+
+    def _close(self) -> None:
+        ...
+
+
+atexit.register(BackgroundWriter.close_all)
@@ -0,0 +1,101 @@
+import threading
+import hashlib
+import logging
+import json
+import os
+
+
+def get_content_key(content:dict) -> str:
+    """
+    ### get_content_key
+    Key of a content in the CheckpointStore, the "checkpoint_key" of the content or a hash of its parameters;
+    """
+    if content.get("checkpoint_key"):
+        return str(content["checkpoint_key"])
+    content_text = json.dumps(
+        content, sort_keys=True, default=lambda value: getattr(value, "__qualname__", None) or repr(value)
+    )
+    return hashlib.sha1(content_text.encode("utf-8")).hexdigest()[:16]
+
+
+class Checkpoint():
+    """
+    ### Checkpoint
+    State of a content at a "checkpoint" command: a retry restores the cookies and the url and resumes at
+    "step_index" (the first top level command to execute), skipping the downloads in "downloads";
+
+    @param downloads: download key to the downloaded file path (see "WebEngine._add_completed_download")
+    @param results: "web_engine.results" that can be saved as JSON
+    """
+    def __init__(self, name:str, step_index:int, url:str=False, cookies:list=None, downloads:dict=None, results:dict=None) -> None:
+        self.name = name
+        self.step_index = step_index
+        self.url = url
+        self.cookies = cookies if cookies else []
+        self.downloads = downloads if downloads else {}
+        self.results = results if results else {}
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "step_index": self.step_index,
+            "url": self.url,
+            "cookies": self.cookies,
+            "downloads": self.downloads,
+            "results": self.results,
+        }
+
+    @classmethod
+    def from_dict(cls, data:dict) -> 'Checkpoint':
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return f"Checkpoint(name={self.name!r}, step_index={self.step_index}, url={self.url!r}, downloads={len(self.downloads)})"
+
+
+class CheckpointStore():
+    """
+    ### CheckpointStore
+    Last checkpoint of each content (by content key), shared by the engines of a WebMultithread;
+    With "folder", each checkpoint is also saved in "<folder>/<key>.json", so a new execution (or a worker process)
+    resumes the contents that failed in a previous one.
+    """
+    def __init__(self, folder:str=False) -> None:
+        self.folder = folder
+        self.checkpoints = {}
+        self.lock = threading.Lock()
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def _get_file_path(self, key:str) -> str:
+        return os.path.join(self.folder, f"{key}.json")
+
+    def get(self, key:str) -> Checkpoint|None:
+        with self.lock:
+            if key in self.checkpoints:
+                return self.checkpoints[key]
+        if not self.folder or not os.path.isfile(self._get_file_path(key)):
+            return None
+        try:
+            with open(self._get_file_path(key), encoding="utf-8") as file:
+                checkpoint = Checkpoint.from_dict(json.load(file))
+        except Exception as e:
+            logging.warning(f"[CheckpointStore>get: WARNING] checkpoint '{key}' not loaded: {e}")
+            return None
+        with self.lock:
+            return self.checkpoints.setdefault(key, checkpoint)
+
+    def save(self, key:str, checkpoint:Checkpoint) -> None:
+        with self.lock:
+            self.checkpoints[key] = checkpoint
+            if self.folder:
+                file_path = self._get_file_path(key)
+                with open(f"{file_path}.writing", "w", encoding="utf-8") as file:
+                    json.dump(checkpoint.to_dict(), file, default=str)
+                os.replace(f"{file_path}.writing", file_path)
+
+    def remove(self, key:str) -> None:
+        with self.lock:
+            self.checkpoints.pop(key, None)
+            if self.folder and os.path.isfile(self._get_file_path(key)):
+                os.remove(self._get_file_path(key))
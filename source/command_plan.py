@@ -0,0 +1,225 @@
+from types import MappingProxyType
+import threading
+import jstyleson
+import os
+import re
+
+
+def _is_command_list(value, functions:dict=None) -> bool:
+    """
+    ### _is_command_list
+    Check if a list is a list of commands ([{"command": {params}}, ...]);
+    """
+    if not isinstance(value, list) or not value:
+        return False
+    for command_line in value:
+        if not isinstance(command_line, dict) or not command_line:
+            return False
+        for command, param in command_line.items():
+            if not isinstance(param, dict):
+                return False
+            if functions is not None and command not in functions:
+                return False
+    return True
+
+
+def _freeze(value, functions:dict=None):
+    if isinstance(value, CommandPlan):
+        return value
+    if _is_command_list(value, functions):
+        return CommandPlan.compile(value, functions)
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(v, functions) for key, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v, functions) for v in value)
+    if isinstance(value, set):
+        return frozenset(_freeze(v, functions) for v in value)
+    return value
+
+
+def _thaw(value):
+    """
+    ### _thaw
+    Return a mutable copy of a frozen parameter, nested plans are shared as they are immutable;
+    """
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(v) for key, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    if isinstance(value, frozenset):
+        return {_thaw(v) for v in value}
+    return value
+
+
+def _iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, CommandPlan):
+        yield from value.strings
+    elif isinstance(value, MappingProxyType):
+        for v in value.values():
+            yield from _iter_strings(v)
+    elif isinstance(value, (tuple, frozenset)):
+        for v in value:
+            yield from _iter_strings(v)
+
+
+def _replace(value, function, predicate):
+    """
+    ### _replace
+    Copy-on-write replace of the strings inside a frozen parameter, unchanged values return the same object;
+    """
+    if isinstance(value, str):
+        if not predicate(value):
+            return value
+        new_value = function(value)
+        if isinstance(new_value, str) and new_value == value:
+            return value
+        return new_value
+
+    if isinstance(value, CommandPlan):
+        return value.replace(function, predicate)
+
+    if isinstance(value, MappingProxyType):
+        new_items = {key: _replace(v, function, predicate) for key, v in value.items()}
+        if all(new_items[key] is v for key, v in value.items()):
+            return value
+        return MappingProxyType(new_items)
+
+    if isinstance(value, (tuple, frozenset)):
+        new_values = [_replace(v, function, predicate) for v in value]
+        if all(new is old for new, old in zip(new_values, value)):
+            return value
+        return type(value)(new_values)
+    return value
+
+
+class CommandStep():
+    """
+    ### CommandStep
+    A single command of a CommandPlan, with its name and frozen parameters;
+    """
+    def __init__(self, command:str, params:MappingProxyType) -> None:
+        self.command = command
+        self.params = params
+        self.strings = tuple(_iter_strings(params))
+
+    def kwargs(self) -> dict:
+        """
+        ### kwargs
+        Parameters to call the command function, plain lists and dicts are copied so the function can change them;
+        """
+        return {key: _thaw(value) for key, value in self.params.items()}
+
+    def replace(self, function, predicate) -> 'CommandStep':
+        if not any(predicate(string) for string in self.strings):
+            return self
+        params = _replace(self.params, function, predicate)
+        if params is self.params:
+            return self
+        return CommandStep(self.command, params)
+
+    def __repr__(self) -> str:
+        return repr({self.command: _thaw(self.params)})
+
+
+class CommandPlan():
+    """
+    ### CommandPlan
+    Immutable execution plan of a commands list;
+    Nested command lists (action_commands, true_action_commands, ...) are compiled in nested plans, so a plan
+    is compiled once and shared by all contents, "bind" and "replace" only copy the steps they change.
+    """
+    def __init__(self, steps:tuple) -> None:
+        self.steps = steps
+        self.strings = tuple(string for step in steps for string in step.strings)
+
+    @classmethod
+    def compile(cls, commands:list, functions:dict=None) -> 'CommandPlan':
+        """
+        ### compile
+        Transform a commands list in a CommandPlan, checking the commands in "functions";
+        """
+        if isinstance(commands, CommandPlan):
+            return commands
+
+        steps = []
+        for command_line in commands:
+            if not isinstance(command_line, dict):
+                message = f"[CommandPlan>compile: ERROR] invalid command line, it has to be a dict! check {command_line}"
+                raise Exception(message)
+
+            for command, param in command_line.items():
+                if functions is not None and command not in functions:
+                    message = f"[CommandPlan>compile: ERROR] command '{command}' not found! check {command_line}"
+                    raise Exception(message)
+
+                if not isinstance(param, dict):
+                    message = f"[CommandPlan>compile: ERROR] command parameters have to be a dict! check {command_line}"
+                    raise Exception(message)
+
+                steps.append(CommandStep(command, _freeze(param, functions)))
+        return cls(tuple(steps))
+
+    def bind(self, variables:dict) -> 'CommandPlan':
+        """
+        ### bind
+        Replace the content variables in a single pass, sharing every step without variables;
+        """
+        if not variables:
+            return self
+
+        pattern = re.compile("|".join(
+            re.escape(key) for key in sorted(variables, key=len, reverse=True)
+        ))
+        return self.replace(
+            lambda string: pattern.sub(lambda match: str(variables[match.group(0)]), string),
+            pattern.search
+        )
+
+    def replace(self, function, predicate) -> 'CommandPlan':
+        """
+        ### replace
+        Apply "function" in the strings where "predicate" is True, returning a new plan only if some step changes;
+        """
+        if not any(predicate(string) for string in self.strings):
+            return self
+
+        steps = tuple(step.replace(function, predicate) for step in self.steps)
+        if all(new is old for new, old in zip(steps, self.steps)):
+            return self
+        return CommandPlan(steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __repr__(self) -> str:
+        return repr(list(self.steps))
+
+
+_commands_files = {}
+_commands_files_lock = threading.Lock()
+
+
+def load_commands_file(commands_path:str, functions:dict=None) -> CommandPlan:
+    """
+    ### load_commands_file
+    Read and compile a commands file only once, while the file is not changed;
+    """
+    commands_path = os.path.abspath(commands_path)
+    key = (commands_path, os.path.getmtime(commands_path), frozenset(functions or ()))
+
+    with _commands_files_lock:
+        if key in _commands_files:
+            return _commands_files[key]
+
+    with open(commands_path) as user_file:
+        commands = jstyleson.loads(user_file.read())
+    plan = CommandPlan.compile(commands, functions)
+
+    with _commands_files_lock:
+        _commands_files[key] = plan
+    return plan
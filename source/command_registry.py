@@ -0,0 +1,119 @@
+from types import MappingProxyType
+import inspect
+
+
+# side effects of a command, a command without side effects only reads the page
+SIDE_EFFECTS = {
+    "page": "changes the page or the browser state (navigation, inputs, cookies, windows)",
+    "file": "writes files (downloads, parquet, logs, screenshots)",
+    "network": "sends requests outside the browser",
+    "mail": "reads a mailbox",
+    "desktop": "uses the mouse, the keyboard or the desktop windows",
+    "commands": "executes nested commands, with their side effects",
+}
+
+
+class CommandInfo():
+    """
+    ### CommandInfo
+    Metadata of a command, read by the engines and by tooling (documentation, command file validation);
+
+    @param parameters: parameters of the command (without "self" and "driver") and their defaults
+    @param side_effects: keys of "SIDE_EFFECTS"
+    @param lock: the command must not run at the same time in two contents (WebMultithread semaphore)
+    @param http: the command can be executed by a HttpDriver
+    @param snapshot: the command only reads the page, it can use a PageSnapshot
+    """
+    def __init__(self, name:str, function, side_effects:tuple=(), lock:bool=False, http:bool=False, snapshot:bool=False) -> None:
+        invalid_side_effects = set(side_effects) - set(SIDE_EFFECTS)
+        if invalid_side_effects:
+            message = f"[CommandInfo>{name}: ERROR] {invalid_side_effects} not in side effects: {list(SIDE_EFFECTS)}"
+            raise Exception(message)
+
+        self.name = name
+        self.function = function
+        self.side_effects = tuple(side_effects)
+        self.lock = lock
+        self.http = http
+        self.snapshot = snapshot
+        # "inspect.signature" follows the "wraps" of the decorators to the command parameters
+        parameters = list(inspect.signature(function).parameters.values())[2:]
+        self.parameters = MappingProxyType({
+            parameter.name: (parameter.default if parameter.default is not inspect.Parameter.empty else None)
+            for parameter in parameters
+        })
+        self.required_parameters = tuple(parameter.name for parameter in parameters if parameter.default is inspect.Parameter.empty)
+        self.doc = inspect.getdoc(inspect.unwrap(function)) or ""
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "parameters": list(self.parameters),
+            "required_parameters": list(self.required_parameters),
+            "side_effects": list(self.side_effects),
+            "lock": self.lock,
+            "http": self.http,
+            "snapshot": self.snapshot,
+        }
+
+    def __repr__(self) -> str:
+        return f"CommandInfo({self.to_dict()})"
+
+
+def command(function=None, side_effects:tuple=(), lock:bool=False, http:bool=False, snapshot:bool=False):
+    """
+    ### command
+    Register a method as a command of its CommandSet class (the outermost decorator), ex.:
+        >>> @command(side_effects=("page",), http=True)
+        >>> @WebFunctionsEngine._validation
+        >>> def get(self, driver, url): ...
+    """
+    def decorator(function):
+        function.command_info = CommandInfo(function.__name__, function, side_effects, lock, http, snapshot)
+        return function
+
+    if function is not None:
+        return decorator(function)
+    return decorator
+
+
+class CommandSet():
+    """
+    ### CommandSet
+    Base of the classes with commands: the "@command" methods are collected once, when the class is defined, in
+    "cls.command_infos" (with the commands of the parent classes), so a new engine only binds them to its instance;
+    """
+    command_infos = MappingProxyType({})
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        command_infos = {}
+        for base in reversed(cls.__mro__[1:]):
+            command_infos.update(getattr(base, "command_infos", {}))
+        for name, value in vars(cls).items():
+            command_info = getattr(value, "command_info", None)
+            if command_info is not None:
+                command_infos[name] = command_info
+            elif name in command_infos:
+                # overridden without "@command", it's not a command anymore
+                command_infos.pop(name)
+        cls.command_infos = MappingProxyType(command_infos)
+
+    @classmethod
+    def get_command_names(cls, **filters) -> set[str]:
+        """
+        ### get_command_names
+        Names of the commands with the metadata in "filters", ex.:
+            >>> WebFunctions.get_command_names(http=True)
+        """
+        return {
+            name for name, command_info in cls.command_infos.items()
+            if all(getattr(command_info, key) == value for key, value in filters.items())
+        }
+
+    def _get_bound_commands(self) -> dict:
+        """
+        ### _get_bound_commands
+        The commands bound to the instance, by name;
+        """
+        return {name: command_info.function.__get__(self) for name, command_info in self.command_infos.items()}
@@ -0,0 +1,191 @@
+from .http_session import get_session
+from requests.exceptions import ConnectionError, ChunkedEncodingError, Timeout
+from urllib.parse import urlparse, unquote
+import requests
+import threading
+import hashlib
+import logging
+import json
+import time
+import re
+import os
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def get_driver_session(driver) -> requests.Session:
+    """
+    ### get_driver_session
+    Return a session with the cookies and the user agent of the driver, using the shared connection pool;
+    A HttpDriver already has a session, so it is used directly.
+    """
+    if isinstance(getattr(driver, "session", None), requests.Session):
+        return driver.session
+
+    session = get_session(driver.execute_script("return navigator.userAgent;"))
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+    return session
+
+
+class PathReservation():
+    """
+    ### PathReservation
+    File paths reserved by concurrent downloads to the same folder: a path already reserved gets a "_<n>" suffix,
+    so two urls with the same response file name (".../a/report.pdf", ".../b/report.pdf") don't replace each other;
+    """
+    def __init__(self) -> None:
+        self.paths = set()
+        self.lock = threading.Lock()
+
+    def reserve(self, file_path:str) -> str:
+        root, extension = os.path.splitext(file_path)
+        with self.lock:
+            number = 1
+            while file_path in self.paths:
+                number += 1
+                file_path = f"{root}_{number}{extension}"
+            self.paths.add(file_path)
+        return file_path
+
+
+def get_response_file_name(response:requests.Response) -> str:
+    """
+    ### get_response_file_name
+    File name of the "Content-Disposition" header, or of the url;
+    """
+    content_disposition = response.headers.get("Content-Disposition", "")
+    file_name = re.findall(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', content_disposition)
+    if file_name:
+        return os.path.basename(unquote(file_name[-1]))
+    return os.path.basename(unquote(urlparse(response.url).path)) or "download"
+
+
+def save_response(response:requests.Response, file_path:str, mode:str="wb", chunk_size:int=CHUNK_SIZE) -> int:
+    """
+    ### save_response
+    Write a streamed response in the file by chunks, without keeping the body in memory; Return the bytes written;
+    """
+    size = 0
+    with open(file_path, mode) as file:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            file.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def get_response_validator(response:requests.Response) -> str|bool:
+    """
+    ### get_response_validator
+    Validator of the response body to a "If-Range" header: a strong "ETag", or the "Last-Modified" date;
+    """
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified", False)
+
+
+def get_content_range_start(response:requests.Response) -> int|None:
+    """
+    ### get_content_range_start
+    First byte of a partial response ("Content-Range: bytes <start>-<end>/<size>");
+    """
+    content_range = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+    return int(content_range.group(1)) if content_range else None
+
+
+def _remove_files(*file_paths:str) -> None:
+    for file_path in file_paths:
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+
+
+def download_file(
+    session:requests.Session,
+    url:str,
+    file_path:str,
+    attempts:int=3,
+    timeout:int=60,
+    chunk_size:int=CHUNK_SIZE,
+    resume:bool=True,
+    file_stem:str=False,
+    path_reservation:PathReservation=False,
+) -> dict:
+    """
+    ### download_file
+    Stream the url to "file_path", the chunks are written in "<file_path>.part" (same folder) renamed at the end;
+    If "file_path" is a folder, the file name is the response file name ("Content-Disposition" or url).
+    When the connection fails, the download is resumed from the bytes already written with a "Range" request and a
+    "If-Range" header with the validator (ETag or Last-Modified) of the first response, saved in "<part>.json";
+    The bytes are appended only to a partial response that starts at the end of the ".part" file, otherwise (file
+    changed in the server, ranges not accepted, response without validator) the download is restarted.
+
+    @param resume: continue a ".part" file left by a previous execution, otherwise it is downloaded again
+    @param file_stem: name of the file saved in a folder, keeping the response file extension
+    @param path_reservation: reserve the file path (saved in a folder), to downloads running at the same time
+
+    Return the download stats: {"url", "file_path", "bytes", "seconds", "throughput_mb_s"}
+    """
+    # a folder: the file name comes from the response, the ".part" file is named by the url to be resumed
+    folder = file_path if os.path.isdir(file_path) else False
+    part_path = os.path.join(folder, f".{hashlib.sha1(url.encode()).hexdigest()[:16]}.part") if folder else f"{file_path}.part"
+    validator_path = f"{part_path}.json"
+    if not resume:
+        _remove_files(part_path, validator_path)
+
+    init_time = time.monotonic()
+    for attempt in range(1, attempts + 1):
+        written = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+        validator = False
+        if written and os.path.isfile(validator_path):
+            try:
+                with open(validator_path, encoding="utf-8") as file:
+                    validator = json.load(file).get("validator", False)
+            except ValueError:
+                validator = False
+        # without a validator a changed file can't be detected, so the ".part" file is not continued
+        headers = {"Range": f"bytes={written}-", "If-Range": validator} if validator else {}
+        try:
+            with session.get(url, headers=headers, stream=True, allow_redirects=True, timeout=timeout) as response:
+                # the name is resolved (and reserved) only in the first response
+                if folder and file_path == folder:
+                    file_name = get_response_file_name(response)
+                    if file_stem:
+                        file_name = f"{file_stem}{os.path.splitext(file_name)[1]}"
+                    file_path = os.path.join(folder, file_name)
+                    if path_reservation:
+                        file_path = path_reservation.reserve(file_path)
+                # 416: the ".part" file is already complete
+                if response.status_code == 416 and validator:
+                    break
+                response.raise_for_status()
+                resumed = validator and response.status_code == 206 and get_content_range_start(response) == written
+                if response.status_code == 206 and not resumed:
+                    # a range that doesn't continue the ".part" file, the next attempt downloads the whole file
+                    _remove_files(part_path, validator_path)
+                    raise ConnectionError(f"unexpected Content-Range: {response.headers.get('Content-Range')}")
+                if not resumed:
+                    with open(validator_path, "w", encoding="utf-8") as file:
+                        json.dump({"url": url, "validator": get_response_validator(response)}, file)
+                save_response(response, part_path, "ab" if resumed else "wb", chunk_size)
+            break
+        except (ConnectionError, ChunkedEncodingError, Timeout) as e:
+            if attempt == attempts:
+                message = f"[Downloader>download_file: ERROR] download failed after {attempts} attempts: {url}\n{e}"
+                raise Exception(message)
+            logging.warning(f"[Downloader>download_file: WARNING] attempt {attempt} failed, resuming: {url}\n{e}")
+
+    os.replace(part_path, file_path)
+    _remove_files(validator_path)
+    seconds = time.monotonic() - init_time
+    size = os.path.getsize(file_path)
+    stats = {
+        "url": url,
+        "file_path": file_path,
+        "bytes": size,
+        "seconds": round(seconds, 3),
+        "throughput_mb_s": round(size / 1024 / 1024 / seconds, 3) if seconds else None,
+    }
+    logging.info(f"[Downloader>download_file: INFO] {stats}")
+    return stats
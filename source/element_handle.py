@@ -0,0 +1,60 @@
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.common.exceptions import StaleElementReferenceException
+from .web_scripts import ELEMENTS_XPATH_JS
+
+
+class ElementHandle(WebElement):
+    """
+    ### ElementHandle
+    WebElement that records how it was found (root, locator and index);
+    When Selenium reports it as stale (after a navigation or a page update), it is found again and the command is
+    executed again, so loops don't need to find all elements again to each index.
+    """
+    def __init__(self, web_element:WebElement, root:WebDriver|WebElement, locator:tuple, index:int) -> None:
+        super().__init__(web_element.parent, web_element.id)
+        self.root = root
+        self.locator = locator
+        self.index = index
+
+    @classmethod
+    def wrap_elements(cls, root:WebDriver|WebElement, locator:tuple, web_elements:list[WebElement], snapshot_locators:bool=False) -> list['ElementHandle']:
+        """
+        ### wrap_elements
+        Return a ElementHandle to each element;
+
+        @param snapshot_locators: get a absolute XPath to each element in a single JavaScript execution, so the
+        elements are found again by their own position instead of the index in "locator"
+        """
+        if snapshot_locators and web_elements:
+            xpaths = web_elements[0].parent.execute_script(ELEMENTS_XPATH_JS, web_elements)
+            return [
+                cls(web_element, web_element.parent, (By.XPATH, xpath), 0)
+                for web_element, xpath in zip(web_elements, xpaths)
+            ]
+        return [cls(web_element, root, locator, index) for index, web_element in enumerate(web_elements)]
+
+    def find_again(self) -> None:
+        elements = self.root.find_elements(*self.locator)
+        if self.index >= len(elements):
+            message = f"[ElementHandle>find_again: ERROR] element {self.index} of {self.locator} not found again."
+            raise StaleElementReferenceException(message)
+        self._id = elements[self.index].id
+
+    def _retry_stale(self, function, *args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        except StaleElementReferenceException:
+            self.find_again()
+            return function(*args, **kwargs)
+
+    def _execute(self, command, params=None):
+        return self._retry_stale(super()._execute, command, dict(params or {}))
+
+    # functions executed by "execute_script" instead of "_execute"
+    def get_attribute(self, name):
+        return self._retry_stale(super().get_attribute, name)
+
+    def is_displayed(self) -> bool:
+        return self._retry_stale(super().is_displayed)
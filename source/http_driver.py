@@ -0,0 +1,192 @@
+from selenium.webdriver.common.by import By
+from .page_snapshot import SnapshotElement
+from .http_session import get_session
+from .downloader import save_response, get_response_file_name
+from urllib.parse import urljoin, urlparse
+from urllib.request import url2pathname
+from lxml import html as lxml_html
+import pathlib
+import os
+
+
+class BrowserRequired(Exception):
+    """
+    ### BrowserRequired
+    Action of a HttpDriver page that needs a browser, the WebEngine executes the command again in Chrome;
+    """
+
+
+class HttpElement(SnapshotElement):
+    """
+    ### HttpElement
+    Element of a HttpDriver page, links can be clicked and forms can be filled and submitted;
+    """
+    def click(self) -> None:
+        tag = self.element.tag
+        element_type = (self.element.get("type") or "").lower()
+
+        if tag == "a" and self.element.get("href"):
+            self.parent.get(self.element.get("href"))
+
+        elif (tag == "button" and element_type in ("", "submit")) or (tag == "input" and element_type in ("submit", "image")):
+            self._submit_form(self.element)
+
+        elif tag == "input" and element_type == "checkbox":
+            self.element.checked = not self.element.checked
+
+        elif tag == "input" and element_type == "radio":
+            self.element.checked = True
+
+        elif tag == "option":
+            self.element.set("selected", "selected")
+
+        else:
+            message = f"[HttpDriver>click: ERROR] '{tag}' element can't be clicked without a browser."
+            raise BrowserRequired(message)
+
+    def send_keys(self, *value) -> None:
+        self.element.value = (self.element.value or "") + "".join(str(v) for v in value)
+
+    def clear(self) -> None:
+        self.element.value = ""
+
+    def submit(self) -> None:
+        self._submit_form()
+
+    def _submit_form(self, submit_element:lxml_html.HtmlElement=None) -> None:
+        form = self.element if self.element.tag == "form" else next(self.element.iterancestors("form"), None)
+        if form is None:
+            message = "[HttpDriver>submit: ERROR] element is not inside a form."
+            raise Exception(message)
+
+        values = form.form_values()
+        if submit_element is not None and submit_element.get("name"):
+            values.append((submit_element.get("name"), submit_element.get("value", "")))
+
+        action = form.get("action") or self.parent.current_url
+        if (form.get("method") or "get").lower() == "post":
+            self.parent.request("POST", action, data=values)
+        else:
+            self.parent.request("GET", action, params=values)
+
+
+class HttpService():
+    def __init__(self) -> None:
+        self.connectable = True
+
+    def is_connectable(self) -> bool:
+        return self.connectable
+
+
+class HttpDriver():
+    """
+    ### HttpDriver
+    Browserless driver to static pages, using a pooled requests.Session and a lxml document;
+    It implements the WebDriver functions used by the commands in "WebFunctions.HTTP_COMMANDS", the other commands
+    (and the commands that raise BrowserRequired, like a click in a element with a javascript handler) make the
+    WebEngine change to Chrome ("fallback_driver") keeping the cookies and the current url.
+
+    Files (responses that are not html) are saved in "download_temp_folder", like a browser download.
+    """
+    def __init__(self, user_agent:str=False) -> None:
+        self.session = get_session(user_agent)
+        self.service = HttpService()
+        self.fallback_driver = False
+        self.download_temp_folder = False
+        self.current_url = "about:blank"
+        self.page_source = "<html><head></head><body></body></html>"
+        self.response = None
+        self._set_document()
+
+    def _set_document(self) -> None:
+        document = lxml_html.document_fromstring(self.page_source or "<html></html>", base_url=self.current_url)
+        if self.current_url.startswith("http"):
+            document.make_links_absolute(self.current_url)
+        self.document = HttpElement(document, self)
+
+    def request(self, method:str, url:str, **kwargs) -> None:
+        """
+        ### request
+        Request the url and load the response as the current page, or save it as a file;
+        """
+        if not os.path.isfile(url):
+            url = urljoin(self.current_url, url) if self.current_url.startswith(("http", "file")) else url
+        if urlparse(url).scheme not in ("http", "https"):
+            file_path = url2pathname(urlparse(url).path) if url.startswith("file:") else url
+            self.current_url = pathlib.Path(file_path).resolve().as_uri()
+            self.page_source = pathlib.Path(file_path).read_text(encoding="utf-8")
+            self._set_document()
+            return
+
+        with self.session.request(method, url, allow_redirects=True, stream=True, **kwargs) as response:
+            response.raise_for_status()
+            self.response = response
+
+            content_type = response.headers.get("Content-Type", "text/html")
+            if "html" in content_type or "xml" in content_type:
+                self.current_url = response.url
+                self.page_source = response.text
+                self._set_document()
+            elif self.download_temp_folder:
+                save_response(response, os.path.join(self.download_temp_folder, get_response_file_name(response)))
+            else:
+                message = f"[HttpDriver>request: ERROR] '{content_type}' response and no download folder: {url}"
+                raise Exception(message)
+
+    def get(self, url:str) -> None:
+        self.request("GET", url)
+
+    def find_element(self, by:str=By.ID, value:str=None) -> HttpElement:
+        return self.document.find_element(by, value)
+
+    def find_elements(self, by:str=By.ID, value:str=None) -> list[HttpElement]:
+        return self.document.find_elements(by, value)
+
+    @property
+    def title(self) -> str:
+        title = self.document.element.find(".//title")
+        return title.text_content() if title is not None else ""
+
+    @property
+    def window_handles(self) -> list[str]:
+        return ["http"] if self.service.connectable else []
+
+    @property
+    def current_window_handle(self) -> str:
+        return "http"
+
+    def add_cookie(self, cookie:dict) -> None:
+        self.session.cookies.set(
+            cookie["name"], cookie["value"],
+            domain=cookie.get("domain", urlparse(self.current_url).hostname or ""), path=cookie.get("path", "/")
+        )
+
+    def get_cookies(self) -> list[dict]:
+        return [
+            {"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path, "secure": cookie.secure}
+            for cookie in self.session.cookies
+        ]
+
+    def delete_all_cookies(self) -> None:
+        self.session.cookies.clear()
+
+    def execute_cdp_cmd(self, cmd:str, cmd_args:dict) -> dict:
+        if cmd == "Page.setDownloadBehavior":
+            self.download_temp_folder = cmd_args["downloadPath"]
+        elif cmd == "Network.clearBrowserCookies":
+            self.delete_all_cookies()
+        else:
+            message = f"[HttpDriver>execute_cdp_cmd: ERROR] '{cmd}' can't be used without a browser."
+            raise Exception(message)
+        return {}
+
+    def set_window_size(self, width:int, height:int) -> None:
+        ...
+
+    def close(self) -> None:
+        self.quit()
+
+    def quit(self) -> None:
+        # the session is not closed, it would close the shared connection pool
+        self.service.connectable = False
+        self.session.cookies.clear()
@@ -0,0 +1,21 @@
+from requests.adapters import HTTPAdapter
+import requests
+
+
+# one connection pool shared by every session, each session keeps its own cookies
+_http_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50)
+
+
+def get_session(user_agent:str=False) -> requests.Session:
+    """
+    ### get_session
+    Return a new requests.Session using the shared connection pool, so the TCP/TLS connections are reused
+    between contents while the cookies stay separated;
+    """
+    session = requests.Session()
+    session.mount("http://", _http_adapter)
+    session.mount("https://", _http_adapter)
+    session.verify = False
+    if user_agent:
+        session.headers["User-Agent"] = user_agent
+    return session
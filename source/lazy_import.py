@@ -0,0 +1,45 @@
+import importlib
+import threading
+
+
+class LazyModule():
+    """
+    ### LazyModule
+    Module imported on the first use of one of its attributes, so the optional dependencies of a command family
+    (plugin) are loaded only by the contents that execute its commands, ex.:
+        >>> pyautogui = LazyModule("pyautogui", plugin="desktop actions")
+        >>> pyautogui.click(10, 10)  # "import pyautogui" is executed here
+
+    @param plugin: name of the command family, used in the error message when the module can't be imported
+    @param package: pip package of the module (default: the module name)
+    @param on_import: function called with the module after the import (module settings)
+    """
+    def __init__(self, name:str, plugin:str, package:str=False, on_import=False) -> None:
+        self._name = name
+        self._plugin = plugin
+        self._package = package if package else name.split(".")[0]
+        self._on_import = on_import
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                try:
+                    module = importlib.import_module(self._name)
+                # pyautogui raises other errors when there isn't a display
+                except Exception as e:
+                    message = \
+                        f"[LazyModule>{self._name}: ERROR] the {self._plugin} commands need '{self._name}' " \
+                        f"(pip install {self._package}): {e}"
+                    raise ImportError(message) from e
+                if self._on_import:
+                    self._on_import(module)
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attribute:str):
+        return getattr(self._module if self._module is not None else self._load(), attribute)
+
+    def __repr__(self) -> str:
+        return f"<LazyModule '{self._name}' ({'loaded' if self._module is not None else 'not loaded'})>"
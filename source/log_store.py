@@ -0,0 +1,120 @@
+from .background_writer import BackgroundWriter
+from .lazy_import import LazyModule
+from contextlib import closing
+import datetime
+import sqlite3
+import json
+import csv
+import os
+
+
+pd = LazyModule("pandas", plugin="log reading/Excel")
+
+
+class LogStore(BackgroundWriter):
+    """
+    ### LogStore
+    Append-only log file, the records are queued and appended by the writer thread without reading the file back;
+    The format is chosen by the file extension: ".jsonl" (default), ".csv" or ".sqlite"/".db".
+    Use "export_excel" to create the Excel file of the logs at the end of the execution.
+    """
+    COLUMNS = ["datetime", "status", "message"]
+    SQLITE_EXTENSIONS = (".sqlite", ".db")
+
+    def __init__(self, path:str, max_rows:int=100, max_seconds:float=1.0) -> None:
+        self.extension = os.path.splitext(path)[1].lower()
+        if self.extension not in (".jsonl", ".csv") + self.SQLITE_EXTENSIONS:
+            message = f"[LogStore>__init__: ERROR] '{self.extension}' is not a log format, use '.jsonl', '.csv' or '.sqlite': {path}"
+            raise Exception(message)
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        self.connection = False
+        super().__init__(path, max_rows=max_rows, max_seconds=max_seconds)
+
+    def add_record(self, status, message) -> None:
+        self.put({"datetime": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"), "status": status, "message": message})
+
+    def _write(self, rows:list[dict]) -> None:
+        if self.extension == ".jsonl":
+            with open(self.file_path, "a", encoding="utf-8") as file:
+                file.writelines(json.dumps(row, default=str, ensure_ascii=False) + "\n" for row in rows)
+
+        elif self.extension == ".csv":
+            write_header = not os.path.isfile(self.file_path) or not os.path.getsize(self.file_path)
+            with open(self.file_path, "a", encoding="utf-8", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=self.COLUMNS)
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(rows)
+
+        else:
+            # the connection is created in the writer thread, sqlite connections can't be shared between threads
+            if not self.connection:
+                self.connection = sqlite3.connect(self.file_path)
+                self.connection.execute("CREATE TABLE IF NOT EXISTS logs (datetime TEXT, status TEXT, message TEXT)")
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO logs (datetime, status, message) VALUES (?, ?, ?)",
+                    [tuple(None if row[column] is None else str(row[column]) for column in self.COLUMNS) for row in rows]
+                )
+
+    def _close(self) -> None:
+        if self.connection:
+            self.connection.close()
+            self.connection = False
+
+    def read_records(self) -> 'pd.DataFrame':
+        """
+        ### read_records
+        Return all records of the log file, after the queued ones are written;
+        """
+        if not self.closed:
+            self.flush()
+        return self._read_file(self.file_path)
+
+    @classmethod
+    def _read_file(cls, file_path:str) -> 'pd.DataFrame':
+        extension = os.path.splitext(file_path)[1].lower()
+        if not os.path.isfile(file_path):
+            return pd.DataFrame(columns=cls.COLUMNS)
+
+        if extension == ".jsonl":
+            return pd.read_json(file_path, lines=True, dtype=False)
+        if extension == ".csv":
+            return pd.read_csv(file_path, dtype=str, keep_default_na=False)
+        with closing(sqlite3.connect(file_path)) as connection:
+            return pd.read_sql("SELECT datetime, status, message FROM logs", connection)
+
+    @classmethod
+    def merge_shards(cls, path:str) -> None:
+        shard_paths = cls.get_shard_paths(path)
+        if not shard_paths:
+            return
+        records = pd.concat([cls._read_file(shard_path) for shard_path in shard_paths], ignore_index=True)
+        log_store = cls.get_writer(path)
+        for record in records.sort_values("datetime").to_dict("records"):
+            log_store.put(record)
+        log_store.flush()
+        for shard_path in shard_paths:
+            os.remove(shard_path)
+
+    def export_excel(self, excel_path:str=False) -> str:
+        """
+        ### export_excel
+        Write all records in a Excel file, by default the log file with the ".xlsx" extension;
+        """
+        excel_path = excel_path if excel_path else f"{os.path.splitext(self.file_path)[0]}.xlsx"
+        self.read_records().to_excel(excel_path, index=False)
+        return excel_path
+
+    @classmethod
+    def export_all_excel(cls) -> list[str]:
+        """
+        ### export_all_excel
+        Export the Excel file of each opened log file;
+        """
+        with cls.writers_lock:
+            log_stores = [writer for writer in cls.writers.values() if isinstance(writer, cls)]
+        return [log_store.export_excel() for log_store in log_stores]
@@ -0,0 +1,346 @@
+from email.utils import parsedate_to_datetime
+from email import message_from_bytes, policy
+import threading
+import datetime
+import logging
+import mailbox
+import imaplib
+import atexit
+import json
+import re
+import os
+
+
+def _local_datetime(value:datetime.datetime|None) -> datetime.datetime:
+    """
+    ### _local_datetime
+    Naive local datetime, like "datetime.datetime.now()" used by the commands to the time windows;
+    """
+    if value is None:
+        return datetime.datetime.now()
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+class MailMessage():
+    def __init__(self, message_id:str, sender:str, subject:str, body:str, received_time:datetime.datetime) -> None:
+        self.message_id = message_id
+        self.sender = sender or ""
+        self.subject = subject or ""
+        self.body = body or ""
+        self.received_time = received_time
+
+    @classmethod
+    def from_email(cls, message_id:str, email_message, received_time:datetime.datetime=None) -> 'MailMessage':
+        """
+        ### from_email
+        Create a MailMessage from a "email" package message, the body is the text part (or the html part);
+        """
+        if received_time is None and email_message["Date"]:
+            try:
+                received_time = parsedate_to_datetime(str(email_message["Date"]))
+            except (TypeError, ValueError):
+                received_time = None
+
+        body_part = email_message.get_body(preferencelist=("plain", "html")) if hasattr(email_message, "get_body") else None
+        if body_part is not None:
+            body = body_part.get_content()
+        else:
+            payload = email_message.get_payload(decode=True) or b""
+            body = payload.decode(email_message.get_content_charset() or "utf-8", errors="replace")
+
+        sender = re.findall(r"[\w.+-]+@[\w.-]+", str(email_message["From"] or ""))
+        return cls(
+            message_id, sender[0] if sender else str(email_message["From"] or ""), str(email_message["Subject"] or ""),
+            body, _local_datetime(received_time)
+        )
+
+    def __repr__(self) -> str:
+        return f"MailMessage({self.sender!r}, {self.subject!r}, {self.received_time})"
+
+
+class OutlookBackend():
+    """
+    ### OutlookBackend
+    Messages of a Outlook folder, "inbox_name" can use '/' to get a subfolder;
+    The COM objects are created in the watcher thread (the only thread that uses them).
+    """
+    def __init__(self, account_name:str, inbox_name:str) -> None:
+        self.account_name = account_name
+        self.inbox_name = inbox_name
+        self.folder = None
+        self.seen_ids = set()
+
+    def _get_folder(self):
+        if self.folder is None:
+            import win32com.client
+            import pythoncom
+
+            pythoncom.CoInitialize()
+            outlook = win32com.client.Dispatch("Outlook.Application").GetNamespace("MAPI")
+            folder_splited = self.inbox_name.split("/")
+            folder = outlook.Folders.Item(self.account_name).Folders[folder_splited.pop(0)]
+            while folder_splited:
+                folder = folder.Folders[folder_splited.pop(0)]
+            self.folder = folder
+        return self.folder
+
+    def fetch_new(self, since:datetime.datetime) -> list[MailMessage]:
+        items = self._get_folder().Items.Restrict(f"[ReceivedTime] >= '{since.strftime('%m/%d/%Y %H:%M')}'")
+        messages = []
+        for item in items:
+            if item.EntryID in self.seen_ids:
+                continue
+            self.seen_ids.add(item.EntryID)
+            received_time = datetime.datetime.strptime(
+                str(item.ReceivedTime).replace("+00:00", "").split(".")[0], "%Y-%m-%d %H:%M:%S"
+            )
+            sender = item.SenderEmailAddress if getattr(item, "SenderEmailAddress", None) else ""
+            messages.append(MailMessage(item.EntryID, sender, item.Subject, item.Body, received_time))
+        return messages
+
+    def close(self) -> None:
+        self.folder = None
+
+
+class ImapBackend():
+    """
+    ### ImapBackend
+    Messages of a IMAP folder, read with "BODY.PEEK" (the messages are not marked as read);
+    """
+    def __init__(self, host:str, user:str, password:str, folder:str="INBOX", port:int=993, ssl:bool=True) -> None:
+        self.host = host
+        self.user = user
+        self.password = password
+        self.folder = folder
+        self.port = port
+        self.ssl = ssl
+        self.connection = None
+        self.seen_ids = set()
+
+    def _get_connection(self) -> imaplib.IMAP4:
+        if self.connection is None:
+            connection = imaplib.IMAP4_SSL(self.host, self.port) if self.ssl else imaplib.IMAP4(self.host, self.port)
+            connection.login(self.user, self.password)
+            connection.select(self.folder, readonly=True)
+            self.connection = connection
+        return self.connection
+
+    def fetch_new(self, since:datetime.datetime) -> list[MailMessage]:
+        try:
+            connection = self._get_connection()
+            # "SINCE" has a day precision, the time window is checked by the watcher
+            status, data = connection.uid("SEARCH", None, "SINCE", since.strftime("%d-%b-%Y"))
+        except (imaplib.IMAP4.abort, OSError):
+            self.connection = None
+            raise
+
+        messages = []
+        for uid in data[0].split() if status == "OK" and data and data[0] else []:
+            if uid in self.seen_ids:
+                continue
+            self.seen_ids.add(uid)
+            status, fetched = connection.uid("FETCH", uid, "(INTERNALDATE BODY.PEEK[])")
+            if status != "OK" or not fetched or not isinstance(fetched[0], tuple):
+                continue
+            internal_date = imaplib.Internaldate2tuple(fetched[0][0])
+            received_time = datetime.datetime(*internal_date[:6]) if internal_date else None
+            email_message = message_from_bytes(fetched[0][1], policy=policy.default)
+            messages.append(MailMessage.from_email(uid.decode(), email_message, received_time))
+        return messages
+
+    def close(self) -> None:
+        if self.connection is not None:
+            try:
+                self.connection.logout()
+            except (imaplib.IMAP4.error, OSError):
+                pass
+            self.connection = None
+
+
+class LocalMailboxBackend():
+    """
+    ### LocalMailboxBackend
+    Messages of a local maildir (folder) or mbox (file), to test the mail commands without a mail server;
+    """
+    def __init__(self, path:str) -> None:
+        self.path = path
+        self.seen_ids = set()
+
+    def _get_mailbox(self) -> mailbox.Mailbox:
+        if os.path.isdir(self.path):
+            return mailbox.Maildir(self.path, create=False)
+        return mailbox.mbox(self.path, create=False)
+
+    def fetch_new(self, since:datetime.datetime) -> list[MailMessage]:
+        local_mailbox = self._get_mailbox()
+        messages = []
+        try:
+            for key in local_mailbox.keys():
+                if key in self.seen_ids:
+                    continue
+                self.seen_ids.add(key)
+                local_message = local_mailbox[key]
+                # maildir delivery time, the "Date" header is used to mbox messages
+                received_time = None
+                if isinstance(local_message, mailbox.MaildirMessage):
+                    received_time = datetime.datetime.fromtimestamp(local_message.get_date())
+                email_message = message_from_bytes(local_message.as_bytes(), policy=policy.default)
+                messages.append(MailMessage.from_email(key, email_message, received_time))
+        finally:
+            local_mailbox.close()
+        return messages
+
+    def close(self) -> None:
+        ...
+
+
+def get_mail_backend(mailbox_config:dict):
+    """
+    ### get_mail_backend
+    Create the backend of a mailbox configuration:
+        >>> {"backend": "outlook", "account_name": "me@company.com", "inbox_name": "Inbox/Tokens"}
+        >>> {"backend": "imap", "host": "imap.company.com", "user": "me", "password": "...", "folder": "INBOX"}
+        >>> {"backend": "local", "path": "tests/mail/Maildir"}
+    """
+    mailbox_config = dict(mailbox_config)
+    backend = mailbox_config.pop("backend", "outlook")
+    backends = {
+        "outlook": OutlookBackend,
+        "imap": ImapBackend,
+        "local": LocalMailboxBackend,
+        "maildir": LocalMailboxBackend,
+        "mbox": LocalMailboxBackend,
+    }
+    if backend not in backends:
+        message = f"[MailWatcher>get_mail_backend: ERROR] '{backend}' not in mail backends: {list(backends)}"
+        raise Exception(message)
+    return backends[backend](**mailbox_config)
+
+
+class MailWatcher():
+    """
+    ### MailWatcher
+    One background thread to each mailbox, that indexes the new messages once and routes them to the waiting workers;
+    The mailbox is polled only while a worker is waiting, and each message is delivered to a single worker (the first
+    waiting one that matches it), so workers waiting tokens from the same sender receive different messages.
+    """
+    watchers = {}
+    watchers_lock = threading.Lock()
+
+    def __init__(self, backend, poll_seconds:float=5, retention_seconds:float=3600) -> None:
+        self.backend = backend
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        self.messages = []
+        self.waiters = []
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def get_watcher(cls, mailbox_config:dict, **kwargs) -> 'MailWatcher':
+        """
+        ### get_watcher
+        Return the watcher of the mailbox, creating it in the first call;
+        """
+        key = json.dumps(mailbox_config, sort_keys=True, default=str)
+        with cls.watchers_lock:
+            watcher = cls.watchers.get(key)
+            if watcher is None or watcher.stopped:
+                watcher = cls(get_mail_backend(mailbox_config), **kwargs)
+                cls.watchers[key] = watcher
+            return watcher
+
+    @classmethod
+    def stop_all(cls) -> None:
+        with cls.watchers_lock:
+            watchers = list(cls.watchers.values())
+            cls.watchers.clear()
+        for watcher in watchers:
+            watcher.stop()
+
+    def stop(self) -> None:
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _matches(self, mail_message:MailMessage, waiter:dict) -> re.Match|bool:
+        if mail_message.received_time <= waiter["since"]:
+            return False
+        if waiter["sender"] and mail_message.sender.lower() != waiter["sender"].lower():
+            return False
+        if waiter["subject"] and mail_message.subject != waiter["subject"]:
+            return False
+        if waiter["pattern"]:
+            return re.search(waiter["pattern"], mail_message.body) or False
+        return True
+
+    def wait_message(
+        self,
+        since:datetime.datetime,
+        timeout:float,
+        sender:str=False,
+        subject:str=False,
+        pattern:str=False,
+    ) -> MailMessage|None:
+        """
+        ### wait_message
+        Wait the first message received after "since" that matches the filters, or return None after "timeout";
+
+        @param sender: sender email address
+        @param subject: message subject
+        @param pattern: re pattern that must be found in the message body
+        """
+        waiter = {"since": since, "sender": sender, "subject": subject, "pattern": pattern}
+        deadline = datetime.datetime.now() + datetime.timedelta(seconds=timeout)
+        with self.condition:
+            self.waiters.append(waiter)
+            self.condition.notify_all()
+            try:
+                while not self.stopped:
+                    for mail_message in self.messages:
+                        if self._matches(mail_message, waiter):
+                            self.messages.remove(mail_message)
+                            return mail_message
+
+                    remaining = (deadline - datetime.datetime.now()).total_seconds()
+                    if remaining <= 0:
+                        return None
+                    self.condition.wait(remaining)
+            finally:
+                self.waiters.remove(waiter)
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.waiters and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    break
+                since = min(waiter["since"] for waiter in self.waiters)
+
+            try:
+                messages = self.backend.fetch_new(since)
+            except Exception as e:
+                logging.error(f"[MailWatcher>_run: ERROR] {e}")
+                messages = []
+
+            with self.condition:
+                oldest_time = datetime.datetime.now() - datetime.timedelta(seconds=self.retention_seconds)
+                self.messages = sorted(
+                    [mail_message for mail_message in self.messages + messages if mail_message.received_time > oldest_time],
+                    key=lambda mail_message: mail_message.received_time
+                )
+                self.condition.notify_all()
+                if not self.stopped:
+                    self.condition.wait(self.poll_seconds)
+
+        self.backend.close()
+
+
+atexit.register(MailWatcher.stop_all)
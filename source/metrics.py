@@ -0,0 +1,195 @@
+import threading
+import json
+import math
+import os
+
+
+# seconds, the downloads and the mail waits take minutes
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, math.inf)
+
+
+class Histogram():
+    """
+    ### Histogram
+    Count of observations by bucket (upper bound in seconds), with their sum, min and max;
+    """
+    def __init__(self) -> None:
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value:float) -> None:
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, histogram:'Histogram') -> None:
+        self.buckets = [count + other_count for count, other_count in zip(self.buckets, histogram.buckets)]
+        self.count += histogram.count
+        self.sum += histogram.sum
+        self.min = min(self.min, histogram.min)
+        self.max = max(self.max, histogram.max)
+
+    def quantile(self, quantile:float) -> float:
+        """
+        ### quantile
+        Quantile interpolated inside its bucket, limited by the min and the max observations;
+        """
+        if not self.count:
+            return 0.0
+        rank = quantile * self.count
+        cumulative = 0
+        lower_bound = 0.0
+        for bound, count in zip(BUCKETS, self.buckets):
+            if count and cumulative + count >= rank:
+                lower_bound, upper_bound = max(lower_bound, self.min), min(bound, self.max)
+                return lower_bound + (upper_bound - lower_bound) * (rank - cumulative) / count
+            cumulative += count
+            lower_bound = bound
+        return self.max
+
+    def get_summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0,
+            "min": round(self.min, 6) if self.count else 0,
+            "max": round(self.max, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+        }
+
+
+class CommandMetrics():
+    """
+    ### CommandMetrics
+    In-process histograms of the executed commands, shared by all engines of the process:
+        -   "command_seconds": execution time by command, content, nesting depth and outcome (ok, failed, error)
+        -   "semaphore_wait_seconds": time waiting a semaphore by semaphore (command name or "limit") and content
+    Use "export" to write them as a Prometheus textfile and a JSON summary;
+    """
+    LABELS = {
+        "command_seconds": ("command", "content", "depth", "outcome"),
+        "semaphore_wait_seconds": ("semaphore", "content"),
+    }
+    HELP = {
+        "command_seconds": "Execution time of the web engine commands",
+        "semaphore_wait_seconds": "Time waiting a semaphore before a command or a content",
+    }
+    histograms = {name: {} for name in LABELS}
+    lock = threading.Lock()
+
+    @classmethod
+    def _observe(cls, name:str, labels:tuple, value:float) -> None:
+        with cls.lock:
+            histogram = cls.histograms[name].get(labels)
+            if histogram is None:
+                histogram = cls.histograms[name][labels] = Histogram()
+            histogram.observe(value)
+
+    @classmethod
+    def observe_command(cls, command:str, content:str, depth:int, outcome:str, seconds:float) -> None:
+        cls._observe("command_seconds", (command, content, str(depth), outcome), seconds)
+
+    @classmethod
+    def observe_wait(cls, semaphore:str, content:str, seconds:float) -> None:
+        cls._observe("semaphore_wait_seconds", (semaphore, content), seconds)
+
+    @classmethod
+    def get_state(cls) -> dict:
+        """
+        ### get_state
+        Copy of the histograms, to send them to other process ("merge");
+        """
+        with cls.lock:
+            state = {}
+            for name, histograms in cls.histograms.items():
+                state[name] = {}
+                for labels, histogram in histograms.items():
+                    state[name][labels] = Histogram()
+                    state[name][labels].merge(histogram)
+            return state
+
+    @classmethod
+    def merge(cls, state:dict) -> None:
+        with cls.lock:
+            for name, histograms in state.items():
+                for labels, histogram in histograms.items():
+                    cls.histograms[name].setdefault(labels, Histogram()).merge(histogram)
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls.lock:
+            cls.histograms = {name: {} for name in cls.LABELS}
+
+    @classmethod
+    def get_summary(cls) -> dict:
+        """
+        ### get_summary
+        Summary (count, sum, mean, min, max, p50, p95, p99) of each histogram, ex.:
+            >>> {"command_seconds": [{"command": "get", "content": "login", "depth": "1", "outcome": "ok", "count": 10, ...}]}
+        """
+        state = cls.get_state()
+        return {
+            name: [
+                {**dict(zip(cls.LABELS[name], labels)), **histogram.get_summary()}
+                for labels, histogram in sorted(histograms.items())
+            ]
+            for name, histograms in state.items()
+        }
+
+    @classmethod
+    def get_prometheus_text(cls, prefix:str="web_engine") -> str:
+        """
+        ### get_prometheus_text
+        Histograms in the Prometheus text format (node exporter textfile collector);
+        """
+        state = cls.get_state()
+        lines = []
+        for name, histograms in state.items():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# HELP {metric} {cls.HELP[name]}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, histogram in sorted(histograms.items()):
+                label_text = ",".join(f'{key}="{_escape_label(value)}"' for key, value in zip(cls.LABELS[name], labels))
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.buckets):
+                    cumulative += count
+                    bound_text = "+Inf" if bound == math.inf else repr(float(bound))
+                    lines.append(f'{metric}_bucket{{{label_text},le="{bound_text}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{label_text}}} {histogram.sum}")
+                lines.append(f"{metric}_count{{{label_text}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def export(cls, folder:str, file_name:str="web_engine_metrics") -> tuple[str, str]:
+        """
+        ### export
+        Write "<file_name>.prom" and "<file_name>.json" in "folder" and return their paths;
+        The files are replaced at once, a collector never reads a partial file.
+        """
+        os.makedirs(folder, exist_ok=True)
+        prometheus_path = os.path.join(folder, f"{file_name}.prom")
+        json_path = os.path.join(folder, f"{file_name}.json")
+        _write_file(prometheus_path, cls.get_prometheus_text())
+        _write_file(json_path, json.dumps(cls.get_summary(), indent=4, default=str))
+        return prometheus_path, json_path
+
+
+def _escape_label(value:str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _write_file(path:str, text:str) -> None:
+    writing_path = f"{path}.writing"
+    with open(writing_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(writing_path, path)
@@ -0,0 +1,143 @@
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+from .selector import get_css_xpath
+from lxml import html as lxml_html
+import re
+
+
+def _xpath_literal(value:str) -> str:
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    return "concat('" + "', \"'\", '".join(value.split("'")) + "')"
+
+
+def get_snapshot_xpath(by:str, value:str, is_root:bool=False) -> str:
+    """
+    ### get_snapshot_xpath
+    Transform a (By, value) selection in a XPath to be used in the lxml document;
+
+    @param is_root: the selection is searched in the document ("html" element), not inside a element
+    """
+    if by == By.XPATH:
+        return value
+    if by == By.CSS_SELECTOR:
+        return get_css_xpath(value, include_self=is_root)
+    if by == By.ID:
+        return f".//*[@id={_xpath_literal(value)}]"
+    if by == By.CLASS_NAME:
+        return f".//*[contains(concat(' ', normalize-space(@class), ' '), {_xpath_literal(f' {value} ')})]"
+    if by == By.TAG_NAME:
+        return f".//{value.lower()}"
+    if by == By.NAME:
+        return f".//*[@name={_xpath_literal(value)}]"
+    message = f"[PageSnapshot>get_snapshot_xpath: ERROR] '{by}' can't be used in a page snapshot."
+    raise Exception(message)
+
+
+def _iter_text(element:lxml_html.HtmlElement):
+    """
+    ### _iter_text
+    Text of the element like the rendered text, without scripts, styles and comments;
+    """
+    if isinstance(element.tag, str) and element.tag not in ("script", "style", "noscript", "template"):
+        if element.text:
+            yield element.text
+        for child in element:
+            yield from _iter_text(child)
+            if child.tail:
+                yield child.tail
+
+
+class SnapshotElement():
+    """
+    ### SnapshotElement
+    Read only element of a PageSnapshot, with the WebElement functions used to extract data;
+    """
+    def __init__(self, element:lxml_html.HtmlElement, snapshot:'PageSnapshot') -> None:
+        self.element = element
+        self.parent = snapshot
+
+    @property
+    def tag_name(self) -> str:
+        return self.element.tag
+
+    @property
+    def text(self) -> str:
+        return re.sub(r"\s+", " ", "".join(_iter_text(self.element))).strip()
+
+    def get_attribute(self, name:str) -> str|None:
+        if name == "value" and self.element.tag == "textarea":
+            return self.element.text_content()
+        if name == "value" and self.element.tag == "select":
+            options = self.element.xpath(".//option[@selected]") or self.element.xpath(".//option")
+            return options[0].get("value", options[0].text_content()) if options else None
+        if name in ("innerText", "textContent"):
+            return self.text
+        return self.element.get(name)
+
+    def get_dom_attribute(self, name:str) -> str|None:
+        return self.element.get(name)
+
+    def is_displayed(self) -> bool:
+        return self.element.get("type") != "hidden" and "hidden" not in self.element.attrib
+
+    def is_enabled(self) -> bool:
+        return "disabled" not in self.element.attrib
+
+    def find_element(self, by:str=By.ID, value:str=None) -> 'SnapshotElement':
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"[PageSnapshot>find_element: ERROR] element not found: {by} {value}")
+        return elements[0]
+
+    def find_elements(self, by:str=By.ID, value:str=None) -> list['SnapshotElement']:
+        return [
+            type(self)(element, self.parent)
+            for element in self.element.xpath(get_snapshot_xpath(by, value, self.element.getparent() is None))
+            if isinstance(element, lxml_html.HtmlElement)
+        ]
+
+    def _read_only_error(self, *args, **kwargs):
+        message = "[PageSnapshot>SnapshotElement: ERROR] a page snapshot is read only, use this command outside a snapshot."
+        raise Exception(message)
+
+    click = send_keys = clear = submit = _read_only_error
+
+
+class PageSnapshot():
+    """
+    ### PageSnapshot
+    Local copy of the page, "driver.page_source" is transferred once and the selections are resolved in a lxml document
+    instead of a WebDriver call to each element;
+    Everything that is not a element selection is delegated to the driver (service, web_engine, download_folder, ...).
+    """
+    def __init__(self, driver:WebDriver) -> None:
+        self.driver = driver
+        self._document = None
+
+    @property
+    def document(self) -> SnapshotElement:
+        """
+        ### document
+        The page is copied only on the first element selection;
+        """
+        if self._document is None:
+            self.current_url = self.driver.current_url
+            self.page_source = self.driver.page_source
+            document = lxml_html.document_fromstring(self.page_source, base_url=self.current_url)
+            if self.current_url.startswith("http"):
+                document.make_links_absolute(self.current_url)
+            self._document = SnapshotElement(document, self)
+        return self._document
+
+    def find_element(self, by:str=By.ID, value:str=None) -> SnapshotElement:
+        return self.document.find_element(by, value)
+
+    def find_elements(self, by:str=By.ID, value:str=None) -> list[SnapshotElement]:
+        return self.document.find_elements(by, value)
+
+    def __getattr__(self, name:str):
+        return getattr(self.driver, name)
@@ -0,0 +1,140 @@
+from .background_writer import BackgroundWriter
+from .lazy_import import LazyModule
+import threading
+import glob
+import re
+import os
+
+
+pa = LazyModule("pyarrow", plugin="parquet")
+pq = LazyModule("pyarrow.parquet", plugin="parquet", package="pyarrow")
+
+
+class ParquetRowWriter(BackgroundWriter):
+    """
+    ### ParquetRowWriter
+    Append rows to a parquet file, buffering them in memory and writing them in batches;
+    Each batch is written as a complete parquet file "<file>.part<n>" (a parquet file is only readable after its
+    footer is written), so the rows already written survive a crash; The parts are merged in the file when the
+    writer is closed (end of the execution), or by the next writer of the file after a crash.
+    All columns are saved as text, like the values read from the page.
+    """
+    def __init__(self, path:str, columns:list=False, max_rows:int=1000, max_seconds:float=5.0) -> None:
+        file_path = self.get_file_path(path)
+        # parts left by a execution that didn't close the writer
+        if self.get_part_paths(file_path):
+            _merge_files(file_path, [file_path] + self.get_part_paths(file_path))
+
+        if os.path.isfile(file_path):
+            self.columns = list(dict.fromkeys(pq.read_schema(file_path).names + list(columns or [])))
+        elif os.path.isfile(path):
+            self.columns = list(dict.fromkeys(pq.read_schema(path).names + list(columns or [])))
+        elif columns:
+            self.columns = list(dict.fromkeys(columns))
+        else:
+            message = f"[ParquetRowWriter>__init__: ERROR] file do not exist, declare the columns with 'create_parquet_file': {path}"
+            raise Exception(message)
+
+        # "columns" validates the rows put, "writer_columns" is the schema used by the writer thread
+        self.writer_columns = self.columns
+        self.columns_lock = threading.Lock()
+        self.part_index = 0
+        super().__init__(path, max_rows=max_rows, max_seconds=max_seconds)
+
+    @classmethod
+    def get_part_paths(cls, file_path:str) -> list[str]:
+        return sorted(glob.glob(f"{glob.escape(file_path)}.part*"))
+
+    def add_row(self, row:dict, create_columns:bool=True) -> None:
+        """
+        ### add_row
+        Validate the row columns and put it in the queue;
+
+        @param create_columns: add the columns that are not in the file, otherwise raise a error
+        """
+        with self.columns_lock:
+            new_columns = [column for column in row if column not in self.columns]
+            if new_columns and not create_columns:
+                message = f"[ParquetRowWriter>add_row: ERROR] columns do not exist!\n columns: {set(new_columns)}"
+                raise Exception(message)
+            if new_columns:
+                self.columns = self.columns + new_columns
+                self.call(self._add_columns, new_columns)
+        self.put(row)
+
+    def add_rows(self, rows:list[dict], create_columns:bool=True) -> None:
+        for row in rows:
+            self.add_row(row, create_columns)
+
+    def _get_table(self, rows:list[dict]) -> 'pa.Table':
+        return pa.Table.from_pylist(
+            [
+                {column: None if row.get(column) is None else str(row.get(column)) for column in self.writer_columns}
+                for row in rows
+            ],
+            schema=_get_schema(self.writer_columns)
+        )
+
+    def _write(self, rows:list[dict]) -> None:
+        part_path = f"{self.file_path}.part{self.part_index:06d}"
+        while os.path.exists(part_path):
+            self.part_index += 1
+            part_path = f"{self.file_path}.part{self.part_index:06d}"
+        pq.write_table(self._get_table(rows), f"{self.file_path}.writing")
+        os.replace(f"{self.file_path}.writing", part_path)
+        self.part_index += 1
+
+    def _add_columns(self, new_columns:list) -> None:
+        # each part has its own schema, the columns are joined when the parts are merged
+        self.writer_columns = self.writer_columns + new_columns
+
+    def _close(self) -> None:
+        part_paths = self.get_part_paths(self.file_path)
+        if part_paths:
+            _merge_files(self.file_path, [self.file_path] + part_paths)
+
+    @classmethod
+    def merge_shards(cls, path:str) -> None:
+        shard_paths = cls.get_shard_paths(path)
+        # parts of shard processes that didn't close their writers are merged too
+        shard_paths = sorted(set(shard_paths + [re.sub(r"\.part\d+$", "", part_path) for part_path in cls.get_shard_part_paths(path)]))
+        if not shard_paths and not cls.get_part_paths(path):
+            return
+        file_paths = [path] + cls.get_part_paths(path)
+        for shard_path in shard_paths:
+            file_paths += [shard_path] + cls.get_part_paths(shard_path)
+        _merge_files(path, file_paths)
+
+    @classmethod
+    def get_shard_part_paths(cls, path:str) -> list[str]:
+        root, extension = os.path.splitext(path)
+        return sorted(glob.glob(f"{glob.escape(root)}.shard*{glob.escape(extension)}.part*"))
+
+
+def _get_schema(columns:list) -> 'pa.Schema':
+    return pa.schema([(column, pa.string()) for column in columns])
+
+
+def _merge_files(path:str, file_paths:list[str]) -> None:
+    """
+    ### _merge_files
+    Write the rows of "file_paths" (that exist) in "path", with the columns of all files as text, and remove the
+    other files; The files are read one at a time and "path" is replaced at once.
+    """
+    file_paths = list(dict.fromkeys(file_path for file_path in file_paths if os.path.isfile(file_path)))
+    columns = list(dict.fromkeys(column for file_path in file_paths for column in pq.read_schema(file_path).names))
+    schema = _get_schema(columns)
+    with pq.ParquetWriter(f"{path}.writing", schema) as parquet_writer:
+        for file_path in file_paths:
+            table = pq.read_table(file_path)
+            parquet_writer.write_table(pa.table(
+                {
+                    column: table[column].cast(pa.string()) if column in table.column_names else pa.nulls(table.num_rows, pa.string())
+                    for column in columns
+                },
+                schema=schema
+            ))
+    os.replace(f"{path}.writing", path)
+    for file_path in file_paths:
+        if file_path != path:
+            os.remove(file_path)
@@ -0,0 +1,66 @@
+"""
+Lean browser profile used by "WebEngine(performance_profile=...)": subresources that a scrape doesn't need are
+blocked with "Network.setBlockedURLs" and "get" returns at DOMContentLoaded ("eager" page load strategy);
+"""
+
+DEFAULT_PERFORMANCE_PROFILE = {
+    # stylesheets are not blocked by default, "wait" APPEAR/DISAPPEAR use the element visibility
+    "block_resources": ["image", "font", "media"],
+    "block_urls": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*facebook.net*", "*hotjar.com*", "*clarity.ms*", "*newrelic.com*", "*nr-data.net*",
+    ],
+    "page_load_strategy": "eager",
+    "lean_flags": True,
+}
+
+RESOURCE_URL_PATTERNS = {
+    "image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp", "*.avif"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav", "*.m3u8"],
+    "stylesheet": ["*.css"],
+}
+
+# flags that reduce the renderer memory and the background work of a browser that nobody looks at
+LEAN_FLAGS = [
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-dev-shm-usage",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-sync",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--no-first-run",
+    "--mute-audio",
+    "--renderer-process-limit=2",
+]
+
+
+def get_performance_profile(performance_profile:bool|dict) -> dict|bool:
+    """
+    ### get_performance_profile
+    Return the profile with the default values, True is the default profile and False is no profile, ex.:
+        >>> {"block_resources": ["image", "font", "stylesheet"], "block_urls": ["*/ads/*"], "page_load_strategy": "eager"}
+    """
+    if not performance_profile:
+        return False
+    if performance_profile is True:
+        return dict(DEFAULT_PERFORMANCE_PROFILE)
+
+    profile = {**DEFAULT_PERFORMANCE_PROFILE, **performance_profile}
+    invalid_resources = set(profile["block_resources"]) - set(RESOURCE_URL_PATTERNS)
+    if invalid_resources:
+        message = f"[WebEngine>performance_profile: ERROR] {invalid_resources} not in resource types: {list(RESOURCE_URL_PATTERNS)}"
+        raise Exception(message)
+    return profile
+
+
+def get_blocked_urls(profile:dict) -> list[str]:
+    """
+    ### get_blocked_urls
+    Url patterns ("*" wildcard) of the blocked resource types and urls;
+    """
+    blocked_urls = [pattern for resource in profile["block_resources"] for pattern in RESOURCE_URL_PATTERNS[resource]]
+    # urls with query strings ("logo.png?v=2")
+    blocked_urls += [f"{pattern}?*" for pattern in blocked_urls]
+    return blocked_urls + list(profile["block_urls"])
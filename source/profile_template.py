@@ -0,0 +1,82 @@
+from selenium.webdriver.chrome.webdriver import WebDriver
+import tempfile
+import secrets
+import logging
+import shutil
+import os
+
+
+# files of a running browser, a clone with them would be seen as a profile in use
+SKIPPED_NAMES = {"SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile", "LOCK", "DevToolsActivePort", "Sessions", "Crashpad"}
+# linux FICLONE ioctl (copy-on-write copy in btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+def _reflink(source_path:str, target_path:str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source_path, "rb") as source, open(target_path, "wb") as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def _clone_file(source_path:str, target_path:str, methods:dict) -> None:
+    """
+    ### _clone_file
+    Clone a file with a reflink, or copy it when the filesystem doesn't support reflinks ("methods" keeps the
+    methods that failed in this filesystem); The files are never hardlinks: Chrome rewrites the cache entries in
+    place, so a hardlink would change the template and the other clones.
+    """
+    if methods.get("reflink", True):
+        if _reflink(source_path, target_path):
+            return
+        methods["reflink"] = False
+
+    shutil.copy2(source_path, target_path)
+
+
+def clone_profile(template_dir:str, profiles_dir:str=False) -> str:
+    """
+    ### clone_profile
+    Clone a prebuilt Chrome profile (user data dir) to a new folder and return it;
+    The files are copy-on-write copies where the filesystem allows it (reflink), otherwise they are copied;
+    Lock files of the browser that built the template are skipped.
+
+    @param profiles_dir: folder of the cloned profiles, default "<temp>/web_engine_profiles"
+    """
+    if not os.path.isdir(template_dir):
+        message = f"[WebEngine>clone_profile: ERROR] profile template does not exist: {template_dir}"
+        raise Exception(message)
+
+    profiles_dir = profiles_dir if profiles_dir else os.path.join(tempfile.gettempdir(), "web_engine_profiles")
+    profile_dir = os.path.join(profiles_dir, secrets.token_hex(8))
+    methods = {}
+    for root, folders, files in os.walk(template_dir):
+        folders[:] = [folder for folder in folders if folder not in SKIPPED_NAMES]
+        target_root = os.path.join(profile_dir, os.path.relpath(root, template_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for file in files:
+            if file in SKIPPED_NAMES:
+                continue
+            try:
+                _clone_file(os.path.join(root, file), os.path.join(target_root, file), methods)
+            except OSError as e:
+                logging.warning(f"[WebEngine>clone_profile: WARNING] file not cloned: {os.path.join(root, file)}\n{e}")
+    return profile_dir
+
+
+def remove_profile(driver:WebDriver) -> None:
+    """
+    ### remove_profile
+    Remove the cloned profile of a driver that has quit;
+    """
+    profile_dir = getattr(driver, "profile_dir", False)
+    if profile_dir:
+        driver.profile_dir = False
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
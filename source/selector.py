@@ -0,0 +1,158 @@
+from selenium.webdriver.common.by import By
+from cssselect import GenericTranslator, SelectorError
+from lxml import etree
+from functools import lru_cache
+import re
+
+
+SELECTOR_TYPES = {
+    '#': By.ID,
+    '.': By.CLASS_NAME,
+    '%': By.XPATH,
+    '*': By.TAG_NAME,
+    '@': By.NAME,
+    '&': By.CSS_SELECTOR,
+}
+
+_CSS_IDENTIFIER = re.compile(r"-?[_a-zA-Z][_a-zA-Z0-9-]*")
+_XPATH_NAME = r"[a-z][a-z0-9-]*"
+_XPATH_LITERAL = r"""(?:'([^']*)'|"([^"]*)")"""
+_XPATH_STEP = re.compile(rf"(//|/)({_XPATH_NAME}|\*)((?:\[[^\[\]]*\])*)")
+# (predicate, css, accept empty value): "contains(@a, '')" is true to any "a" attribute, but "[a*='']" matches nothing
+_XPATH_PREDICATES = [
+    (re.compile(rf"@({_XPATH_NAME})"), "[{0}]", True),
+    (re.compile(rf"@({_XPATH_NAME})\s*=\s*{_XPATH_LITERAL}"), "[{0}={1}]", True),
+    (re.compile(rf"contains\(\s*@({_XPATH_NAME})\s*,\s*{_XPATH_LITERAL}\s*\)"), "[{0}*={1}]", False),
+    (re.compile(rf"starts-with\(\s*@({_XPATH_NAME})\s*,\s*{_XPATH_LITERAL}\s*\)"), "[{0}^={1}]", False),
+]
+_XPATH_POSITION = re.compile(r"[1-9][0-9]*")
+
+
+def _css_string(value:str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _css_predicate(predicate:str) -> str|None:
+    """
+    ### _css_predicate
+    CSS of a XPath predicate, or None if it has no equivalent;
+    """
+    for pattern, css, accept_empty in _XPATH_PREDICATES:
+        match = pattern.fullmatch(predicate.strip())
+        if not match:
+            continue
+        name, *literals = match.groups()
+        if not literals:
+            return css.format(name)
+        value = literals[0] if literals[0] is not None else literals[1]
+        if "\n" in value or (not value and not accept_empty):
+            return None
+        return css.format(name, _css_string(value))
+    return None
+
+
+def xpath_to_css(xpath:str) -> str|None:
+    """
+    ### xpath_to_css
+    Rewrite a simple absolute XPath in the equivalent CSS selector, or return None when it is not safe;
+    Only child ("/") and descendant ("//") steps with lowercase names or "*", and the predicates "[@a]", "[@a='v']",
+    "[contains(@a, 'v')]", "[starts-with(@a, 'v')]" and a position alone ("tr[2]") are rewritten, ex.:
+        >>> xpath_to_css("//div[@id='x']/a")
+        'div[id="x"] > a'
+    """
+    xpath = xpath.strip()
+    position = 0
+    css_steps = []
+    for match in _XPATH_STEP.finditer(xpath):
+        if match.start() != position:
+            return None
+        position = match.end()
+        axis, name, predicates = match.groups()
+
+        css = "" if name == "*" else name
+        # a single "/" in the first step is the root element
+        if not css_steps and axis == "/":
+            css += ":root"
+
+        predicates = re.findall(r"\[([^\[\]]*)\]", predicates)
+        if len(predicates) == 1 and _XPATH_POSITION.fullmatch(predicates[0].strip()):
+            if name == "*":
+                return None
+            css += f":nth-of-type({predicates[0].strip()})"
+        else:
+            for predicate in predicates:
+                css_predicate = _css_predicate(predicate)
+                if css_predicate is None:
+                    return None
+                css += css_predicate
+
+        if css_steps:
+            css_steps.append(" " if axis == "//" else " > ")
+        css_steps.append(css or "*")
+
+    if not css_steps or position != len(xpath):
+        return None
+    return "".join(css_steps)
+
+
+def _class_name_to_css(class_name:str) -> str:
+    return "".join(
+        f".{name}" if _CSS_IDENTIFIER.fullmatch(name) else f"[class~={_css_string(name)}]"
+        for name in class_name.split()
+    )
+
+
+@lru_cache(maxsize=2048)
+def compile_selector(element:str, scoped:bool=False) -> tuple[str, str]:
+    """
+    ### compile_selector
+    Return the (By, value) of a element selection, validated once and cached;
+        - '#': id, '.': class name, '%': XPath, '*': tag name, '@': name, '&': CSS selector
+
+    Compound class names (".btn primary") and simple absolute XPaths ("%//div[@id='x']/a") are rewritten in CSS,
+    the fastest strategy in Chrome; Malformed XPaths and CSS selectors raise a error here instead of in the page.
+
+    @param scoped: the selection is searched inside a element, so absolute XPaths ("//..." search all the page)
+    are not rewritten in CSS (it would only search inside the element)
+    """
+    if not element or element[0] not in SELECTOR_TYPES:
+        message = f"[Selector>compile_selector: ERROR] '{element[:1]}' not in dict element types."
+        raise Exception(message)
+
+    by, value = SELECTOR_TYPES[element[0]], element[1:]
+    if not value.strip():
+        message = f"[Selector>compile_selector: ERROR] empty selection: '{element}'"
+        raise Exception(message)
+
+    if by == By.XPATH:
+        try:
+            etree.XPath(value)
+        except etree.XPathSyntaxError as e:
+            message = f"[Selector>compile_selector: ERROR] invalid XPath: '{value}'\n{e}"
+            raise Exception(message)
+        css = None if scoped else xpath_to_css(value)
+        return (By.CSS_SELECTOR, css) if css else (by, value)
+
+    if by == By.CSS_SELECTOR:
+        get_css_xpath(value)
+        return by, value
+
+    if by == By.CLASS_NAME and len(value.split()) > 1:
+        return By.CSS_SELECTOR, _class_name_to_css(value)
+
+    return by, value
+
+
+@lru_cache(maxsize=2048)
+def get_css_xpath(css:str, include_self:bool=False) -> str:
+    """
+    ### get_css_xpath
+    XPath of a CSS selector, relative to the element where it is searched (used by the page snapshots);
+
+    @param include_self: the element can be selected too, like the "html" element in "document.querySelectorAll"
+    """
+    try:
+        return GenericTranslator().css_to_xpath(css, prefix="descendant-or-self::" if include_self else "descendant::")
+    except SelectorError as e:
+        message = f"[Selector>compile_selector: ERROR] invalid CSS selector: '{css}'\n{e}"
+        raise Exception(message)
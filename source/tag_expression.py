@@ -0,0 +1,167 @@
+from functools import lru_cache
+import re
+
+
+_function_pattern = re.compile(r'^\s*(\w+)\((.*)\)\s*$', re.DOTALL)
+_keyword_pattern = re.compile(r'^(\w+)\s*=\s*(.*)$', re.DOTALL)
+
+
+class TagCall():
+    """
+    ### TagCall
+    A compiled "{function(selector, *args)}" tag;
+        -   function: name of the function in "web_element_functions"
+        -   selector: element selection, if "this" is True, the selections are applied one after another from the root element
+        -   args, kwargs: extra parameters to the function
+
+    The parameters are split in the commas, a selector with commas (CSS selector list) has to be quoted:
+        >>> "{attribute('&a.next, a.last', href)}" = TagCall("attribute", "&a.next, a.last", args=("href",))
+    """
+    def __init__(self, function:str, selector:str, this:bool, args:tuple=(), kwargs:tuple=()) -> None:
+        self.function = function
+        self.selector = selector
+        self.this = this
+        self.args = args
+        self.kwargs = kwargs
+        self.key = (function, selector, this, args, kwargs)
+
+    def get_selectors(self) -> tuple:
+        if self.this:
+            return tuple(self.selector.replace("this", "").split())
+        if self.selector:
+            return (self.selector,)
+        return ()
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TagCall) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"TagCall{self.key}"
+
+
+class TagExpression():
+    """
+    ### TagExpression
+    A compiled string parameter, with its literal parts and its tags;
+        >>> "Nome do Usuário - {text(#nome_usuario)}" = ("Nome do Usuário - ", TagCall("text", "#nome_usuario"))
+    """
+    def __init__(self, parts:tuple) -> None:
+        self.parts = parts
+        self.tags = tuple(part for part in parts if isinstance(part, TagCall))
+        self.text = "".join(part for part in parts if isinstance(part, str))
+
+    def evaluate(self, get_tag_result) -> str:
+        """
+        ### evaluate
+        Return the string with each tag replaced by "get_tag_result(tag)";
+        """
+        if not self.tags:
+            return self.text
+        return "".join(
+            str(get_tag_result(part)) if isinstance(part, TagCall) else part
+            for part in self.parts
+        )
+
+
+def _split_arguments(param:str) -> list[str]:
+    """
+    ### _split_arguments
+    Split the tag parameter in the commas outside quotes, brackets and parentheses;
+        >>> "'&a.x, b.y', href" = ["'&a.x, b.y'", " href"]
+    """
+    arguments = []
+    depth = 0
+    quote = False
+    current = []
+    for char in param:
+        if quote:
+            if char == quote:
+                quote = False
+        elif char in "'\"":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            arguments.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    arguments.append("".join(current))
+    return arguments
+
+
+def _get_argument_value(argument:str) -> str:
+    argument = argument.strip()
+    if len(argument) >= 2 and argument[0] == argument[-1] and argument[0] in "'\"":
+        return argument[1:-1]
+    return argument
+
+
+def _compile_tag(content:str, param:str) -> TagCall:
+    result = _function_pattern.match(content)
+    if not result or content.count("(") != content.count(")"):
+        message = f"[TagExpression>compile_tag_expression: ERROR] content_tags do not have function! check {param}"
+        raise Exception(message)
+
+    function, arguments = result.groups()
+    selector, *arguments = _split_arguments(arguments)
+    selector = _get_argument_value(selector)
+
+    args = []
+    kwargs = []
+    for argument in arguments:
+        keyword = _keyword_pattern.match(argument.strip())
+        if keyword:
+            kwargs.append((keyword.group(1), _get_argument_value(keyword.group(2))))
+        else:
+            args.append(_get_argument_value(argument))
+
+    return TagCall(function, selector, "this" in selector, tuple(args), tuple(kwargs))
+
+
+@lru_cache(maxsize=4096)
+def compile_tag_expression(param:str) -> TagExpression:
+    """
+    ### compile_tag_expression
+    Compile a string parameter in a TagExpression, each string is parsed only once;
+    Tags are defined by "{}", use "\\{" and "\\}" to write the braces as text.
+    """
+    parts = []
+    literal = []
+    index = 0
+    while index < len(param):
+        char = param[index]
+        if char == "\\" and param[index + 1:index + 2] in ("{", "}"):
+            literal.append(param[index + 1])
+            index += 2
+            continue
+
+        if char == "}":
+            message = f"[TagExpression>compile_tag_expression: ERROR] invalid element param! check \"{param}\""
+            raise Exception(message)
+
+        if char == "{":
+            close_index = param.find("}", index)
+            open_index = param.find("{", index + 1)
+            if close_index == -1 or (open_index != -1 and open_index < close_index):
+                message = f"[TagExpression>compile_tag_expression: ERROR] invalid element param! check \"{param}\""
+                raise Exception(message)
+
+            if literal:
+                parts.append("".join(literal))
+                literal = []
+            parts.append(_compile_tag(param[index + 1:close_index], param))
+            index = close_index + 1
+            continue
+
+        literal.append(char)
+        index += 1
+
+    if literal:
+        parts.append("".join(literal))
+    return TagExpression(tuple(parts))
@@ -0,0 +1,139 @@
+from selenium.webdriver.chrome.webdriver import WebDriver
+from .profile_template import remove_profile
+from queue import Queue, Empty
+import threading
+import logging
+
+
+class WebDriverPool():
+    """
+    ### WebDriverPool
+    Keep up to "size" warm Chrome drivers alive to be leased by each content;
+    A leased driver is returned to the pool with "release" instead of being killed by "quit".
+
+    The drivers are launched with the options of the first WebEngine that needs a new one, so
+    contents sharing a pool have to share the browser options (show_webdriver, random_agent, ...);
+
+    @param network_events: launch the drivers with the performance log, so they can be leased by contents with
+    "network_events=True" (wait NETWORK_IDLE)
+    """
+    def __init__(self, size:int=10, network_events:bool=False) -> None:
+        self.size = size
+        self.network_events = network_events
+        self.idle_drivers = Queue()
+        self.drivers = []
+        self.leased_drivers = set()
+        self.lock = threading.Lock()
+
+    def lease(self, web_engine) -> WebDriver:
+        """
+        ### lease
+        Return a idle driver with a clean state, launching a new one while the pool has room;
+        Block until some driver is released if all of them are leased.
+        """
+        while True:
+            try:
+                driver = self.idle_drivers.get_nowait()
+            except Empty:
+                driver = self._launch_or_wait(web_engine)
+
+            if self._is_alive(driver):
+                break
+            self._discard(driver)
+
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        with self.lock:
+            self.leased_drivers.add(driver)
+        return driver
+
+    def release(self, driver:WebDriver) -> None:
+        """
+        ### release
+        Reset the driver state (windows, cookies, cache and storage) and return it to the pool;
+        Drivers that are not leased are ignored, so calling it twice is safe.
+        """
+        with self.lock:
+            if driver not in self.leased_drivers:
+                return
+            self.leased_drivers.remove(driver)
+
+        try:
+            self._reset_state(driver)
+        except Exception as e:
+            logging.warning(f"[WebDriverPool>release: WARNING] driver discarded, reset failed: {e}")
+            self._discard(driver)
+            return
+        self.idle_drivers.put(driver)
+
+    def quit(self) -> None:
+        """
+        ### quit
+        Quit all drivers of the pool;
+        """
+        with self.lock:
+            drivers, self.drivers = self.drivers, []
+            self.leased_drivers.clear()
+        self.idle_drivers = Queue()
+        for driver in drivers:
+            self._quit_driver(driver)
+
+    def _launch_or_wait(self, web_engine, wait_time:float=1) -> WebDriver:
+        """
+        ### _launch_or_wait
+        Launch a driver if the pool has room, or wait a released one; The room is checked again every
+        "wait_time" seconds, a discarded driver frees its slot without being put in "idle_drivers".
+        """
+        while True:
+            with self.lock:
+                has_room = len(self.drivers) < self.size
+                if has_room:
+                    # reserve the slot before launching, the launch is made outside the lock
+                    self.drivers.append(None)
+                    break
+            try:
+                return self.idle_drivers.get(timeout=wait_time)
+            except Empty:
+                continue
+
+        try:
+            driver = web_engine._launch_drive()
+        except Exception:
+            with self.lock:
+                self.drivers.remove(None)
+            raise
+
+        with self.lock:
+            self.drivers[self.drivers.index(None)] = driver
+        return driver
+
+    def _reset_state(self, driver:WebDriver) -> None:
+        for window_handle in driver.window_handles[1:]:
+            driver.switch_to.window(window_handle)
+            driver.close()
+        driver.switch_to.window(driver.window_handles[0])
+        driver.switch_to.default_content()
+
+        # storage of every origin visited by the content (local storage, IndexedDB, cache storage, ...)
+        driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': '*', 'storageTypes': 'all'})
+        driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.get("about:blank")
+
+    def _is_alive(self, driver:WebDriver) -> bool:
+        try:
+            return driver.service.is_connectable() and bool(driver.window_handles)
+        except Exception:
+            return False
+
+    def _discard(self, driver:WebDriver) -> None:
+        with self.lock:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
+        self._quit_driver(driver)
+
+    def _quit_driver(self, driver:WebDriver) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            ...
+        remove_profile(driver)
@@ -1,8 +1,6 @@
-import jstyleson
 from selenium import webdriver
 import datetime
 import warnings
-from webdriver_manager.chrome import ChromeDriverManager
 from source.web_functions import WebFunctions
 from source.actions_functions import ActionsFunctions
 import os
@@ -16,20 +14,43 @@ import secrets
 import pathlib
 import shutil
 from selenium.webdriver.chrome.service import Service
+from source.web_driver_pool import WebDriverPool
+from source.command_plan import CommandPlan, load_commands_file
+from source.page_snapshot import PageSnapshot
+from source.http_driver import HttpDriver, BrowserRequired
+from source.background_writer import BackgroundWriter
+from source.performance_profile import get_performance_profile, get_blocked_urls, LEAN_FLAGS
+from source.profile_template import clone_profile, remove_profile
+from source.metrics import CommandMetrics
+from source.checkpoint import Checkpoint, CheckpointStore
+import time
 
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 warnings.filterwarnings("ignore", category=DeprecationWarning) 
 
 class WebEngine():
-    def __init__(self, error_log_name:bool=False, download_temp_path:str=False, download_path:str=False, commands_path:str=False, commands:list=False, content_variables:dict=False, more_functions:list={}, show_webdriver:bool=False, random_window_size:bool=False, web_functions:bool=True, actions_functions:bool=False, images_folder:str=False, random_agent:bool=False) -> None:
+    def __init__(self, error_log_name:bool=False, download_temp_path:str=False, download_path:str=False, commands_path:str=False, commands:list=False, content_variables:dict=False, more_functions:list={}, show_webdriver:bool=False, random_window_size:bool=False, web_functions:bool=True, actions_functions:bool=False, images_folder:str=False, random_agent:bool=False, driver_pool:WebDriverPool=False, page_snapshot:bool=False, driver_backend:str="chrome", network_events:bool=False, performance_profile:bool|dict=False, profile_template:str=False, checkpoint_store:CheckpointStore=False, checkpoint_key:str=False) -> None:
+        self.init_time = time.monotonic()
+        self.startup_times = {}
         self.random_agent = random_agent
+        self.profile_template = profile_template
+        self.performance_profile = get_performance_profile(performance_profile)
+        self.driver_pool = driver_pool
+        self.execution_depth = 0
+        self.results = {}
+        self._set_checkpoint_store(checkpoint_store, checkpoint_key)
+        self.page_snapshot = page_snapshot
+        self.current_page_snapshot = False
+        self.driver_backend = driver_backend
+        self.network_events = network_events
         self.show_webdriver = show_webdriver
         self.content_variables = content_variables
         self._set_more_functions(more_functions)
         self._set_functions(web_functions, actions_functions)
         self.images_folder = images_folder
         self.commands_path = commands_path
+        self.content_name = self._get_content_name()
         self.random_window_size = random_window_size
         self.commands = self._get_commands(commands=commands, commands_path=commands_path)
         self._set_download_temp_folder(download_temp_path)
@@ -37,11 +58,29 @@ class WebEngine():
         self._set_drive()
         self._set_error_log(error_log_name)
 
+    def _set_checkpoint_store(self, checkpoint_store:CheckpointStore=False, checkpoint_key:str=False) -> None:
+        """
+        ### _set_checkpoint_store
+        Load the last checkpoint of the content (saved by a previous attempt) from "checkpoint_store";
+        The top level execution resumes from it, see "_get_resume_index".
+        """
+        self.checkpoint_store = checkpoint_store
+        self.checkpoint_key = checkpoint_key
+        self.step_index = 0
+        self.resume_checkpoint = checkpoint_store.get(checkpoint_key) if checkpoint_store and checkpoint_key else None
+        self.last_checkpoint = self.resume_checkpoint
+        self.completed_downloads = dict(self.resume_checkpoint.downloads) if self.resume_checkpoint else {}
+        if self.resume_checkpoint:
+            self.results.update(self.resume_checkpoint.results)
+
     def _set_more_functions(self, more_functions):
         """
         Function to use in "WebFunctionsEngine._set_web_element_functions"; Use "{function_name()}" to use function.
         
-        !!! "_set_more_functions" functions no accept params yet;
+        The first parameter is a element selection, passed to the function as a WebElement, the others are passed
+        as they are (use quotes to keep commas or spaces), ex.:
+            >>> "{function_name(#element_id, 'text', 10, key=value)}" = function_name(web_element, 'text', '10', key='value')
+            >>> "{function_name(, 'text')}" = function_name('text')
         
         Args:
             more_functions (list[function]): list with functions
@@ -68,6 +107,17 @@ class WebEngine():
             self.functions.update(self.actions_functions.get_actions_functions())
             self.has_actions_functions = True
 
+    def _get_content_name(self) -> str:
+        """
+        ### _get_content_name
+        Name of the content in the command metrics: the "content_name" content variable, the commands file name or "commands";
+        """
+        if self.content_variables and self.content_variables.get("content_name"):
+            return str(self.content_variables["content_name"])
+        if self.commands_path:
+            return pathlib.Path(self.commands_path).stem
+        return "commands"
+
     def _get_random_window_size(self):
         sizes = list(range(0, 1000, 100))
         return (random.choice(sizes), random.choice(sizes))
@@ -97,8 +147,8 @@ class WebEngine():
         if not os.path.exists(download_path):
             os.makedirs(download_path)
             
-        if download_path[-1] != "\\":
-            self.download_folder = f"{download_path}\\"
+        if download_path[-1] != os.sep:
+            self.download_folder = f"{download_path}{os.sep}"
         else:
             self.download_folder = download_path
     
@@ -109,8 +159,8 @@ class WebEngine():
             shutil.rmtree(download_temp_path)
         os.makedirs(download_temp_path)
         
-        if download_temp_path[-1] != "\\":
-            self.download_temp_folder = f"{download_temp_path}\\"
+        if download_temp_path[-1] != os.sep:
+            self.download_temp_folder = f"{download_temp_path}{os.sep}"
         else:
             self.download_temp_folder = download_temp_path
         
@@ -146,22 +196,96 @@ class WebEngine():
             'printing.print_preview_sticky_settings.appState' : json.dumps(settings_kiosk),
         }
 
+        if self.performance_profile:
+            # "get" returns at DOMContentLoaded, without waiting the images, the fonts and the trackers
+            options.page_load_strategy = self.performance_profile["page_load_strategy"]
+            if self.performance_profile["lean_flags"]:
+                for flag in LEAN_FLAGS:
+                    options.add_argument(flag)
+            if "image" in self.performance_profile["block_resources"]:
+                prefs["profile.managed_default_content_settings.images"] = 2
+
         options.add_experimental_option("prefs", prefs)
+        
+        if self._has_performance_log():
+            # DevTools Network events, read by "wait" with type_wait NETWORK_IDLE
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+            options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
         options.add_experimental_option('excludeSwitches', ['enable-logging'])   
         options.add_argument("--disable-blink-features")
         options.add_argument('--kiosk-printing')
         options.add_argument("--disable-blink-features=AutomationControlled")
         return options   
      
-    def _set_drive(self):
+    def _has_performance_log(self) -> bool:
+        """
+        ### _has_performance_log
+        Return if a launched driver needs the performance log: the content has "network_events", or the driver is
+        pooled and can be leased later by a content with "network_events" (WebDriverPool "network_events");
+        """
+        return bool(self.network_events or (self.driver_pool and self.driver_pool.network_events))
+
+    def _launch_drive(self) -> WebDriver:
+        """
+        ### _launch_drive
+        Launch Chrome; With "self.profile_template", the driver uses a clone of the template profile (cache, cookies
+        and settings already created), removed when the driver quits.
+        """
         # service = Service(
         #     executable_path=r"C:\Users\u1280820\MMC\Marsh Brasil Data Analytics - Python\WebEngine\chrome-win64\chrome.exe"
         # )
-        
-        driver = webdriver.Chrome(
-            self._get_webdrive_options(),
-            # service
-        )
+        options = self._get_webdrive_options()
+        profile_dir = False
+        if self.profile_template:
+            init_time = time.monotonic()
+            profile_dir = clone_profile(self.profile_template)
+            options.add_argument(f"--user-data-dir={profile_dir}")
+            self.startup_times["clone_profile"] = round(time.monotonic() - init_time, 3)
+
+        init_time = time.monotonic()
+        try:
+            driver = webdriver.Chrome(
+                options,
+                # service
+            )
+        except Exception:
+            if profile_dir:
+                shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        self.startup_times["launch_driver"] = round(time.monotonic() - init_time, 3)
+        driver.profile_dir = profile_dir
+        driver.network_events = self._has_performance_log()
+        return driver
+
+    def _set_drive(self):
+        """
+        ### _set_drive
+        Set the content driver:
+            -   "http": a browserless HttpDriver, Chrome is launched only if a command needs it
+            -   "chrome": lease a warm driver from "self.driver_pool" or launch a new one
+        """
+        if self.driver_backend == "http":
+            driver = HttpDriver(self._get_random_agent() if self.random_agent else False)
+        elif self.driver_backend == "chrome":
+            driver = self._get_chrome_driver()
+        else:
+            message = f"[WebEngine>_set_drive: ERROR] '{self.driver_backend}' is not a valid driver_backend (chrome, http)."
+            raise Exception(message)
+
+        self._prepare_driver(driver)
+        self.driver = driver
+
+    def _get_chrome_driver(self) -> WebDriver:
+        if self.driver_pool:
+            return self.driver_pool.lease(self)
+        return self._launch_drive()
+
+    def _prepare_driver(self, driver:WebDriver|HttpDriver) -> None:
+        """
+        ### _prepare_driver
+        Set the content state in the driver (window size, download folder and adictional variables);
+        """
         if self.random_window_size:
             driver.set_window_size(*self._get_random_window_size())
 
@@ -174,51 +298,64 @@ class WebEngine():
         driver.images_folder = self.images_folder if getattr(self, 'has_actions_functions', False) else ''
         
         driver.web_engine = self
+        
+        if self.performance_profile and not isinstance(driver, HttpDriver):
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': get_blocked_urls(self.performance_profile)})
 
-        self.driver = driver
-    
-    def _get_commands(self, commands:list=False, commands_path:str=False):
-        """
-        ### _set_commands_txt
-        Transform 'py' files with json in commands.
-        """
-        def __replace_commands(command, comparison, value):
-            if isinstance(command, str):
-                if comparison in command:
-                    return command.replace(comparison, value)
-                else:
-                    return command
-
-            elif isinstance(command, dict):
-                for func, param in command.items():
-                    command[func] = __replace_commands(param, comparison, value)
-                return command
-
-            elif isinstance(command, list):
-                commands = []
-                for c in command:
-                    commands.append(__replace_commands(c, comparison, value))
-                return commands 
-            
-            else:
-                return command
+        if getattr(driver, "network_events", False):
+            # events of a leased driver belong to the last content
+            driver.get_log("performance")
+            driver.network_requests = {}
+        elif self.network_events and not isinstance(driver, HttpDriver):
+            message = \
+                "[WebEngine>_prepare_driver: ERROR] 'network_events=True' needs a driver launched with the performance log " \
+                "(use a WebDriverPool with 'network_events=True')."
+            raise Exception(message)
 
-                
-        if commands_path:
-            with open(commands_path) as user_file:
-                commands_str = user_file.read()
-                commands:dict = jstyleson.loads(commands_str)
+    def _get_fallback_driver(self, driver:HttpDriver) -> WebDriver:
+        """
+        ### _get_fallback_driver
+        Change a HttpDriver to Chrome, keeping its cookies and its current url;
+        Pages loaded by a form POST are requested again with GET.
+        """
+        chrome_driver = self._get_chrome_driver()
+        self._prepare_driver(chrome_driver)
 
-                for content_key, content_value in self.content_variables.items():               
-                    commands = __replace_commands(commands, content_key, content_value)
-            return commands
+        cookies = [
+            {"name": cookie["name"], "value": cookie["value"], "domain": cookie["domain"], "path": cookie["path"], "secure": cookie["secure"]}
+            for cookie in driver.get_cookies()
+        ]
+        if cookies:
+            chrome_driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+        if driver.current_url != "about:blank":
+            chrome_driver.get(driver.current_url)
+
+        driver.fallback_driver = chrome_driver
+        return chrome_driver
+
+    def _get_commands(self, commands:list=False, commands_path:str=False) -> CommandPlan:
+        """
+        ### _get_commands
+        Compile the commands ('py' files with json or a commands list) in a CommandPlan with the content variables;
+        The commands file is compiled only once and shared by every content using it.
+        """
+        if commands_path:
+            return load_commands_file(commands_path, self.functions).bind(self.content_variables)
 
         elif commands:  
-            for content_key, content_value in self.content_variables.items():               
-                commands = __replace_commands(commands, content_key, content_value)
-            return commands
+            return self._get_plan(commands)
         else:
             raise Exception("[WebEngine>_set_commands: ERROR] select a commands path or a dict command")
+
+    def _get_plan(self, commands:list|CommandPlan) -> CommandPlan:
+        """
+        ### _get_plan
+        Return "commands" as a CommandPlan, nested commands are already compiled and are returned as they are;
+        """
+        if isinstance(commands, CommandPlan):
+            return commands
+        return CommandPlan.compile(commands, self.functions).bind(self.content_variables)
     
     def _error_message(self, message:str):
         current_time = datetime.datetime.today().strftime("%d/%m/%Y %H:%M:%S")
@@ -227,44 +364,209 @@ class WebEngine():
         print(message)
         
     def _check_to_quit(self, driver:WebDriver):
-        if driver.service.is_connectable():
+        if isinstance(driver, HttpDriver):
+            driver.quit()
+            driver = driver.fallback_driver
+
+        if not driver:
+            ...
+        elif self.driver_pool:
+            self.driver_pool.release(driver)
+        elif driver.service.is_connectable():
             self.web_functions.quit(driver)
+            remove_profile(driver)
         if os.path.exists(self.download_temp_folder):
             shutil.rmtree(self.download_temp_folder)
 
+    def _get_command_driver(self, driver:WebDriver, command:str) -> WebDriver|PageSnapshot:
+        """
+        ### _get_command_driver
+        With a HttpDriver, change to Chrome when the command is not in "WebFunctions.HTTP_COMMANDS";
+        With "self.page_snapshot", the commands that only read the page use the same PageSnapshot until a command
+        that can change the page is executed;
+        """
+        if isinstance(driver, HttpDriver):
+            if not driver.fallback_driver and command not in WebFunctions.HTTP_COMMANDS:
+                self._get_fallback_driver(driver)
+            if not driver.fallback_driver:
+                return driver
+            driver = driver.fallback_driver
+
+        if not self.page_snapshot or isinstance(driver, PageSnapshot):
+            return driver
+
+        if command not in WebFunctions.SNAPSHOT_COMMANDS:
+            self.current_page_snapshot = False
+            return driver
+
+        if not self.current_page_snapshot or self.current_page_snapshot.driver is not driver:
+            self.current_page_snapshot = PageSnapshot(driver)
+        return self.current_page_snapshot
+
+    def _set_startup_time(self) -> None:
+        """
+        ### _set_startup_time
+        Set the seconds from the engine creation to its first command in "self.startup_times" and log the startup times;
+        """
+        if "first_command" not in self.startup_times:
+            self.startup_times["first_command"] = round(time.monotonic() - self.init_time, 3)
+            logging.info(f"[WebEngine>startup: INFO] {self.startup_times}")
+
+    def _set_checkpoint(self, driver:WebDriver, name:str) -> Checkpoint:
+        """
+        ### _set_checkpoint
+        Save the state of the content ("checkpoint" command): a retry restores the cookies and the url and resumes after
+        the current top level command; Inside a nested execution (for_each, ...) the retry executes the top level command
+        again, skipping the downloads already completed.
+        """
+        driver = driver.driver if isinstance(driver, PageSnapshot) else driver
+        step_index = self.step_index if self.execution_depth > 1 else self.step_index + 1
+        checkpoint = Checkpoint(name, step_index, driver.current_url, driver.get_cookies(), dict(self.completed_downloads), dict(self.results))
+        self.last_checkpoint = checkpoint
+        if self.checkpoint_store:
+            self.checkpoint_store.save(self.checkpoint_key, checkpoint)
+        return checkpoint
+
+    def _add_completed_download(self, download_key:str, file_path:str) -> None:
+        """
+        ### _add_completed_download
+        Record a completed download in the last checkpoint, so a retry doesn't download it again;
+        """
+        self.completed_downloads[download_key] = str(file_path)
+        if not self.checkpoint_store:
+            return
+        checkpoint = self.last_checkpoint if self.last_checkpoint else Checkpoint("start", 0)
+        checkpoint.downloads[download_key] = str(file_path)
+        self.last_checkpoint = checkpoint
+        self.checkpoint_store.save(self.checkpoint_key, checkpoint)
+
+    def _get_completed_download(self, download_key:str) -> str|bool:
+        """
+        ### _get_completed_download
+        File of a download completed in a previous attempt (if the file still exists);
+        """
+        file_path = self.completed_downloads.get(download_key)
+        return file_path if file_path and os.path.isfile(file_path) else False
+
+    def _get_resume_index(self, driver:WebDriver, commands:CommandPlan) -> int:
+        """
+        ### _get_resume_index
+        Index of the first command of the top level execution of "self.commands": with a checkpoint of a previous
+        attempt, its cookies and url are restored and the commands before it are skipped;
+        If the state can't be restored, the commands are executed from the start.
+        """
+        if self.execution_depth != 1 or commands is not self.commands or not self.resume_checkpoint:
+            return 0
+
+        checkpoint = self.resume_checkpoint
+        self.resume_checkpoint = None
+        try:
+            self._restore_checkpoint(driver, checkpoint)
+        except Exception as e:
+            logging.warning(f"[WebEngine>_get_resume_index: WARNING] {checkpoint} not restored, executing from the start: {e}")
+            return 0
+        logging.info(f"[WebEngine>_get_resume_index: INFO] resuming from {checkpoint}")
+        return checkpoint.step_index
+
+    def _restore_checkpoint(self, driver:WebDriver|HttpDriver, checkpoint:Checkpoint) -> None:
+        if isinstance(driver, HttpDriver):
+            for cookie in checkpoint.cookies:
+                driver.add_cookie(cookie)
+        elif checkpoint.cookies:
+            cookies = [
+                {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite") if key in cookie}
+                | ({"expires": cookie["expiry"]} if "expiry" in cookie else {})
+                for cookie in checkpoint.cookies
+            ]
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+
+        if checkpoint.url and checkpoint.url != "about:blank":
+            driver.get(checkpoint.url)
+
+    def _remove_checkpoint(self) -> None:
+        if self.checkpoint_store:
+            self.checkpoint_store.remove(self.checkpoint_key)
+
+    def _iter_steps(self, commands:CommandPlan, first_index:int=0):
+        """
+        ### _iter_steps
+        Steps of "commands" from "first_index", the index of the top level step is kept in "self.step_index";
+        """
+        for step_index, step in enumerate(commands):
+            if step_index < first_index:
+                continue
+            if self.execution_depth == 1:
+                self.step_index = step_index
+            yield step
+
+    def _execute_command(self, driver, command:str, params:dict) -> tuple:
+        """
+        ### _execute_command
+        Execute a command, its time and outcome (ok, failed or error) are observed in CommandMetrics;
+        A command that a HttpDriver can't execute in the current page (BrowserRequired) is executed again in Chrome,
+        used by the next commands of the content.
+        """
+        init_time = time.perf_counter()
+        outcome = "error"
+        try:
+            result, message = self.functions[command](driver, **params)
+            if not result and isinstance(message, BrowserRequired) and isinstance(driver, HttpDriver):
+                logging.info(f"[WebEngine>_execute_command: INFO] '{command}' executed again in Chrome: {message}")
+                result, message = self.functions[command](self._get_fallback_driver(driver), **params)
+            outcome = "ok" if result else "failed"
+            return result, message
+        finally:
+            CommandMetrics.observe_command(command, self.content_name, self.execution_depth, outcome, time.perf_counter() - init_time)
+
+    def _get_command_origin(self, command:str) -> str:
+        """
+        ### _get_command_origin
+        "<Class>function" of a command to the error messages;
+        """
+        if command not in self.functions:
+            return "WebEngine>execute_commands"
+        return f"{self.functions[command].__qualname__.split('.')[0]}>{self.functions[command].__name__}"
+
     def execute_commands(self, driver=False, commands=False):
         """
-        Execute self.commands based on self.functions
+        Execute self.commands based on self.functions;
+        Only the top level execution quits the driver, nested executions (check, for_each, ...) keep it alive.
         """
         driver = self.driver if not driver else driver
-        commands = self.commands if not commands else commands
+        commands = self._get_plan(self.commands if not commands else commands)
         message_error = False
+        # errors before the first step (resume from a checkpoint) have no command
+        step = command = False
+        self.execution_depth += 1
         try:
-            for command_line in commands:
-                command_line:dict      
-                for command, param in command_line.items():
-                    result, message = self.functions[command](driver, **param)
-                    if not result:
-                        self._check_to_quit(driver)
-                        message_error = \
-                            f"[{self.functions[command].__qualname__.split('.')[0]}>{self.functions[command].__name__}: ERROR]\n" \
-                            f"command: {command_line}\n error: {message}" 
-                        break
-                if message_error:
+            for step in self._iter_steps(commands, self._get_resume_index(driver, commands)):
+                command = step.command
+                self._set_startup_time()
+                result, message = self._execute_command(self._get_command_driver(driver, command), command, step.kwargs())
+                if not result:
+                    message_error = \
+                        f"[{self._get_command_origin(command)}: ERROR]\n" \
+                        f"command: {step}\n error: {message}" 
                     break
 
         except Exception as e:
             message_error = \
-                f"[{self.functions[command].__qualname__.split('.')[0]}>{self.functions[command].__name__}: ERROR]\n" \
-                f"command: {command_line}\n error: {e}\n" \
+                f"[{self._get_command_origin(command)}: ERROR]\n" \
+                f"command: {step}\n error: {e}\n" \
                 f"content_variables: {self.content_variables}" 
+        finally:
+            self.execution_depth -= 1
             
-        self._check_to_quit(driver)
+        if self.execution_depth == 0:
+            self._check_to_quit(driver)
+            # only the writers of this engine, other engines of the process can be writing
+            BackgroundWriter.release_writers(self)
+            if not message_error:
+                self._remove_checkpoint()
         if message_error:
             self._error_message(message_error)
             raise Exception(message_error)
 
-
 """
     TODO IDEIAS
     CRIAR UM NOME ESPECIFICO PARA CADA TIPO DE RELARÓRIO ASSIM NÃO PRECISAMOS DEFINIR TODAS AS VEZES OS PARAMETROS DE 
@@ -1,25 +1,38 @@
-from .web_functions_engine import WebFunctionsEngine
+from .web_functions_engine import WebFunctionsEngine, ELEMENT_TYPES
+from .web_scripts import EXTRACT_RECORDS_JS, WAIT_ELEMENT_JS, WAIT_DOCUMENT_READY_JS
+from .page_snapshot import PageSnapshot
+from .element_handle import ElementHandle
+from .parquet_writer import ParquetRowWriter
+from .log_store import LogStore
+from .mail_watcher import MailWatcher
+from .downloader import download_file, get_driver_session, PathReservation
+from .lazy_import import LazyModule
+from .command_registry import command
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.common.exceptions import NoSuchElementException
-import copy
-import win32com.client
+from selenium.common.exceptions import NoSuchElementException, WebDriverException, TimeoutException, JavascriptException
 import datetime
 import time
+import json
 import re
-import requests
 import os
 import shutil
-import pythoncom
 from pathlib import Path
-import pandas as pd
 import pathlib
 
+
+# Excel/Parquet dependencies, imported on the first command that uses them
+pd = LazyModule("pandas", plugin="Excel/Parquet")
+pq = LazyModule("pyarrow.parquet", plugin="Excel/Parquet", package="pyarrow")
+
 # TODO, function are not using a default motor to run action commands 
 class WebFunctions(WebFunctionsEngine):
+    @command(side_effects=("commands",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def check(
@@ -57,6 +70,7 @@ class WebFunctions(WebFunctionsEngine):
             if false_action_commands:
                 driver.web_engine.execute_commands(driver, false_action_commands)
 
+    @command(side_effects=("file",))
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def print_screen(
@@ -81,44 +95,26 @@ class WebFunctions(WebFunctionsEngine):
             file_path = Path(os.path.join(driver.download_folder, f"{file_name}.png"))
         driver.save_screenshot(file_path)
 
+    @command(side_effects=("file",), http=True, snapshot=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def error_log(
-        self, driver: WebDriver, status: bool = False, message: str = False
+        self, driver: WebDriver, status: bool = False, message: str = False, log_file: str = False
     ) -> None:
         """
         ### error_log
-        Create a error log in a Excel file:
+        Append a record to the day log file, the record is queued and written by a background writer;
         @param status: Status message
         @param message: message to put in the error log
-        #### Will probably be discontinued
+        @param log_file: log file path (strftime format), the extension chooses the format: ".jsonl" (default),
+        ".csv" or ".sqlite"; Use "WebMultithread(export_logs_excel=True)" or "LogStore.export_excel" to get the Excel file
         """
-        today = datetime.datetime.today()
-        file_name = Path(
-            today.strftime(
-                os.path.join(
-                    pathlib.Path().resolve(), "..", "logs", "log_%d_%m_%Y.xlsx"
-                )
-            )
-        )
-
-        if not file_name.is_file():
-            df = pd.DataFrame(dict(datetime=[], status=[], message=[]))
-            df.to_excel(file_name, index=False)
-        else:
-            df = pd.read_excel(file_name)
-
-        df_log = pd.DataFrame(
-            dict(
-                dict(
-                    datetime=[datetime.datetime.now()],
-                    status=[status],
-                    message=[message],
-                )
-            )
-        )
-        pd.concat([df, df_log], ignore_index=True).to_excel(file_name, index=False)
+        if not log_file:
+            log_file = os.path.join(pathlib.Path().resolve(), "..", "logs", "log_%d_%m_%Y.jsonl")
+        log_file = os.path.abspath(datetime.datetime.today().strftime(log_file))
+        LogStore.get_writer(log_file, user=driver.web_engine).add_record(status, message)
 
+    @command(side_effects=("page",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def get(self, driver: WebDriver, url: str) -> None:
@@ -128,6 +124,7 @@ class WebFunctions(WebFunctionsEngine):
         """
         driver.get(url)
 
+    @command(side_effects=("page",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def click(self, driver: WebDriver, element: str, check: bool = False) -> None:
@@ -151,9 +148,18 @@ class WebFunctions(WebFunctionsEngine):
             message = "[WebFunctions>click: ERROR] select a valid value to 'check' (True, False)"
             self._error_message(message)
 
+    @command
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
-    def wait(self, driver: WebDriver, type_wait: str, element: str = "*") -> None:
+    def wait(
+        self,
+        driver: WebDriver,
+        type_wait: str,
+        element: str = "*",
+        timeout: int = 3000,
+        quiet_time: float = 0.5,
+        max_request_time: float = 30,
+    ) -> None:
         """
         ### WAIT
         Wait something happen to continue;
@@ -166,29 +172,38 @@ class WebFunctions(WebFunctionsEngine):
             - PRESENCE: Wait the element exist
             - ALERT: Wait a alert appear
             - WINDOW: Wait a window appear
+            - DOCUMENT_READY: Wait the document load event
+            - NETWORK_IDLE: Wait the document load and no network requests during "quiet_time" seconds
+            (needs "network_events=True" in the WebEngine)
+        @param timeout: max time to wait in seconds
+        @param quiet_time: NETWORK_IDLE, seconds without requests to consider the page loaded
+        @param max_request_time: NETWORK_IDLE, requests open for more seconds (websockets, long polling) are ignored
+
+        APPEAR, DISAPPEAR, CLICKABLE and PRESENCE are checked inside the page by a MutationObserver, that returns
+        as soon as the DOM changes, instead of a WebDriver call to each check;
         """
 
-        element_type, element_selection = self._get_element_prop(
-            element, accept_web_element=False
-        )
-        element_params: tuple = (element_type, element_selection)
-
         type_wait = type_wait.upper()
-        wait = WebDriverWait(driver, 3000)
+        timeout = float(timeout)
 
-        if type_wait == "APPEAR":
-            wait.until(EC.visibility_of_element_located(element_params))
+        if type_wait == "NETWORK_IDLE":
+            self._wait_network_idle(driver, timeout, float(quiet_time), float(max_request_time))
+            return
 
-        elif type_wait == "DISAPPEAR":
-            wait.until(EC.invisibility_of_element_located(element_params))
+        if type_wait == "DOCUMENT_READY":
+            self._wait_document_ready(driver, timeout)
+            return
 
-        elif type_wait == "CLICKABLE":
-            wait.until(EC.element_to_be_clickable(element_params))
-
-        elif type_wait == "PRESENCE":
-            wait.until(EC.presence_of_element_located(element_params))
+        if type_wait in ("APPEAR", "DISAPPEAR", "CLICKABLE", "PRESENCE"):
+            element_type, element_selection = self._get_element_prop(
+                element, accept_web_element=False
+            )
+            element_params: tuple = (element_type, element_selection)
+            self._wait_element(driver, type_wait, element_params, timeout)
+            return
 
-        elif type_wait == "ALERT":
+        wait = WebDriverWait(driver, timeout)
+        if type_wait == "ALERT":
             wait.until(EC.alert_is_present())
 
         elif type_wait == "WINDOW":
@@ -196,9 +211,132 @@ class WebFunctions(WebFunctionsEngine):
         elif type_wait == "TAB":
             wait.until(EC.number_of_windows_to_be(2))
         else:
-            message = "[WebEngine>wait: ERROR] Select a valid appear value (APPEAR, DISAPPEAR, CLICKABLE, PRESENCE, ALERT, WINDOW)."
+            message = "[WebEngine>wait: ERROR] Select a valid appear value (APPEAR, DISAPPEAR, CLICKABLE, PRESENCE, ALERT, WINDOW, DOCUMENT_READY, NETWORK_IDLE)."
+            self._error_message(message)
+
+    def _wait_element(self, driver: WebDriver, type_wait: str, element_params: tuple, timeout: float, slice_time: float = 30) -> None:
+        """
+        ### _wait_element
+        Run "WAIT_ELEMENT_JS" in slices of "slice_time" seconds (a long script would exceed the WebDriver
+        connection timeout) until the condition happens or the timeout ends;
+        Scripts interrupted by a page navigation are executed again in the new page.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining_time = deadline - time.monotonic()
+            if remaining_time <= 0:
+                message = f"[WebFunctions>wait: ERROR] timeout of {timeout}s waiting {type_wait} {element_params}"
+                self._error_message(message)
+
+            if self._check_wait_element(driver, type_wait, element_params, min(remaining_time, slice_time)):
+                return
+
+    def _wait_document_ready(self, driver: WebDriver, timeout: float, slice_time: float = 30) -> None:
+        """
+        ### _wait_document_ready
+        Run "WAIT_DOCUMENT_READY_JS" in slices of "slice_time" seconds until the document load event or the timeout;
+        A navigation during the wait runs the script again in the new page.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining_time = deadline - time.monotonic()
+            if remaining_time <= 0:
+                message = f"[WebFunctions>wait: ERROR] timeout of {timeout}s waiting DOCUMENT_READY"
+                self._error_message(message)
+
+            driver.set_script_timeout(min(remaining_time, slice_time))
+            try:
+                driver.execute_async_script(WAIT_DOCUMENT_READY_JS)
+                return
+            except WebDriverException as e:
+                if not self._is_retry_script_error(e):
+                    raise
+                time.sleep(0.1)
+
+    def _check_document_ready(self, driver: WebDriver) -> bool:
+        """
+        ### _check_document_ready
+        Return if the document load event happened, without waiting it; A page navigation during the check is False;
+        """
+        try:
+            return driver.execute_script("return document.readyState") == "complete"
+        except WebDriverException as e:
+            if not self._is_retry_script_error(e):
+                raise
+            return False
+
+    def _check_wait_element(self, driver: WebDriver, type_wait: str, element_params: tuple, script_time: float) -> bool:
+        """
+        ### _check_wait_element
+        Run "WAIT_ELEMENT_JS" once, waiting the condition up to "script_time" seconds inside the page;
+        """
+        driver.set_script_timeout(script_time + 5)
+        try:
+            return bool(driver.execute_async_script(WAIT_ELEMENT_JS, list(element_params), type_wait, int(script_time * 1000)))
+        except WebDriverException as e:
+            # only the slice timeout and a page navigation are retried, a closed window or a lost session are raised
+            if not self._is_retry_script_error(e):
+                raise
+            time.sleep(0.1)
+            return False
+
+    def _is_retry_script_error(self, error:WebDriverException) -> bool:
+        """
+        ### _is_retry_script_error
+        Return if a error of "execute_async_script" can be retried: the script timeout or a page navigation
+        ("document unloaded while waiting for result");
+        """
+        return isinstance(error, (TimeoutException, JavascriptException)) or "document unloaded" in str(error.msg)
+
+    def _wait_network_idle(self, driver: WebDriver, timeout: float, quiet_time: float, max_request_time: float) -> None:
+        """
+        ### _wait_network_idle
+        Follow the DevTools Network events (performance log) counting the requests in flight, and return when the
+        document is loaded and no request is open during "quiet_time";
+        The requests in flight are kept in "driver.network_requests" between waits.
+        """
+        try:
+            network_requests = driver.network_requests
+        except AttributeError:
+            message = "[WebFunctions>wait: ERROR] NETWORK_IDLE needs a WebEngine with 'network_events=True'."
             self._error_message(message)
 
+        deadline = time.monotonic() + timeout
+        idle_time = False
+        while True:
+            current_time = time.monotonic()
+            if self._check_network_idle(driver, network_requests, max_request_time):
+                idle_time = idle_time or current_time
+                if current_time - idle_time >= quiet_time:
+                    return
+            else:
+                idle_time = False
+
+            if current_time >= deadline:
+                message = f"[WebFunctions>wait: ERROR] timeout of {timeout}s waiting NETWORK_IDLE, requests in flight: {len(network_requests)}"
+                self._error_message(message)
+            time.sleep(0.1)
+
+    def _check_network_idle(self, driver: WebDriver, network_requests: dict, max_request_time: float) -> bool:
+        """
+        ### _check_network_idle
+        Read the new Network events once, and return if the document is loaded without requests in flight;
+        """
+        for entry in driver.get_log("performance"):
+            event = json.loads(entry["message"])["message"]
+            if event["method"] == "Network.requestWillBeSent":
+                network_requests[event["params"]["requestId"]] = time.monotonic()
+            elif event["method"] in ("Network.loadingFinished", "Network.loadingFailed"):
+                network_requests.pop(event["params"]["requestId"], None)
+
+        current_time = time.monotonic()
+        for request_id, request_time in list(network_requests.items()):
+            if current_time - request_time > max_request_time:
+                network_requests.pop(request_id)
+
+        return not network_requests and driver.execute_script("return document.readyState;") == "complete"
+
+    @command(side_effects=("page",))
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def execute_window_command(
@@ -229,6 +367,7 @@ class WebFunctions(WebFunctionsEngine):
             driver.web_engine.execute_commands(driver, action_commands)
             driver.switch_to.window(current_window)
 
+    @command(side_effects=("page",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def insert(self, driver: WebDriver, element: str, value: str) -> None:
@@ -242,6 +381,7 @@ class WebFunctions(WebFunctionsEngine):
         web_element: WebElement = self._get_element(driver, element)
         web_element.send_keys(value)
 
+    @command(side_effects=("page",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def add_cookies(self, driver: WebDriver, cookies_str: str=False, cookie_dict:dict=False) -> None:
@@ -266,6 +406,7 @@ class WebFunctions(WebFunctionsEngine):
                 }
                 driver.add_cookie(cookie)
 
+    @command(side_effects=("page",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def close(self, driver: WebDriver) -> None:
@@ -275,6 +416,7 @@ class WebFunctions(WebFunctionsEngine):
         """
         driver.close()
 
+    @command(side_effects=("page",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def quit(self, driver: WebDriver) -> None:
@@ -291,6 +433,7 @@ class WebFunctions(WebFunctionsEngine):
     #     os.rmdir(driver.download_temp_folder)
     #     os.rmdir(driver.download_folder)
 
+    @command(side_effects=("page", "mail", "commands"))
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def insert_mail_token(
@@ -299,11 +442,12 @@ class WebFunctions(WebFunctionsEngine):
         element: str,
         token_location: str,
         wait_time: str | int,
-        account_name:str,
-        inbox_name:str,
+        account_name:str = False,
+        inbox_name:str = False,
         action_commands: list = False,
         subject: str = False,
         sender_mail: str = False,
+        mailbox: dict = False,
     ) -> None:
         """
         ### insert_mail_token
@@ -314,61 +458,43 @@ class WebFunctions(WebFunctionsEngine):
         @param sender_mail: Email that send token
         @param token_location: Token location (re pattern)
         @param wait_time: Time to wait the email
+        @param mailbox: mailbox configuration, see "get_mail_backend" (default: Outlook "account_name" and "inbox_name")
 
         #### Will probably be altered using "__get_web_element_atributte"
         
         Can use '/' in 'inbox_name' to get subfolder content
         """
+        if not sender_mail and not subject:
+            message = f'[WebFunctions>insert_mail_token: ERROR] Select a "sender_mail" or a "subject"'
+            self._error_message(message)
+
+        init_time = datetime.datetime.now()
         if action_commands:
             driver.web_engine.execute_commands(driver, action_commands)
-        
-        init_time = datetime.datetime.now()
-        current_time = datetime.timedelta(0)
-        
-        token = None
-        while current_time <= datetime.timedelta(minutes=int(wait_time)):
-            outlook = win32com.client.Dispatch(
-                "Outlook.Application", pythoncom.CoInitialize()
-            ).GetNamespace("MAPI")
-            
-            account = outlook.Folders.Item(account_name)
-            
-            folder_splited = inbox_name.split("/")
 
-            account_inbox = account.Folders[folder_splited.pop(0)]
-            while folder_splited:
-                account_inbox = account_inbox.Folders[folder_splited.pop(0)]
-            
-            if sender_mail:
-                filteredItems = account_inbox.Items.Restrict(
-                    f"[SenderEmailAddress]='{sender_mail}'"
-                )
-            elif subject:
-                filteredItems = account_inbox.Items.Restrict(f"[Subject] = '{subject}'")
-            else:
-                message = f'[WebFunctions>insert_mail_token: ERROR] Select a "sender_mail" or a "subject"'
-                self._error_message(message)
-            
-            filteredItems.Sort("[ReceivedTime]", False)
-            email_result = filteredItems.GetLast()
-            # print(email_result.Body)
-            if email_result is not None:
-                email_received_time = datetime.datetime.strptime(
-                    str(email_result.ReceivedTime).replace("+00:00", "").split(".")[0],
-                    "%Y-%m-%d %H:%M:%S",
-                )
-                if email_received_time > init_time:
-                    token = re.findall(token_location, email_result.Body)
-                    if token:
-                        token = token[0]
-                        break
-                    else:
-                        message = f'[WebFunctions>insert_mail_token: ERROR] Token not found, check "token_location"!'
-                        self._error_message(message)
-            current_time = datetime.datetime.now() - init_time
-            time.sleep(5)
+        email_result = self._wait_mail_message(
+            init_time, wait_time, account_name, inbox_name, mailbox,
+            sender=sender_mail, subject=subject, pattern=token_location,
+        )
+        if email_result is None:
+            message = f'[WebFunctions>insert_mail_token: ERROR] Token not found in {wait_time} minutes, check "token_location"!'
+            self._error_message(message)
+
+        token = re.findall(token_location, email_result.body)[0]
         self.insert(driver, element, token)
 
+    def _wait_mail_message(
+        self, init_time: datetime.datetime, wait_time: str | int, account_name: str, inbox_name: str, mailbox: dict, **filters
+    ):
+        """
+        ### _wait_mail_message
+        Wait a message received after "init_time" in the shared MailWatcher of the mailbox;
+        """
+        mailbox_config = mailbox if mailbox else {"backend": "outlook", "account_name": account_name, "inbox_name": inbox_name}
+        watcher = MailWatcher.get_watcher(mailbox_config)
+        return watcher.wait_message(init_time, int(wait_time) * 60, **filters)
+
+    @command(side_effects=("file",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def create_parquet_file(
@@ -394,18 +520,27 @@ class WebFunctions(WebFunctionsEngine):
         save_path_file = Path(os.path.join(str(save_path), file_name))
 
         if save_path_file.is_file():
+            # the rows still buffered are written before the file is validated, unless other contents are writing
+            # the file: their writer is kept open and its columns are the file columns
+            writer = None
+            if not ParquetRowWriter.close_writer(save_path_file, user=getattr(driver, "web_engine", None)):
+                writer = ParquetRowWriter.get_open_writer(save_path_file)
             if validate_columns:
-                opened_df = pd.read_parquet(str(save_path_file))
-                validated_columns = set(columns) - set(opened_df.columns.values)
+                file_columns = writer.columns if writer is not None else pq.read_schema(str(save_path_file)).names
+                validated_columns = set(columns) - set(file_columns)
                 if validated_columns:
                     message = f"[WebFunctions>create_parquet_file: ERROR] the file awready exist, and has not the same columns!\nException Columns: {validated_columns}"
                     self._error_message(message)
+            if overwrite and writer is not None:
+                message = f"[WebFunctions>create_parquet_file: ERROR] the file is being written by other contents, it can't be overwritten: {save_path_file}"
+                self._error_message(message)
             if overwrite:
                 save_path_file.unlink()
                 df.to_parquet(str(save_path_file), index=False)
         else:
             df.to_parquet(str(save_path_file), index=False)
 
+    @command(side_effects=("file",), http=True, snapshot=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def add_parquet_row(
@@ -433,22 +568,13 @@ class WebFunctions(WebFunctionsEngine):
             message = f"[WebFunctions>add_parquet_row: ERROR] file_path do not exist!"
             self._error_message(message)
 
-        df = pd.read_parquet(str(file_path))
-        df_val = pd.DataFrame([column_to_value])
-
-        if create_columns:
-            df_final = pd.concat([df, df_val], ignore_index=True)
-            df_final.to_parquet(str(file_path), index=False)
-
-        else:
-            columns_validate = set(df_val.columns.values) - set(df.columns.values)
-            if columns_validate:
-                message = f"[WebFunctions>add_parquet_row: ERROR] columns do not exist!\n columns: {columns_validate}"
-                self._error_message(message)
-
-            df_final = pd.concat([df, df_val], ignore_index=True)
-            df_final.to_parquet(str(file_path), index=False)
+        # the row is written by the file writer thread, in batches, instead of rewriting the file to each row
+        try:
+            ParquetRowWriter.get_writer(file_path, user=driver.web_engine).add_row(column_to_value, create_columns)
+        except Exception as e:
+            self._error_message(str(e))
 
+    @command(side_effects=("page",))
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def execute_js(
@@ -468,6 +594,59 @@ class WebFunctions(WebFunctionsEngine):
         driver.set_script_timeout(script_timeout)
         driver.execute_script(code_js, web_element)
 
+    @command(side_effects=("file",))
+    @WebFunctionsEngine._validation
+    @WebFunctionsEngine._get_web_element_atributte
+    def extract_records(
+        self,
+        driver: WebDriver,
+        rows: str,
+        columns: dict,
+        save_as: str = False,
+        as_dataframe: bool = False,
+        file_path: str = False,
+        file_name: str = False,
+        script_timeout: int = 100,
+    ) -> None:
+        """
+        ### extract_records
+        Extract a record of each "rows" element in a single JavaScript execution, instead of a WebDriver call
+        to each cell like "for_each" with "{text(this ...)}";
+
+        @param rows: element selection of the rows, ex.: "%//table/tbody/tr"
+        @param columns: column name to the element selection inside the row, or to a dict with "element" and "attribute";
+        "." is the row itself and "attribute" can be "text" (default), "value", "html" or any element attribute, ex.:
+            >>> {"name": "%./td[1]", "link": {"element": "*a", "attribute": "href"}, "row_id": {"element": ".", "attribute": "id"}}
+        @param save_as: name to save the records in "driver.web_engine.results", to be used by the next commands
+        @param as_dataframe: save the records as a pandas DataFrame
+        @param file_path: folder of a parquet file to append the records (with "file_name")
+        @param file_name: parquet file name
+        """
+        rows_type, rows_selection = self._get_element_prop(rows, accept_web_element=False)
+
+        columns_selection = []
+        for column, selection in columns.items():
+            if isinstance(selection, dict):
+                element, attribute = selection.get("element", "."), selection.get("attribute", "text")
+            else:
+                element, attribute = selection, "text"
+            element_type, element_selection = self._get_element_prop(element, accept_web_element=False, scoped=True)
+            columns_selection.append([column, element_type, element_selection, attribute])
+
+        driver.set_script_timeout(script_timeout)
+        records = driver.execute_script(EXTRACT_RECORDS_JS, [rows_type, rows_selection], columns_selection)
+
+        if save_as:
+            driver.web_engine.results[save_as] = pd.DataFrame(records, columns=list(columns)) if as_dataframe else records
+
+        if file_path and file_name:
+            change_datetime = datetime.datetime.today().strftime("%d/%m/%Y %H:%M:%S")
+            file_path = Path(os.path.join(file_path, file_name))
+            ParquetRowWriter.get_writer(file_path, user=driver.web_engine, columns=list(columns) + ["change_datetime"]).add_rows(
+                [{**record, "change_datetime": change_datetime} for record in records]
+            )
+
+    @command(side_effects=("page", "file"), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def execute_py(
@@ -483,6 +662,7 @@ class WebFunctions(WebFunctionsEngine):
         elif code_py:
             exec(code_py)
 
+    @command(http=True, snapshot=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def print(self, driver: WebDriver, value=False) -> None:
@@ -493,22 +673,26 @@ class WebFunctions(WebFunctionsEngine):
     # def select_multiples_elementes(self, driver: WebDriver, value=False) -> None:
     #     print(value)
 
+    @command(side_effects=("page",))
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def select(self, driver: WebDriver, element, value) -> None:
         select = Select(self._get_element(driver, element))
         select.select_by_value(value)
 
+    @command(http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def sleep(self, driver: WebDriver, timesec: str) -> None:
         time.sleep(int(timesec))
 
+    @command(side_effects=("page",))
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def confirm_alert(self, driver: WebDriver) -> None:
         driver.switch_to.alert.accept()
 
+    @command(side_effects=("page", "mail", "network", "file", "commands"))
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def download_from_email_link(
@@ -519,8 +703,9 @@ class WebFunctions(WebFunctionsEngine):
         url_location: str,
         wait_time: str | int,
         file_name: str,
-        account_name:str,
-        inbox_name:str,
+        account_name:str = False,
+        inbox_name:str = False,
+        mailbox: dict = False,
     ) -> None:
         """
         :param action_commands: Command to trigger "download_from_email_link" function
@@ -529,44 +714,26 @@ class WebFunctions(WebFunctionsEngine):
         :param url_location: url download location (re pattern)
         :param wait_time: Time to wait the email
         :param file_name: file save name
+        :param mailbox: mailbox configuration, see "get_mail_backend" (default: Outlook "account_name" and "inbox_name")
         """
-        driver.web_engine.execute_commands(driver, action_commands)
-        init_time = datetime.datetime.now()
-        current_time = datetime.timedelta(0)
-        while current_time <= datetime.timedelta(minutes=int(wait_time)):
-            outlook = win32com.client.Dispatch("Outlook.Application").GetNamespace(
-                "MAPI"
-            )
-            
-            account = outlook.Folders.Item(account_name)
-            folder_splited = inbox_name.split("/")
+        download_key = f"download_from_email_link|{file_name}"
+        if driver.web_engine._get_completed_download(download_key):
+            return
 
-            account_inbox = account.Folders[folder_splited.pop(0)]
-            while folder_splited:
-                account_inbox = account_inbox.Folders[folder_splited.pop(0)]
-            
-            filteredItems = account_inbox.Items.Restrict(
-                f"[SenderEmailAddress]='{sender_mail}'"
-            )
-            filteredItems.Sort("[ReceivedTime]", False)
-            email_result = filteredItems.GetLast()
+        init_time = datetime.datetime.now()
+        driver.web_engine.execute_commands(driver, action_commands)
 
-            if email_result is not None:
-                email_received_time = datetime.datetime.strptime(
-                    str(email_result.ReceivedTime).replace("+00:00", "").split(".")[0],
-                    "%Y-%m-%d %H:%M:%S",
-                )
-                if email_received_time > init_time:
-                    url = re.search(url_location, email_result.Body).group("url")
-                    request = requests.get(url, verify=False, allow_redirects=True)
-                    open(os.path.join(driver.download_folder, file_name), "wb").write(
-                        request.content
-                    )
-                    break
-            current_time = datetime.datetime.now() - init_time
-            time.sleep(5)
+        email_result = self._wait_mail_message(
+            init_time, wait_time, account_name, inbox_name, mailbox, sender=sender_mail, pattern=url_location,
+        )
+        if email_result is not None:
+            url = re.search(url_location, email_result.body).group("url")
+            download_stats = download_file(get_driver_session(driver), url, os.path.join(driver.download_folder, file_name))
+            driver.web_engine.results.setdefault("downloads", []).append(download_stats)
+            driver.web_engine._add_completed_download(download_key, download_stats["file_path"])
 
     # TODO delete
+    @command(side_effects=("page", "file", "commands"))
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def download_action_general(
@@ -647,6 +814,203 @@ class WebFunctions(WebFunctionsEngine):
         if finish_action_commands:
             driver.web_engine.execute_commands(driver, finish_action_commands)
             
+    def _get_download_file_name(
+        self, driver: WebDriver, file_name: str = False, element_file_name: str = False, file_name_date_format: dict = False
+    ) -> str:
+        """
+        ### _get_download_file_name
+        File name of "download_action" and "download_links", from "file_name" or the "element_file_name" text,
+        formatted with "file_name_date_format";
+        """
+        if not file_name and element_file_name:
+            web_element = self._get_element(driver, element_file_name)
+            file_name = web_element.text
+
+        if file_name and file_name_date_format:
+            file_name_datetime = datetime.datetime.strptime(
+                file_name, file_name_date_format["input"]
+            )
+            file_name = file_name_datetime.strftime(file_name_date_format["output"])
+        return file_name
+
+    def _get_download_folder_name(
+        self, driver: WebDriver, folder_name: str = False, folder_element_name: str = False, folder_name_date_format: dict = False
+    ) -> str:
+        """
+        ### _get_download_folder_name
+        Folder name (inside "download_folder") of "download_action" and "download_links", from "folder_name" or the
+        "folder_element_name" text, formatted with "folder_name_date_format"; The folder is created.
+        """
+        if folder_element_name:
+            web_element = self._get_element(driver, folder_element_name)
+            folder_name = web_element.text
+
+        if folder_name or folder_element_name:
+            if folder_name_date_format:
+                folder_name_datetime = datetime.datetime.strptime(
+                    folder_name, folder_name_date_format["input"]
+                )
+                folder_name = folder_name_datetime.strftime(
+                    folder_name_date_format["output"]
+                )
+
+            folder_name_path = os.path.join(*[driver.download_folder, folder_name])
+            if not os.path.isdir(folder_name_path):
+                os.mkdir(folder_name_path)
+        return folder_name
+
+    @command(side_effects=("network", "file"), http=True, snapshot=True)
+    @WebFunctionsEngine._validation
+    @WebFunctionsEngine._get_web_element_atributte
+    def download_links(
+        self,
+        driver: WebDriver,
+        elements: str,
+        attribute: str = "href",
+        workers: int = 4,
+        folder_element_name: str = False,
+        folder_name: str = False,
+        folder_name_date_format: dict = False,
+        file_name: str = False,
+        element_file_name=False,
+        file_extension=False,
+        file_name_date_format=False,
+        timeout: int = 60,
+    ) -> None:
+        """
+        ### download_links
+        Download the links of "elements" concurrently over HTTP, with the cookies and the user agent of the driver,
+        instead of clicking each link in a "download_action" (no browser download, no temp folder poll, no semaphore);
+        The folder and file names follow the "download_action" rules, when "file_name" is used with more than one
+        link the files are numbered ("<file_name>_1", "<file_name>_2", ...); Without "file_name", links with the same
+        response file name are saved as "<name>", "<name>_2", ...
+
+        @param elements: element selection of the links
+        @param attribute: element attribute with the url
+        @param workers: number of simultaneous downloads
+        @param file_extension: extension of "file_name", by default the extension of the downloaded file
+        """
+        # a url linked twice is downloaded once
+        urls = list(dict.fromkeys(
+            urljoin(driver.current_url, url)
+            for url in (web_element.get_attribute(attribute) for web_element in self._get_elements(driver, elements))
+            if url
+        ))
+        if not urls:
+            message = f"[WebFunctions>download_links: ERROR] no link found in '{elements}' ({attribute})."
+            self._error_message(message)
+
+        file_name = self._get_download_file_name(driver, file_name, element_file_name, file_name_date_format)
+        folder_name = self._get_download_folder_name(driver, folder_name, folder_element_name, folder_name_date_format)
+        folder_path = os.path.join(*filter(None, [driver.download_folder, folder_name]))
+
+        def get_file_stem(index:int) -> str:
+            return f"{file_name}_{index + 1}" if len(urls) > 1 else file_name
+
+        def download(index:int, url:str) -> dict:
+            if not file_name:
+                return download_file(session, url, folder_path, timeout=timeout, path_reservation=path_reservation)
+            if file_extension:
+                return download_file(session, url, os.path.join(folder_path, f"{get_file_stem(index)}{file_extension}"), timeout=timeout)
+            return download_file(session, url, folder_path, timeout=timeout, file_stem=get_file_stem(index), path_reservation=path_reservation)
+
+        # the downloads completed in a previous attempt (see "checkpoint") are not requested again
+        download_keys = {
+            url: f"download_links|{url}|{folder_path}|{get_file_stem(index) if file_name else ''}" for index, url in enumerate(urls)
+        }
+        session = get_driver_session(driver)
+        # the file names come from the responses, two urls can have the same name
+        path_reservation = PathReservation()
+        errors = []
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+            futures = {
+                executor.submit(download, index, url): url for index, url in enumerate(urls)
+                if not driver.web_engine._get_completed_download(download_keys[url])
+            }
+            for future in as_completed(futures):
+                try:
+                    download_stats = future.result()
+                    driver.web_engine.results.setdefault("downloads", []).append(download_stats)
+                    driver.web_engine._add_completed_download(download_keys[futures[future]], download_stats["file_path"])
+                except Exception as e:
+                    errors.append(f"{futures[future]}: {e}")
+
+        if errors:
+            message = f"[WebFunctions>download_links: ERROR] {len(errors)} of {len(urls)} downloads failed:\n" + "\n".join(errors)
+            self._error_message(message)
+
+    def _move_downloaded_file(self, driver: WebDriver, file_name: str, folder_name: str, file_extension: str) -> str|bool:
+        """
+        ### _move_downloaded_file
+        Check the download temp folder once, and move the last downloaded file to the download folder;
+        Return the moved file path, or False if there is no downloaded file.
+        """
+        all_files = [x.name for x in Path(driver.download_temp_folder).glob("*")]
+        files_to_validate = []
+        for file in all_files:
+            if ".htm" in file or "download" in file or "tmp" in file:
+                continue
+            files_to_validate.append(file)
+        if files_to_validate:
+            old_file_name = max(
+                [
+                    os.path.join(driver.download_temp_folder, file)
+                    for file in files_to_validate
+                ],
+                key=os.path.getctime,
+            )
+
+            if not file_extension:
+                _, file_extension = os.path.splitext(old_file_name)
+
+            # check name file to save
+            if file_name:
+                file_paths = list(
+                    filter(
+                        None,
+                        [
+                            driver.download_folder,
+                            folder_name,
+                            f"{file_name}{file_extension}",
+                        ],
+                    )
+                )
+            else:
+                file_paths = list(
+                    filter(
+                        None,
+                        [
+                            driver.download_folder,
+                            folder_name,
+                            os.path.basename(old_file_name),
+                        ],
+                    )
+                )
+
+            new_file_name = os.path.join(*file_paths)
+
+            self._validate_file(old_file_name) # TODO validate file
+
+            count = 0
+            while count <= 30:
+                move = False
+                try:
+                    shutil.move(old_file_name, new_file_name)
+                    move = True
+                except Exception as e:
+                    move = False
+                    time.sleep(1)
+                if move:
+                    break
+                count = count + 1
+
+            if count >= 30:
+                message = f"[WebFunctions>download_action: ERROR] Download Exception:\nFile: {old_file_name}\nMove to: {new_file_name}"
+                self._error_message(message)
+            return new_file_name
+        return False
+
+    @command(side_effects=("page", "file", "commands"), lock=True, http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def download_action(
@@ -680,34 +1044,12 @@ class WebFunctions(WebFunctionsEngine):
         :param element_file_name: Set file name with the element selection text
         :param folder_element_name: Set folder name with the element selection text
         """
-        # file name
-        if not file_name and element_file_name:
-            web_element = self._get_element(driver, element_file_name)
-            file_name = web_element.text
-
-        if file_name and file_name_date_format:
-            file_name_datetime = datetime.datetime.strptime(
-                file_name, file_name_date_format["input"]
-            )
-            file_name = file_name_datetime.strftime(file_name_date_format["output"])
-
-        # folder name
-        if folder_element_name:
-            web_element = self._get_element(driver, folder_element_name)
-            folder_name = web_element.text
-
-        if folder_name or folder_element_name:
-            if folder_name_date_format:
-                folder_name_datetime = datetime.datetime.strptime(
-                    folder_name, folder_name_date_format["input"]
-                )
-                folder_name = folder_name_datetime.strftime(
-                    folder_name_date_format["output"]
-                )
-
-            folder_name_path = os.path.join(*[driver.download_folder, folder_name])
-            if not os.path.isdir(folder_name_path):
-                os.mkdir(folder_name_path)
+        file_name = self._get_download_file_name(driver, file_name, element_file_name, file_name_date_format)
+        folder_name = self._get_download_folder_name(driver, folder_name, folder_element_name, folder_name_date_format)
+        # only a named file can be found again by a retry
+        download_key = f"download_action|{folder_name}|{file_name}" if file_name else False
+        if download_key and driver.web_engine._get_completed_download(download_key):
+            return
 
         # download and save file
         driver.web_engine.execute_commands(driver, action_commands)
@@ -716,76 +1058,18 @@ class WebFunctions(WebFunctionsEngine):
 
         # wait util the time has been done or the file has been downloaded
         while current_time <= datetime.timedelta(minutes=int(wait_time)):
-            all_files = [x.name for x in Path(driver.download_temp_folder).glob("*")]
-            files_to_validate = []
-            for file in all_files:
-                if ".htm" in file or "download" in file or "tmp" in file:
-                    continue
-                files_to_validate.append(file)
-            if files_to_validate:
-                old_file_name = max(
-                    [
-                        os.path.join(driver.download_temp_folder, file)
-                        for file in files_to_validate
-                    ],
-                    key=os.path.getctime,
-                )
-
-                if not file_extension:
-                    _, file_extension = os.path.splitext(old_file_name)
-
-                # check name file to save
-                if file_name:
-                    file_paths = list(
-                        filter(
-                            None,
-                            [
-                                driver.download_folder,
-                                folder_name,
-                                f"{file_name}{file_extension}",
-                            ],
-                        )
-                    )
-                else:
-                    file_paths = list(
-                        filter(
-                            None,
-                            [
-                                driver.download_folder,
-                                folder_name,
-                                os.path.basename(old_file_name),
-                            ],
-                        )
-                    )
-
-                new_file_name = os.path.join(*file_paths)
-                
-                self._validate_file(old_file_name) # TODO validate file
-                
-                count = 0
-                while count <= 30:
-                    move = False
-                    try:
-                        shutil.move(old_file_name, new_file_name)
-                        move = True
-                    except Exception as e:
-                        move = False
-                        time.sleep(1)
-                    if move:
-                        break
-                    count = count + 1
-
-                if count >= 30:
-                    message = f"[WebFunctions>download_action: ERROR] Download Exception:\nFile: {old_file_name}\nMove to: {new_file_name}"
-                    self._error_message(message)
+            file_path = self._move_downloaded_file(driver, file_name, folder_name, file_extension)
+            if file_path:
+                if download_key:
+                    driver.web_engine._add_completed_download(download_key, file_path)
                 break
-
             current_time = datetime.datetime.now() - init_time
             time.sleep(5)
         if finish_action_commands:
             driver.web_engine.execute_commands(driver, finish_action_commands)
         
         
+    @command(side_effects=("commands",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def for_each(
@@ -794,32 +1078,70 @@ class WebFunctions(WebFunctionsEngine):
         elements: str,
         action_commands: list,
         find_again: bool = False,
+        snapshot_locators: bool = False,
     ) -> None:
-        def __replace_commands(command, value):
-            if isinstance(command, str):
-                return self._get_this_element(command, value)
-
-            if isinstance(command, dict):
-                for func, param in command.items():
-                    command[func] = __replace_commands(param, value)
-                return command
-
-            if isinstance(command, list):
-                commands = []
-                for c in command:
-                    commands.append(__replace_commands(c, value))
-                return commands
-            else:
-                return command
-
+        """
+        ### for_each
+        Execute "action_commands" to each element, replacing "this" in the commands by the element;
+        Only the commands with "this" are copied to each element, the others are shared.
+
+        @param elements: element selection to loop
+        @param action_commands: commands to execute to each element
+        @param find_again: find each element again before its commands (the page changes in each iteration); Without
+        it, the elements are ElementHandle, found again only when Selenium reports them as stale
+        @param snapshot_locators: record a absolute XPath to each element before the loop, to find them again by
+        their position in the page instead of their index in "elements"
+        """
+        action_commands = driver.web_engine._get_plan(action_commands)
         web_elements = self._get_elements(driver, elements)
+        if isinstance(elements, str) and web_elements and isinstance(web_elements[0], WebElement):
+            web_elements = ElementHandle.wrap_elements(
+                driver, self._get_element_prop(elements, scoped=isinstance(driver, ELEMENT_TYPES)), web_elements, snapshot_locators
+            )
+
         for index, web_element in enumerate(web_elements):
             if find_again:
-                web_element = self._get_elements(driver, elements)[index]
-            
-            commands = __replace_commands(copy.deepcopy(action_commands), web_element)
+                if isinstance(web_element, ElementHandle):
+                    web_element.find_again()
+                else:
+                    web_element = self._get_elements(driver, elements)[index]
+            memo = {}
+            commands = action_commands.replace(
+                lambda command: self._get_this_element(command, web_element, memo),
+                lambda command: "this" in command
+            )
             driver.web_engine.execute_commands(driver, commands)
 
+    @command(side_effects=("file",), http=True)
+    @WebFunctionsEngine._validation
+    @WebFunctionsEngine._get_web_element_atributte
+    def checkpoint(self, driver: WebDriver, name: str = "checkpoint") -> None:
+        """
+        ### checkpoint
+        Mark a point of the commands that a retry ("WebMultithread(checkpoints=True)") resumes from, ex. after the login:
+        the cookies and the url of now are restored and the commands until here are skipped; The downloads completed
+        after the checkpoint are also kept, a retry doesn't download them again.
+
+        @param name: checkpoint name, shown in the logs of the retry
+        """
+        driver.web_engine._set_checkpoint(driver, name)
+
+    @command(http=True, snapshot=True)
+    @WebFunctionsEngine._validation
+    @WebFunctionsEngine._get_web_element_atributte
+    def snapshot(self, driver: WebDriver, action_commands: list) -> None:
+        """
+        ### snapshot
+        Execute "action_commands" in a local copy of the page (PageSnapshot), the page source is transferred once and
+        the elements are found with lxml, without a WebDriver call to each one;
+        Only to read the page ("print", "for_each", "{text(...)}" tags...), "click" and "insert" can't be used inside it.
+
+        @param action_commands: commands to execute in the page snapshot
+        """
+        page_snapshot = driver if isinstance(driver, PageSnapshot) else PageSnapshot(driver)
+        driver.web_engine.execute_commands(page_snapshot, action_commands)
+
+    @command(side_effects=("commands",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def block_commands(
@@ -857,6 +1179,7 @@ class WebFunctions(WebFunctionsEngine):
             if false_action_commands:
                 driver.web_engine.execute_commands(driver, false_action_commands)
 
+    @command(side_effects=("commands",), http=True)
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def try_while(self, driver, action_command: list, wait_time: str | int = 2) -> None:
@@ -877,6 +1200,7 @@ class WebFunctions(WebFunctionsEngine):
             self._warning_message(message)
             
             
+    @command
     @WebFunctionsEngine._validation
     @WebFunctionsEngine._get_web_element_atributte
     def download_image(self, driver:WebDriver, image_element:str=False, image_name:str=False, save_path:str=False) -> None:
@@ -884,6 +1208,11 @@ class WebFunctions(WebFunctionsEngine):
         image_src = image_element.get_attribute("src")
         print(image_src)
         
+# commands that only read the page, they can use a page snapshot when "WebEngine.page_snapshot" is True
+WebFunctions.SNAPSHOT_COMMANDS = WebFunctions.get_command_names(snapshot=True)
+# commands that can be executed by a HttpDriver, the others need Chrome
+WebFunctions.HTTP_COMMANDS = WebFunctions.get_command_names(http=True)
+
 if __name__ == "__main__":
     test = WebFunctions()
     print()
\ No newline at end of file
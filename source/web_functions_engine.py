@@ -7,9 +7,17 @@ from functools import wraps
 import warnings
 import logging
 import pathlib
+from .tag_expression import compile_tag_expression, TagCall
+from .page_snapshot import SnapshotElement
+from .selector import compile_selector
+from .command_registry import CommandSet
 
 
-class WebFunctionsEngine():
+# elements accepted in the commands, from the driver or from a page snapshot
+ELEMENT_TYPES = (WebElement, SnapshotElement)
+
+
+class WebFunctionsEngine(CommandSet):
     def __init__(self, more_functions:dict={}) -> None:
         self.more_functions = more_functions
         self._set_web_functions()
@@ -18,17 +26,9 @@ class WebFunctionsEngine():
     def _set_web_functions(self) -> None:
         """
             ### _set_web_functions
-            Get all functions from the web, filtered functions with initial name in "_" are not used, they are system functions;
+            Bind the "@command" functions, collected once in "self.command_infos" when the class is defined;
         """
-        functions = {}
-        for function_name in dir(self):
-            if function_name[0] != "_":
-                functions[function_name] = getattr(self, function_name)
-                self.functions = functions
-        
-        # remove because that is a external function to get all web functions
-        functions.pop("get_web_functions")
-        self.functions = functions
+        self.functions = self._get_bound_commands()
     
     def _set_web_element_functions(self):
         """
@@ -40,6 +40,7 @@ class WebFunctionsEngine():
             "text": lambda web_element: web_element.text,
             "text_": lambda web_element: re.sub(r'[ /-]', '_', str(web_element.text).lower()),
             "value": lambda web_element: web_element.get_attribute('value'),
+            "attribute": lambda web_element, name: web_element.get_attribute(name),
         }
         self.web_element_functions.update(self.more_functions)
         
@@ -66,40 +67,35 @@ class WebFunctionsEngine():
         logging.warn(message)
         warnings.warn(message)
 
-    def _get_element_prop(self, element: str, accept_web_element:bool=True) -> None|str|WebElement:
+    def _get_element_prop(self, element: str, accept_web_element:bool=True, scoped:bool=False) -> None|str|WebElement:
         """
         ### _get_element_prop
-        Return the element type and the selection
+        Return the element type and the selection, compiled (and cached) by "compile_selector"
         element_types = {
             '#': By.ID,
             '.': By.CLASS_NAME,
             '%':  By.XPATH,
             '*': By.TAG_NAME,
-            '@': By.NAME
+            '@': By.NAME,
+            '&': By.CSS_SELECTOR
         }
+
+        @param scoped: the selection is searched inside a element, not in the page
         """
-        element_types = {
-            '#': By.ID,
-            '.': By.CLASS_NAME,
-            '%':  By.XPATH,
-            '*': By.TAG_NAME,
-            '@': By.NAME
-        }
         if element == '.':
             return None, element
         
-        if isinstance(element, WebElement) and accept_web_element:
+        if isinstance(element, ELEMENT_TYPES) and accept_web_element:
             return element
         
-        elif isinstance(element, WebElement) and not accept_web_element:
+        elif isinstance(element, ELEMENT_TYPES) and not accept_web_element:
             message = f"[WebFunctions>_get_element_prop: ERROR] this function does't accept object 'WebElement' in 'element' parameter."
             self._error_message(message)
         
-        if element[0] not in element_types:
-            message = f"[WebFunctions>_get_element_prop: ERROR] '{element[0]}' not in dict element types."
-            self._error_message(message)
-        
-        return element_types[element[0]], element[1:]
+        try:
+            return compile_selector(element, scoped)
+        except Exception as e:
+            self._error_message(str(e))
 
     def _get_element(self, driver:WebDriver, element:str|WebElement) -> WebElement:
         """
@@ -109,11 +105,11 @@ class WebFunctionsEngine():
             >>> element = driver.find_element(element_type, element_selection)
         And return that correspondent WebElement.
         """
-        if isinstance(element, WebElement):
+        if isinstance(element, ELEMENT_TYPES):
             return element
         
         elif isinstance(element, str):
-            element_type, element_selection = self._get_element_prop(element)
+            element_type, element_selection = self._get_element_prop(element, scoped=isinstance(driver, ELEMENT_TYPES))
             element = driver.find_element(element_type, element_selection)
             return element
     
@@ -128,7 +124,7 @@ class WebFunctionsEngine():
         if isinstance(element, list): 
             return element
         elif isinstance(element, str):
-            element_type, element_selection = self._get_element_prop(element)
+            element_type, element_selection = self._get_element_prop(element, scoped=isinstance(driver, ELEMENT_TYPES))
             elements = driver.find_elements(element_type, element_selection)
             return elements
     
@@ -159,7 +155,7 @@ class WebFunctionsEngine():
     #             raise e
     #     return _internal_validation
        
-    def _get_this_element(self, this_element:str, web_element:WebElement):
+    def _get_this_element(self, this_element:str, web_element:WebElement, memo:dict=None):
         """
         ### _get_this_element
         return corresponding elementelement:
@@ -172,7 +168,7 @@ class WebFunctionsEngine():
         if 'this' == this_element:
             return web_element
         
-        web_element_tag_result = self._get_web_element_tag_result(web_element, this_element)
+        web_element_tag_result = self._get_web_element_tag_result(web_element, this_element, memo)
                 
         if web_element_tag_result != this_element:
             return web_element_tag_result
@@ -182,84 +178,6 @@ class WebFunctionsEngine():
                 web_element = self._get_element(web_element, element)
             return web_element
     
-    def _get_location_tags(self, param:str, tag_open:str="\{", tag_close:str="\}") -> list[tuple]:
-        """
-            ### _get_location_tags
-            Separe and check if a parameter have a tag to be validate using "_get_web_element_atributte";
-            #### That function is a complement of "_get_web_element_atributte".
-        """
-        param = re.sub('\\\{', "&|+", param)
-        param = re.sub('\\\}', "&|-", param)
-        
-        open_tags = [m.start(0) for m in re.finditer(tag_open, param)]
-        close_tags = [m.start(0) for m in re.finditer(tag_close, param)]
-        
-        # validation
-        if len(open_tags) != len(close_tags):
-            message = f"[WebFunctions>_get_location_tags: ERROR] invalid element param! check \"{param}\""
-            self._error_message(message)
-
-        for i in range(len(open_tags)):
-            if open_tags[i] > close_tags[i]:
-                message = f"[WebFunctions>_get_location_tags: ERROR] invalid element param! check \"{param}\""
-                self._error_message(message)
-
-            if i + 1 <= len(open_tags) -1:
-                if close_tags[i] >= open_tags[i+1]:
-                    message = f"[WebFunctions>_get_location_tags: ERROR] invalid element param! check \"{param}\""
-                    self._error_message(message)
-        
-        # getting information
-        location_tags = [(open_tags[i], close_tags[i])for i in range(len(open_tags))] 
-
-        param = re.sub("\&\|\+", "{", param)
-        param = re.sub("\&\|\-", "}", param)
-        return param, location_tags
-    
-    def _get_element_tags(self, param:str):
-        """
-        ### _get_element_tags
-        Separates the parameter into tags defined by {} returning its string pattern along with its functions;
-            -   Example:\n
-            >>> "Nome do Usuário - {text(#nome_usuario)}" = "Nome do Usuário - Lucas Borges"
-        #### That function is a complement of "_get_web_element_atributte".
-        """
-        param, location_tags = self._get_location_tags(param=param, tag_open="\{", tag_close="\}")
-        content_tags = []
-        cont_adjust = 0
-        for open_tags, close_tags in location_tags:
-            content_tags.append(
-                re.sub("[{}]", "", param[open_tags - cont_adjust: close_tags - cont_adjust + 1])
-            )
-            
-            param = list(param)
-            to_remove = param[open_tags - cont_adjust: close_tags - cont_adjust + 1]
-            param[open_tags - cont_adjust: close_tags - cont_adjust + 1] = ["{", "}"]
-            
-            param = "".join(param)
-            cont_adjust += len(to_remove) - 2
-        return param, content_tags
-    
-    def _get_function_result_tag(self, content_tags:str):
-        """
-        ### _get_function_result_tag
-        "content_tags" is a tuple (Function, Parameter)
-        Run the Function using its Parameter.
-        
-        #### That function is a complement of "_get_web_element_atributte".
-        """
-        
-        # only to validation, checking if follow the parameters rules
-        self._get_location_tags(param=content_tags, tag_open="\(", tag_close="\)")
-        
-        result = re.findall(r'(\w+)\((.*)\)', content_tags)
-        if result == []:
-            message = f"[WebFunctions>get_function_result_tag: ERROR] content_tags do not have function! check {content_tags}"
-            self._error_message(message)
-            
-        func, param = result[0]
-        return func, param
-    
     def _get_element_text(self, driver, element, file_name_date_format:dict[str:str]=False) -> str:
         """
         ### _get_element_text
@@ -289,38 +207,61 @@ class WebFunctionsEngine():
             result = text_props
         return result
     
-    def _get_web_element_tag_result(self, driver:WebDriver, param):
+    def _get_web_element_tag_result(self, driver:WebDriver, param, memo:dict=None):
+        """
+        ### _get_web_element_tag_result
+        Replace the "{function(selector)}" tags of a string parameter using "web_element_functions";
+        The parameter is compiled once by "compile_tag_expression", and the results are memoized in "memo", so
+        the same element or tag used twice in a command costs one WebDriver call.
+            -   Example:\n
+            >>> "Nome do Usuário - {text(#nome_usuario)}" = "Nome do Usuário - Lucas Borges"
+        """
         if not isinstance(param, str):
             return param
         
-        string_tag, param_tags = self._get_element_tags(param=param)
-        if param_tags:
-            result_tag = []
-            for param_tag in param_tags:
-                
-                func, param = self._get_function_result_tag(param_tag)
-                
-                if 'this' in param:
-                    this_element_parameters = param.replace("this", "").split()
-                    
-                    web_element_consult = driver # this instance WebElement
-                    
-                    for element in this_element_parameters:
-                        web_element_consult = self._get_element(web_element_consult, element)
-                        
-                    result_tag.append(self.web_element_functions[func](web_element_consult))
-                    
-                else:
-                    func, param = self._get_function_result_tag(param_tag)
-                    if param:
-                        web_element_consult = self._get_element(driver, param)
-                        result_tag.append(self.web_element_functions[func](web_element_consult))
-                    else:
-                        result_tag.append(self.web_element_functions[func]())
-                    
-            return string_tag.format(*result_tag) 
-        else:
-            return string_tag
+        try:
+            expression = compile_tag_expression(param)
+        except Exception as e:
+            self._error_message(str(e))
+
+        memo = {} if memo is None else memo
+        return expression.evaluate(lambda tag: self._get_tag_result(driver, tag, memo))
+
+    def _get_tag_result(self, driver:WebDriver, tag:TagCall, memo:dict):
+        """
+        ### _get_tag_result
+        Run the tag function with its element and its parameters;
+        """
+        key = ("tag", id(driver), tag)
+        if key in memo:
+            return memo[key]
+
+        if tag.function not in self.web_element_functions:
+            message = f"[WebFunctions>_get_tag_result: ERROR] function '{tag.function}' not found! check {tag}"
+            self._error_message(message)
+        function = self.web_element_functions[tag.function]
+        
+        selectors = tag.get_selectors()
+        try:
+            if tag.this or selectors:
+                result = function(self._get_memo_element(driver, selectors, memo), *tag.args, **dict(tag.kwargs))
+            else:
+                result = function(*tag.args, **dict(tag.kwargs))
+        except TypeError as e:
+            message = f"[WebFunctions>_get_tag_result: ERROR] invalid parameters to '{tag.function}' ({e}), quote selectors with commas! check {tag}"
+            self._error_message(message)
+
+        memo[key] = result
+        return result
+
+    def _get_memo_element(self, driver:WebDriver, selectors:tuple, memo:dict) -> WebElement:
+        key = ("element", id(driver), selectors)
+        if key not in memo:
+            web_element = driver # this instance WebElement
+            for element in selectors:
+                web_element = self._get_element(web_element, element)
+            memo[key] = web_element
+        return memo[key]
 
     def _validate_file(self, file_path:str=False, file_request_content=False):
         if file_path:
@@ -336,13 +277,15 @@ class WebFunctionsEngine():
     def _get_web_element_atributte(func):
         @wraps(func)
         def _get_web_element_atributte(self, driver, *args, **kwargs):
+            # the same tags in a command are consulted only once
+            memo = {}
             new_args = []
             new_kwargs = {}
             for value in args:
-                new_args.append(self._get_web_element_tag_result(driver, value))
+                new_args.append(self._get_web_element_tag_result(driver, value, memo))
                 
             for key, value in kwargs.items():
-                new_kwargs[key] = self._get_web_element_tag_result(driver, value)
+                new_kwargs[key] = self._get_web_element_tag_result(driver, value, memo)
                              
             return func(self, driver, *new_args, **new_kwargs)
         return _get_web_element_atributte
\ No newline at end of file
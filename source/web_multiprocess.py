@@ -0,0 +1,119 @@
+from .web_multithread import WebMultithread
+from .background_writer import BackgroundWriter
+from .log_store import LogStore
+from .metrics import CommandMetrics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import tempfile
+import logging
+import shutil
+import os
+
+
+def _init_shard_process() -> None:
+    # the files written in this process (parquet rows, logs) are shard files, merged by the main process
+    BackgroundWriter.shard = f"shard{os.getpid()}"
+
+
+def _execute_shard(shard:list[tuple], limit:int, reuse_drivers:bool, checkpoints:str|bool) -> tuple[list, list, set, dict]:
+    """
+    ### _execute_shard
+    Execute the shard contents in a WebMultithread of the worker process;
+    Return the content indexes, their results, the files written by the process and its command metrics.
+    """
+    # a forked process starts with the metrics of the main process, and a worker can execute more than one shard:
+    # only the metrics of this shard are returned
+    CommandMetrics.reset()
+    indexes = [index for index, _ in shard]
+    web_multithread = WebMultithread([content for _, content in shard], limit=limit, reuse_drivers=reuse_drivers, checkpoints=checkpoints)
+    result = web_multithread.execute_all_contents()
+    return indexes, result, set(BackgroundWriter.opened_paths), CommandMetrics.get_state()
+
+
+class WebMultiprocess(WebMultithread):
+    """
+    ### WebMultiprocess
+    Shard the contents across "processes" worker processes, each one executing its contents in a WebMultithread
+    with "limit" threads, so the command work (tags, regex, pandas) uses more than one core;
+    The results have the same shape of WebMultithread (one bool to each content, in the contents order), and the
+    files written by the workers are merged in the main process at the end.
+
+    The contents are sent to the processes, so they must be picklable ("more_functions" defined in a module).
+    """
+    def __init__(self, contents, limit=10, processes:int=False, reuse_drivers:bool=False, export_logs_excel:bool=False, metrics_folder:str=False, checkpoints:bool|str=False) -> None:
+        # the worker processes of each attempt share the checkpoints through files, a temporary folder is removed
+        # at the end of the execution
+        self.temporary_checkpoints = False
+        if checkpoints is True:
+            checkpoints = self.temporary_checkpoints = tempfile.mkdtemp(prefix="web_engine_checkpoints_")
+        super().__init__(contents, limit=limit, export_logs_excel=export_logs_excel, metrics_folder=metrics_folder, checkpoints=checkpoints)
+        self.processes = processes if processes else os.cpu_count()
+        self.reuse_drivers = reuse_drivers
+
+    def get_shards(self) -> list[list[tuple]]:
+        """
+        ### get_shards
+        Split the (index, content) pairs in round robin, so slow contents in sequence are spread across the processes;
+        """
+        shards_count = max(1, min(self.processes, len(self.contents)))
+        shards = [[] for _ in range(shards_count)]
+        for index, content in enumerate(self.contents):
+            shards[index % shards_count].append((index, content))
+        return shards
+
+    def remove_temporary_checkpoints(self) -> None:
+        """
+        ### remove_temporary_checkpoints
+        Remove the checkpoints folder created to "checkpoints=True" (the checkpoints given as a folder are kept);
+        """
+        if self.temporary_checkpoints:
+            shutil.rmtree(self.temporary_checkpoints, ignore_errors=True)
+
+    def execute_all_contents_util_no_errors(self, attempts:int=2) -> list:
+        try:
+            return super().execute_all_contents_util_no_errors(attempts)
+        finally:
+            self.remove_temporary_checkpoints()
+
+    def execute_all_contents(self, quit_driver_pool:bool=True) -> list:
+        """
+        ### execute_all_contents
+        Execute the shards in the worker processes and return the result of each content;
+        A shard that fails as a whole (a worker process killed, contents that can't be pickled) has all its
+        contents as False.
+
+        @param quit_driver_pool: each worker process quits its own drivers, False keeps the temporary checkpoints
+        to another execution ("execute_all_contents_util_no_errors")
+        """
+        result = [None] * len(self.contents)
+        written_paths = set()
+        shards = self.get_shards()
+
+        try:
+            with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_shard_process) as executor:
+                futures = {executor.submit(_execute_shard, shard, self.limit, self.reuse_drivers, self.checkpoints): shard for shard in shards}
+                for future in as_completed(futures):
+                    try:
+                        indexes, shard_result, shard_paths, shard_metrics = future.result()
+                    except Exception as e:
+                        logging.error(f"[WebMultiprocess>execute_all_contents: ERROR] shard failed: {e}")
+                        indexes, shard_result, shard_paths, shard_metrics = [index for index, _ in futures[future]], [False] * len(futures[future]), set(), {}
+
+                    for index, content_result in zip(indexes, shard_result):
+                        result[index] = content_result
+                    written_paths.update(shard_paths)
+                    CommandMetrics.merge(shard_metrics)
+        finally:
+            if quit_driver_pool:
+                self.remove_temporary_checkpoints()
+
+        for writer_class, path in written_paths:
+            try:
+                writer_class.merge_shards(path)
+            except Exception as e:
+                logging.error(f"[WebMultiprocess>execute_all_contents: ERROR] shard files of '{path}' not merged: {e}")
+
+        if self.export_logs_excel:
+            LogStore.export_all_excel()
+        BackgroundWriter.close_all()
+        self.export_metrics()
+        return result
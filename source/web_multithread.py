@@ -4,59 +4,73 @@ https://blog.devgenius.io/multi-threaded-web-scraping-with-selenium-dbcfb0635e83
 
 from .web_engine import WebEngine
 from .web_functions import WebFunctions
+from .web_driver_pool import WebDriverPool
+from .background_writer import BackgroundWriter
+from .log_store import LogStore
+from .metrics import CommandMetrics
+from .checkpoint import CheckpointStore, get_content_key
 from threading import Thread
 from threading import Semaphore
+from queue import Queue
 import threading
 from multiprocessing.pool import ThreadPool
 import logging
 from selenium.webdriver.chrome.webdriver import WebDriver
-import numpy as np
+import time
 
 class WebEngineMultithread(WebEngine):
     def __init__(self, semaphores_limit:threading.BoundedSemaphore, semaphores:dict[str:Semaphore], *args, **kwargs) -> None:
         self.semaphores_limit = semaphores_limit
+        init_time = time.perf_counter()
         self.semaphores_limit.acquire()
+        limit_wait_time = time.perf_counter() - init_time
         self.semaphores = semaphores
-        super().__init__(*args, **kwargs)
+        try:
+            super().__init__(*args, **kwargs)
+            CommandMetrics.observe_wait("limit", self.content_name, limit_wait_time)
+        except Exception:
+            # the driver could not be set, "execute_commands" will never release the limit
+            self.semaphores_limit.release()
+            raise
 
     def _execute_command_function(self, driver, command, param):
         if command in self.semaphores:
+            init_time = time.perf_counter()
             with self.semaphores[command]:
-                result, message = self.functions[command](driver, **param)
-        else:
-            result, message = self.functions[command](driver, **param)
-        return result, message
+                CommandMetrics.observe_wait(command, self.content_name, time.perf_counter() - init_time)
+                return self._execute_command(driver, command, param)
+        return self._execute_command(driver, command, param)
 
     def execute_commands(self, driver=False, commands=False, is_multithread_command:bool=False):
         driver = driver if driver else self.driver
-        commands = commands if commands else self.commands
+        commands = self._get_plan(commands if commands else self.commands)
 
         message_error = False
+        step = False
+        self.execution_depth += 1
         try:
-            for command_line in self._get_commands(commands):
-                command_line:dict 
-                     
+            for step in self._iter_steps(commands, self._get_resume_index(driver, commands)):
                 if not driver.service.is_connectable():
                     message_error = f'[WebEngine>execute_commands: ERROR] driver is not connectable!'
                     break
 
-                for command, param in command_line.items():
-                    result, message = self._execute_command_function(driver, command, param)
+                self._set_startup_time()
+                result, message = self._execute_command_function(self._get_command_driver(driver, step.command), step.command, step.kwargs())
 
-                    if not result:
-                        self._check_to_quit(driver)
-                        message_error = f'[WebEngine>execute_commands: ERROR] {command} {param}\nMessage: {message}'
-                        break 
-                    
-                if message_error:
-                    break
+                if not result:
+                    message_error = f'[WebEngine>execute_commands: ERROR] {step}\nMessage: {message}'
+                    break 
 
         except Exception as e:
-            message_error = f'[WebEngine>execute_commands: ERROR] {command} {param}\nMessage: {e}'
-                
+            message_error = f'[WebEngine>execute_commands: ERROR] {step}\nMessage: {e}'
+        finally:
+            self.execution_depth -= 1
+
         if is_multithread_command:
             self._check_to_quit(driver)
             self.semaphores_limit.release()
+            if not message_error:
+                self._remove_checkpoint()
 
         if message_error:
             self._error_message(message_error)
@@ -64,46 +78,84 @@ class WebEngineMultithread(WebEngine):
         
 
 class WebMultithread():
-    def __init__(self, contents, limit=10) -> None:
+    def __init__(self, contents, limit=10, reuse_drivers:bool=False, export_logs_excel:bool=False, metrics_folder:str=False, checkpoints:bool|str=False) -> None:
+        """
+        @param reuse_drivers: keep "limit" warm drivers in a WebDriverPool, each content leases a driver with a
+        clean state (cookies, storage, download folder) instead of launching and killing its own Chrome;
+        @param export_logs_excel: write the Excel file of each "error_log" file at the end of "execute_all_contents";
+        @param metrics_folder: write the command metrics (Prometheus textfile and JSON summary) in this folder at the
+        end of "execute_all_contents";
+        @param checkpoints: keep the "checkpoint" commands of the contents, so "execute_all_contents_util_no_errors"
+        resumes a failed content from its last checkpoint (True: in memory, str: folder to save them as JSON files)
+        """
         self.set_contents(contents)
+        self.limit = limit
         self.semaphore_limit = threading.BoundedSemaphore(limit)
         self.semaphores = self.get_semaphores()
-        
+        # the pooled drivers have the performance log only if some content needs the Network events
+        network_events = any(content.get("network_events") for content in contents if content)
+        self.driver_pool = WebDriverPool(limit, network_events=network_events) if reuse_drivers else False
+        self.export_logs_excel = export_logs_excel
+        self.metrics_folder = metrics_folder
+        self.checkpoints = checkpoints
+        self.checkpoint_store = CheckpointStore(checkpoints if isinstance(checkpoints, str) else False) if checkpoints else False
+
     def set_contents(self, contents:list):
         self.contents = contents
         self.initial_contents = contents
     
     def get_error_content_result(self, results:list, contents:list):
         for x in results:
-            false_index = np.where(np.invert(np.array(x).astype(bool)))[0]
-            contents = [contents[x] for x in false_index]
+            contents = [content for content, content_result in zip(contents, x) if not content_result]
             
         return contents
 
     def get_error_results(self, result:list):
-        return list(filter(None, np.where(np.invert(np.array(result).astype(bool)), self.contents, False)))
+        return [content for content, content_result in zip(self.contents, result) if not content_result and content]
         
     def get_semaphores(self):
-        return {
-            WebFunctions.download_from_email_link.__name__: Semaphore(1),
-            WebFunctions.download_action.__name__: Semaphore(1),
-            WebFunctions.insert_mail_token.__name__: Semaphore(1),
-            WebFunctions.error_log.__name__: Semaphore(1),
-        }
-
-    def execute_content_commands(self, web_engine:WebEngineMultithread, index:int, result:list) -> None:
+        """
+        ### get_semaphores
+        One semaphore to each command registered with "lock" (they can't run at the same time in two contents);
+        """
+        return {name: Semaphore(1) for name in WebFunctions.get_command_names(lock=True)}
+
+    def get_checkpoint_content(self, content:dict) -> dict:
+        """
+        ### get_checkpoint_content
+        Content with the checkpoint store and its content key (the same in every attempt);
+        """
+        if not self.checkpoint_store:
+            return content
+        return {**content, "checkpoint_store": self.checkpoint_store, "checkpoint_key": get_content_key(content)}
+
+    def execute_content_commands(self, content:dict, index:int, result:list) -> None:
+        """
+        ### execute_content_commands
+        Create the content WebEngineMultithread (launching or leasing its driver) and execute its commands;
+        """
         try:
+            web_engine = WebEngineMultithread(semaphores_limit=self.semaphore_limit, semaphores=self.semaphores, driver_pool=self.driver_pool, **self.get_checkpoint_content(content))
             web_engine.execute_commands(is_multithread_command=True)
             result[index] = True
-        except: 
+        except Exception as e:
+            logging.error(f"[WebMultithread>execute_content_commands: ERROR] content {index}: {e}")
             result[index] = False
+
+    def _execute_worker(self, contents_queue:Queue, result:list) -> None:
+        while True:
+            item = contents_queue.get()
+            if item is None:
+                break
+            index, content = item
+            self.execute_content_commands(content, index, result)
     
     def execute_all_contents_util_no_errors(self, attempts:int=2) -> list:
         initial_attempts = attempts
         all_results = []
         
         while attempts != 0:
-            running_result = self.execute_all_contents()
+            running_result = self.execute_all_contents(quit_driver_pool=False)
             all_results.append(running_result)
             error_results = self.get_error_results(running_result)
             if error_results == []:
@@ -111,21 +163,58 @@ class WebMultithread():
             else:
                 self.set_contents(error_results)
             attempts -= 1
+        self.quit_driver_pool()
             
         if attempts == 0:
             print(f"[WebMultithread>execute_all_contents_util_no_errors: WARNING] cannot be execute with {initial_attempts} attempts!") ### TODO cannot be here, use error_log functions    
         return all_results
     
-    def execute_all_contents(self):
+    def export_metrics(self) -> None:
+        """
+        ### export_metrics
+        Write the CommandMetrics of the process in "self.metrics_folder" (if it is set);
+        """
+        if not self.metrics_folder:
+            return
+        try:
+            CommandMetrics.export(self.metrics_folder)
+        except Exception as e:
+            logging.error(f"[WebMultithread>export_metrics: ERROR] metrics not exported: {e}")
+
+    def quit_driver_pool(self) -> None:
+        if self.driver_pool:
+            self.driver_pool.quit()
+
+    def execute_all_contents(self, quit_driver_pool:bool=True):
+        """
+        ### execute_all_contents
+        Execute the contents with a fixed pool of "limit" workers pulling from a bounded queue, so the drivers
+        are launched in parallel inside the workers and the number of threads does not grow with the contents;
+
+        @param quit_driver_pool: quit the warm drivers at the end, use False to reuse them in another execution;
+        """
         result = [None] * len(self.contents)
+        workers_count = max(1, min(self.limit, len(self.contents)))
+        contents_queue = Queue(maxsize=workers_count * 2)
+        
         web_driver_objects = []
-        for index, content in enumerate(self.contents):
-            t = Thread(
-                target=self.execute_content_commands, 
-                args=(WebEngineMultithread(semaphores_limit=self.semaphore_limit, semaphores=self.semaphores, **content), index, result)
-            ) 
+        for _ in range(workers_count):
+            t = Thread(target=self._execute_worker, args=(contents_queue, result))
             web_driver_objects.append(t)
             t.start()
+
+        for index, content in enumerate(self.contents):
+            contents_queue.put((index, content))
+        for _ in web_driver_objects:
+            contents_queue.put(None)
+
         for t in web_driver_objects:
             t.join()
+        # files written by the contents (parquet rows, logs) are complete only after their writers are closed
+        if self.export_logs_excel:
+            LogStore.export_all_excel()
+        BackgroundWriter.close_all()
+        self.export_metrics()
+        if quit_driver_pool:
+            self.quit_driver_pool()
         return result
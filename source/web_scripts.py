@@ -0,0 +1,158 @@
+"""
+JavaScript used by WebFunctions to do in one "execute_script" what would cost many WebDriver calls;
+The selections are passed as [By, value] pairs (id, class name, tag name, name, css selector or xpath), already
+validated by "WebFunctionsEngine._get_element_prop".
+"""
+
+FIND_ELEMENTS_JS = """
+function findElements(root, by, value) {
+    var doc = root.ownerDocument || root;
+    switch (by) {
+        case 'id':
+            return Array.from(root.querySelectorAll('#' + CSS.escape(value)));
+        case 'class name':
+            return Array.from(root.getElementsByClassName(value));
+        case 'tag name':
+            return Array.from(root.getElementsByTagName(value));
+        case 'name':
+            return Array.from(root.querySelectorAll('[name=' + JSON.stringify(value) + ']'));
+        case 'css selector':
+            return Array.from(root.querySelectorAll(value));
+        case 'xpath':
+            var result = doc.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var elements = [];
+            for (var i = 0; i < result.snapshotLength; i++) {
+                elements.push(result.snapshotItem(i));
+            }
+            return elements;
+    }
+    throw new Error('invalid selection type: ' + by);
+}
+
+function findElement(root, by, value) {
+    if (by === null) {
+        return root;
+    }
+    var elements = findElements(root, by, value);
+    return elements.length ? elements[0] : null;
+}
+
+function getElementValue(element, attribute) {
+    if (element === null) {
+        return null;
+    }
+    switch (attribute) {
+        case 'text':
+            return (element.innerText === undefined ? element.textContent : element.innerText).trim();
+        case 'value':
+            return element.value === undefined ? element.getAttribute('value') : element.value;
+        case 'html':
+            return element.innerHTML;
+    }
+    return element.getAttribute(attribute);
+}
+"""
+
+EXTRACT_RECORDS_JS = FIND_ELEMENTS_JS + """
+var rowsSelection = arguments[0];
+var columns = arguments[1];
+return findElements(document, rowsSelection[0], rowsSelection[1]).map(function (row) {
+    var record = {};
+    columns.forEach(function (column) {
+        record[column[0]] = getElementValue(findElement(row, column[1], column[2]), column[3]);
+    });
+    return record;
+});
+"""
+
+WAIT_ELEMENT_JS = FIND_ELEMENTS_JS + """
+var selection = arguments[0];
+var typeWait = arguments[1];
+var timeout = arguments[2];
+var done = arguments[arguments.length - 1];
+
+function isVisible(element) {
+    if (element === null || !element.isConnected) {
+        return false;
+    }
+    var hasSize = element.offsetWidth || element.offsetHeight || element.getClientRects().length;
+    return !!hasSize && window.getComputedStyle(element).visibility !== 'hidden';
+}
+
+function condition() {
+    var element = findElement(document, selection[0], selection[1]);
+    switch (typeWait) {
+        case 'PRESENCE':
+            return element !== null;
+        case 'APPEAR':
+            return isVisible(element);
+        case 'DISAPPEAR':
+            return !isVisible(element);
+        case 'CLICKABLE':
+            return isVisible(element) && !element.disabled;
+    }
+    throw new Error('invalid wait type: ' + typeWait);
+}
+
+if (condition()) {
+    done(true);
+    return;
+}
+
+var observer, timer, interval, finished = false;
+function finish(result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    clearInterval(interval);
+    done(result);
+}
+observer = new MutationObserver(function () {
+    if (condition()) {
+        finish(true);
+    }
+});
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+// style changes without DOM mutations (css transitions, media queries) are checked inside the page
+interval = setInterval(function () {
+    if (condition()) {
+        finish(true);
+    }
+}, 250);
+timer = setTimeout(function () {
+    finish(false);
+}, timeout);
+"""
+
+WAIT_DOCUMENT_READY_JS = """
+var done = arguments[arguments.length - 1];
+if (document.readyState === 'complete') {
+    done(true);
+} else {
+    window.addEventListener('load', function () {
+        done(true);
+    });
+}
+"""
+
+ELEMENTS_XPATH_JS = """
+return arguments[0].map(function (element) {
+    var path = [];
+    for (; element && element.nodeType === 1; element = element.parentNode) {
+        var index = 1;
+        for (var sibling = element.previousElementSibling; sibling; sibling = sibling.previousElementSibling) {
+            if (sibling.nodeName === element.nodeName) {
+                index++;
+            }
+        }
+        var name = element.namespaceURI === 'http://www.w3.org/1999/xhtml'
+            ? element.nodeName.toLowerCase()
+            : "*[name()='" + element.nodeName + "']";
+        path.unshift(name + '[' + index + ']');
+    }
+    return '/' + path.join('/');
+});
+"""
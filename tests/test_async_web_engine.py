@@ -0,0 +1,123 @@
+from source.async_web_engine import AsyncWebEngine, AsyncWebMultithread
+from selenium.common.exceptions import NoAlertPresentException
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import pytest
+import time
+
+
+class FakeSwitchTo():
+    def __init__(self, driver:'FakeDriver') -> None:
+        self.driver = driver
+
+    @property
+    def alert(self) -> str:
+        if not self.driver._check():
+            raise NoAlertPresentException()
+        return "alert"
+
+
+# the waited condition of the fake driver is the next result of "checks"
+class FakeDriver():
+    def __init__(self, checks:list) -> None:
+        self.checks = list(checks)
+        self.script_times = []
+        self.switch_to = FakeSwitchTo(self)
+
+    def _check(self) -> bool:
+        return self.checks.pop(0) if self.checks else False
+
+    def set_script_timeout(self, timeout) -> None:
+        ...
+
+    def execute_async_script(self, script:str, element_params:list, type_wait:str, script_time:int):
+        self.script_times.append(script_time)
+        return self._check()
+
+    def execute_script(self, script:str) -> str:
+        return "complete" if self._check() else "loading"
+
+
+@pytest.fixture
+def pages(tmp_path):
+    for index in range(3):
+        (tmp_path / f"page{index}.html").write_text(f"<p id='name'>name {index}</p>")
+    return tmp_path
+
+
+def _get_contents(pages, tmp_path) -> list:
+    return [
+        {
+            "driver_backend": "http",
+            "download_temp_path": str(tmp_path / "download_temp" / str(index)),
+            "commands": [
+                {"get": {"url": str(pages / f"page{index}.html")}},
+                {"sleep": {"timesec": "0"}},
+                {"print": {"value": "{text(#name)}"}},
+            ],
+        }
+        for index in range(3)
+    ]
+
+
+def test_execute_contents_in_one_event_loop(pages, tmp_path, capsys):
+    result = AsyncWebMultithread(_get_contents(pages, tmp_path), limit=2).run()
+    assert result == [True, True, True]
+    assert sorted(capsys.readouterr().out.split("\n")[:-1]) == ["name 0", "name 1", "name 2"]
+
+
+def test_failed_content(pages, tmp_path):
+    contents = _get_contents(pages, tmp_path)
+    contents[1]["commands"][2] = {"click": {"element": "#missing"}}
+    assert AsyncWebMultithread(contents).run() == [True, False, True]
+
+
+def test_startup_time(pages, tmp_path):
+    async def execute() -> AsyncWebEngine:
+        web_engine = await AsyncWebEngine.create(**_get_contents(pages, tmp_path)[0])
+        await web_engine.async_execute_commands()
+        return web_engine
+
+    assert asyncio.run(execute()).startup_times["first_command"] >= 0
+
+
+async def _wait(tmp_path, drivers:list, executor:ThreadPoolExecutor=None, **kwargs) -> list:
+    web_engine = await AsyncWebEngine.create(
+        driver_backend="http", commands=[{"sleep": {"timesec": "0"}}], download_temp_path=str(tmp_path / "download_temp"),
+        executor=executor,
+    )
+    return await asyncio.gather(*(web_engine.async_functions["wait"](driver, poll_time=0.05, **kwargs) for driver in drivers))
+
+
+@pytest.mark.parametrize("type_wait", ["APPEAR", "DOCUMENT_READY", "ALERT"])
+def test_wait_polls(tmp_path, type_wait):
+    driver = FakeDriver([False, False, True])
+    ((result, message),) = asyncio.run(_wait(tmp_path, [driver], type_wait=type_wait, element="#name", timeout=5))
+    assert result, message
+    assert driver.checks == []
+
+    ((result, message),) = asyncio.run(_wait(tmp_path, [FakeDriver([])], type_wait=type_wait, element="#name", timeout=0.2))
+    assert not result
+    assert "timeout of 0.2s" in str(message)
+
+
+def test_element_checks_do_not_wait_in_the_page(tmp_path):
+    driver = FakeDriver([False, True])
+    asyncio.run(_wait(tmp_path, [driver], type_wait="APPEAR", element="#name", timeout=5))
+    assert driver.script_times == [0, 0]
+
+
+def test_waits_do_not_hold_the_executor_thread(tmp_path):
+    # ten contents waiting with one executor thread
+    drivers = [FakeDriver([False] * 5 + [True]) for _ in range(10)]
+    executor = ThreadPoolExecutor(max_workers=1)
+    init_time = time.monotonic()
+    results = asyncio.run(_wait(tmp_path, drivers, executor, type_wait="DOCUMENT_READY", timeout=5))
+    executor.shutdown()
+    assert all(result for result, _ in results)
+    assert time.monotonic() - init_time < 2
+
+
+def test_invalid_wait_type(tmp_path):
+    ((result, message),) = asyncio.run(_wait(tmp_path, [FakeDriver([])], type_wait="SOMETHING", timeout=1))
+    assert not result
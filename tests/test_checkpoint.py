@@ -0,0 +1,43 @@
+from source.checkpoint import Checkpoint, CheckpointStore, get_content_key
+
+
+def get_checkpoint() -> Checkpoint:
+    return Checkpoint(
+        "logged", 4, "http://host/account", [{"name": "session", "value": "1", "path": "/"}],
+        {"download_links|http://host/a": "/tmp/a.bin"}, {"total": 3},
+    )
+
+
+def test_store_round_trip(tmp_path):
+    CheckpointStore(str(tmp_path)).save("content", get_checkpoint())
+    # a new store (other execution or process) loads the file
+    checkpoint = CheckpointStore(str(tmp_path)).get("content")
+    assert checkpoint.to_dict() == get_checkpoint().to_dict()
+    assert not list(tmp_path.glob("*.writing"))
+
+
+def test_store_in_memory_and_remove(tmp_path):
+    store = CheckpointStore()
+    store.save("content", get_checkpoint())
+    assert store.get("content").step_index == 4
+    store.remove("content")
+    assert store.get("content") is None
+
+    store = CheckpointStore(str(tmp_path))
+    store.save("content", get_checkpoint())
+    store.remove("content")
+    assert CheckpointStore(str(tmp_path)).get("content") is None
+
+
+def test_invalid_file_is_ignored(tmp_path):
+    (tmp_path / "content.json").write_text("{invalid")
+    assert CheckpointStore(str(tmp_path)).get("content") is None
+
+
+def test_content_key():
+    content = {"commands_path": "a.json", "content_variables": {"$a": 1}}
+    assert get_content_key(content) == get_content_key(dict(content))
+    assert get_content_key(content) != get_content_key({**content, "content_variables": {"$a": 2}})
+    assert get_content_key({**content, "checkpoint_key": "key"}) == "key"
+    # functions (more_functions) are hashed by their name
+    assert get_content_key({"more_functions": [len]}) == get_content_key({"more_functions": [len]})
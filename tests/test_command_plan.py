@@ -0,0 +1,64 @@
+from source.command_plan import CommandPlan
+import pytest
+
+
+COMMANDS = [
+    {"get": {"url": "$base_url/login"}},
+    {"click": {"element": "#submit"}},
+    {"for_each": {"elements": ".row", "action_commands": [
+        {"print": {"value": "{text(this .name)}"}},
+        {"print": {"value": "static"}},
+    ]}},
+]
+
+
+def test_compile_nested_plans():
+    plan = CommandPlan.compile(COMMANDS)
+    assert [step.command for step in plan] == ["get", "click", "for_each"]
+    assert isinstance(plan.steps[2].params["action_commands"], CommandPlan)
+
+
+def test_bind_copies_only_changed_steps():
+    plan = CommandPlan.compile(COMMANDS)
+    bound = plan.bind({"$base_url": "http://host"})
+    assert bound is not plan
+    assert bound.steps[0].kwargs() == {"url": "http://host/login"}
+    assert bound.steps[1] is plan.steps[1]
+    assert bound.steps[2] is plan.steps[2]
+    # the compiled plan is not changed
+    assert plan.steps[0].kwargs() == {"url": "$base_url/login"}
+
+
+def test_bind_longest_variable_first_and_without_variables():
+    plan = CommandPlan.compile([{"print": {"value": "$a $ab"}}])
+    assert plan.bind({"$a": 1, "$ab": 2}).steps[0].kwargs() == {"value": "1 2"}
+    assert plan.bind({}) is plan
+    assert plan.bind({"$other": 1}) is plan
+
+
+def test_replace_nested_plan():
+    plan = CommandPlan.compile(COMMANDS)
+    replaced = plan.replace(lambda string: string.replace("this", "ELEMENT"), lambda string: "this" in string)
+    nested = replaced.steps[2].kwargs()["action_commands"]
+    assert nested.steps[0].kwargs() == {"value": "{text(ELEMENT .name)}"}
+    assert nested.steps[1] is plan.steps[2].params["action_commands"].steps[1]
+    assert replaced.steps[0] is plan.steps[0]
+
+
+def test_kwargs_are_mutable_copies():
+    plan = CommandPlan.compile([{"add": {"values": [1, 2], "options": {"a": 1}}}])
+    kwargs = plan.steps[0].kwargs()
+    kwargs["values"].append(3)
+    kwargs["options"]["b"] = 2
+    assert plan.steps[0].kwargs() == {"values": [1, 2], "options": {"a": 1}}
+
+
+@pytest.mark.parametrize("commands", [["get"], [{"get": "url"}]])
+def test_compile_errors(commands):
+    with pytest.raises(Exception):
+        CommandPlan.compile(commands)
+
+
+def test_compile_unknown_command():
+    with pytest.raises(Exception):
+        CommandPlan.compile([{"unknown": {}}], functions={"get": None})
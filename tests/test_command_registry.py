@@ -0,0 +1,70 @@
+from source.command_registry import CommandSet, command
+from source.web_functions import WebFunctions
+from source.web_multithread import WebMultithread
+import pytest
+
+
+class Commands(CommandSet):
+    @command(side_effects=("page",), http=True)
+    def go(self, driver, url:str, wait:bool=False) -> str:
+        """
+        ### go
+        Go to the url;
+        """
+        return f"go {url}"
+
+    @command(snapshot=True)
+    def read(self, driver) -> str:
+        return "read"
+
+    def helper(self) -> None:
+        ...
+
+
+class MoreCommands(Commands):
+    @command(lock=True)
+    def save(self, driver) -> str:
+        return "save"
+
+    # overridden without "@command"
+    def read(self, driver) -> str:
+        return "not a command"
+
+
+def test_commands_collected_once_per_class():
+    assert set(Commands.command_infos) == {"go", "read"}
+    assert set(MoreCommands.command_infos) == {"go", "save"}
+
+    command_info = Commands.command_infos["go"]
+    assert dict(command_info.parameters) == {"url": None, "wait": False}
+    assert command_info.required_parameters == ("url",)
+    assert command_info.doc.startswith("### go")
+    assert command_info.to_dict()["side_effects"] == ["page"]
+
+
+def test_bound_commands():
+    functions = MoreCommands()._get_bound_commands()
+    assert set(functions) == {"go", "save"}
+    assert functions["go"](None, "http://host") == "go http://host"
+
+
+def test_get_command_names():
+    assert MoreCommands.get_command_names(lock=True) == {"save"}
+    assert MoreCommands.get_command_names(http=True) == {"go"}
+    assert Commands.get_command_names(snapshot=True, http=False) == {"read"}
+
+
+def test_invalid_side_effect():
+    with pytest.raises(Exception, match="not in side effects"):
+        command(lambda self, driver: None, side_effects=("disk",))
+
+
+def test_web_functions_registry():
+    assert "download_action" in WebFunctions.get_command_names(lock=True)
+    assert WebFunctions.HTTP_COMMANDS == WebFunctions.get_command_names(http=True)
+    assert {"get", "click", "for_each"} <= WebFunctions.HTTP_COMMANDS
+    assert set(WebFunctions().get_web_functions()) == set(WebFunctions.command_infos)
+
+
+def test_multithread_semaphores_from_registry():
+    assert set(WebMultithread([]).semaphores) == WebFunctions.get_command_names(lock=True)
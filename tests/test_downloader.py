@@ -0,0 +1,184 @@
+from source.downloader import download_file, PathReservation
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import threading
+import json
+import os
+import requests
+import pytest
+
+
+BODY = bytes(range(256)) * 64
+CHANGED_BODY = bytes(reversed(range(256))) * 64
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        ...
+
+    def do_GET(self) -> None:
+        server = self.server
+        server.ranges.append(self.headers.get("Range"))
+        server.if_ranges.append(self.headers.get("If-Range"))
+        start = int(self.headers["Range"][6:-1]) if self.headers.get("Range") else 0
+        # a range of a changed file is ignored, the whole file is sent
+        if self.headers.get("If-Range") != (server.etag or server.last_modified):
+            start = 0
+        if start >= len(server.body):
+            self.send_response(416)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body_start = server.wrong_range_start if start and server.wrong_range_start is not None else start
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Length", str(len(server.body) - body_start))
+        self.send_header("Content-Disposition", 'attachment; filename="report.bin"')
+        if server.etag:
+            self.send_header("ETag", server.etag)
+        if server.last_modified:
+            self.send_header("Last-Modified", server.last_modified)
+        if start:
+            self.send_header("Content-Range", f"bytes {body_start}-{len(server.body) - 1}/{len(server.body)}")
+        self.end_headers()
+        if server.fail_after:
+            # the connection is closed before the end of the body
+            self.wfile.write(server.body[body_start:body_start + server.fail_after])
+            server.fail_after = False
+            self.close_connection = True
+            return
+        self.wfile.write(server.body[body_start:])
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    server.ranges = []
+    server.if_ranges = []
+    server.body = BODY
+    server.etag = '"v1"'
+    server.last_modified = False
+    server.fail_after = False
+    server.wrong_range_start = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/file"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _interrupted_download(server, file_path:str) -> None:
+    # a previous execution that left the ".part" file and its validator
+    server.fail_after = 1000
+    with pytest.raises(Exception, match="download failed after 1 attempts"):
+        download_file(requests.Session(), server.url, file_path, attempts=1, chunk_size=100)
+    server.ranges.clear()
+    server.if_ranges.clear()
+
+
+def test_download_file(server, tmp_path):
+    stats = download_file(requests.Session(), server.url, str(tmp_path / "file.bin"))
+    assert stats["file_path"] == str(tmp_path / "file.bin")
+    assert stats["bytes"] == len(BODY)
+    assert (tmp_path / "file.bin").read_bytes() == BODY
+    assert not (tmp_path / "file.bin.part").exists()
+    assert server.ranges == [None]
+
+
+def test_download_to_folder(server, tmp_path):
+    stats = download_file(requests.Session(), server.url, str(tmp_path))
+    assert stats["file_path"] == str(tmp_path / "report.bin")
+    assert (tmp_path / "report.bin").read_bytes() == BODY
+    assert server.ranges == [None]
+
+
+def test_download_to_folder_with_file_stem(server, tmp_path):
+    stats = download_file(requests.Session(), server.url, str(tmp_path), file_stem="monthly")
+    assert stats["file_path"] == str(tmp_path / "monthly.bin")
+
+
+def test_resume_part_file_with_if_range(server, tmp_path):
+    file_path = tmp_path / "file.bin"
+    _interrupted_download(server, str(file_path))
+    assert (tmp_path / "file.bin.part").read_bytes() == BODY[:1000]
+    stats = download_file(requests.Session(), server.url, str(file_path))
+    assert file_path.read_bytes() == BODY
+    assert stats["bytes"] == len(BODY)
+    assert server.ranges == ["bytes=1000-"]
+    assert server.if_ranges == ['"v1"']
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["file.bin"]
+
+
+def test_resume_after_connection_error(server, tmp_path):
+    server.fail_after = 1000
+    download_file(requests.Session(), server.url, str(tmp_path / "file.bin"), chunk_size=100)
+    assert (tmp_path / "file.bin").read_bytes() == BODY
+    assert server.ranges == [None, "bytes=1000-"]
+
+
+def test_resume_with_last_modified(server, tmp_path):
+    # a weak ETag can't be used in "If-Range"
+    server.etag, server.last_modified = False, "Mon, 05 Oct 2026 10:00:00 GMT"
+    file_path = tmp_path / "file.bin"
+    _interrupted_download(server, str(file_path))
+    download_file(requests.Session(), server.url, str(file_path))
+    assert file_path.read_bytes() == BODY
+    assert server.if_ranges == ["Mon, 05 Oct 2026 10:00:00 GMT"]
+
+
+def test_changed_file_is_downloaded_again(server, tmp_path):
+    file_path = tmp_path / "file.bin"
+    _interrupted_download(server, str(file_path))
+    server.body, server.etag = CHANGED_BODY, '"v2"'
+    download_file(requests.Session(), server.url, str(file_path))
+    # the server sent the whole new file (200), it is not appended to the old bytes
+    assert file_path.read_bytes() == CHANGED_BODY
+    assert server.if_ranges == ['"v1"']
+
+
+def test_unexpected_content_range_restarts(server, tmp_path):
+    file_path = tmp_path / "file.bin"
+    _interrupted_download(server, str(file_path))
+    server.wrong_range_start = 500
+    download_file(requests.Session(), server.url, str(file_path))
+    assert file_path.read_bytes() == BODY
+    assert server.ranges == ["bytes=1000-", None]
+
+
+def test_part_file_without_validator_restarts(server, tmp_path):
+    file_path = tmp_path / "file.bin"
+    (tmp_path / "file.bin.part").write_bytes(b"unknown bytes")
+    download_file(requests.Session(), server.url, str(file_path))
+    assert file_path.read_bytes() == BODY
+    assert server.ranges == [None]
+
+
+def test_complete_part_file(server, tmp_path):
+    file_path = tmp_path / "file.bin"
+    download_file(requests.Session(), server.url, str(file_path))
+    # a ".part" file completed by a execution that stopped before the rename
+    os.replace(file_path, tmp_path / "file.bin.part")
+    (tmp_path / "file.bin.part.json").write_text(json.dumps({"url": server.url, "validator": '"v1"'}))
+    server.ranges.clear()
+    download_file(requests.Session(), server.url, str(file_path))
+    assert file_path.read_bytes() == BODY
+    assert server.ranges == [f"bytes={len(BODY)}-"]
+
+
+def test_no_resume(server, tmp_path):
+    (tmp_path / "file.bin.part").write_bytes(b"old")
+    download_file(requests.Session(), server.url, str(tmp_path / "file.bin"), resume=False)
+    assert (tmp_path / "file.bin").read_bytes() == BODY
+    assert server.ranges == [None]
+
+
+
+def test_path_reservation(server, tmp_path):
+    path_reservation = PathReservation()
+    file_paths = {
+        download_file(requests.Session(), f"{server.url}?{index}", str(tmp_path), path_reservation=path_reservation)["file_path"]
+        for index in range(3)
+    }
+    assert file_paths == {str(tmp_path / name) for name in ("report.bin", "report_2.bin", "report_3.bin")}
@@ -0,0 +1,51 @@
+from source.element_handle import ElementHandle
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.common.exceptions import StaleElementReferenceException
+import pytest
+
+
+class FakeDriver():
+    """
+    Page with elements "<generation>-<index>", a new generation makes the old elements stale;
+    """
+    def __init__(self) -> None:
+        self.generation = 1
+        self.finds = 0
+
+    def _check(self, element_id:str) -> None:
+        if not element_id.startswith(f"{self.generation}-"):
+            raise StaleElementReferenceException(f"stale element {element_id}")
+
+    def execute(self, command:str, params:dict) -> dict:
+        self._check(params["id"])
+        return {"value": f"text {params['id']}"}
+
+    def execute_script(self, script:str, *args):
+        self._check(args[0].id)
+        return f"attribute {args[0].id}"
+
+    def find_elements(self, by:str, value:str) -> list[WebElement]:
+        self.finds += 1
+        return [WebElement(self, f"{self.generation}-{index}") for index in range(3)]
+
+
+def test_stale_element_is_found_again():
+    driver = FakeDriver()
+    handles = ElementHandle.wrap_elements(driver, (By.CSS_SELECTOR, "tr"), driver.find_elements(By.CSS_SELECTOR, "tr"))
+    assert handles[1].text == "text 1-1"
+
+    # the page changed: the element is found again by its index, only when it is stale
+    driver.generation = 2
+    assert handles[1].text == "text 2-1"
+    assert handles[1].get_attribute("id") == "attribute 2-1"
+    assert driver.finds == 2
+
+
+def test_element_not_found_again():
+    driver = FakeDriver()
+    handles = ElementHandle.wrap_elements(driver, (By.CSS_SELECTOR, "tr"), driver.find_elements(By.CSS_SELECTOR, "tr"))
+    driver.generation = 2
+    driver.find_elements = lambda by, value: []
+    with pytest.raises(StaleElementReferenceException):
+        handles[0].text
@@ -0,0 +1,65 @@
+from source.parquet_writer import ParquetRowWriter
+from source.web_functions import WebFunctions
+from source.web_scripts import EXTRACT_RECORDS_JS
+import pandas as pd
+
+
+class FakeEngine():
+    def __init__(self) -> None:
+        self.results = {}
+
+
+class FakeDriver():
+    def __init__(self, records:list) -> None:
+        self.records = records
+        self.scripts = []
+        self.script_timeout = None
+        self.web_engine = FakeEngine()
+
+    def set_script_timeout(self, timeout) -> None:
+        self.script_timeout = timeout
+
+    def execute_script(self, script:str, *args):
+        self.scripts.append((script, args))
+        return self.records
+
+
+RECORDS = [{"name": "a", "link": "/a"}, {"name": "b", "link": "/b"}]
+COLUMNS = {"name": "%./td[1]", "link": {"element": "*a", "attribute": "href"}}
+
+
+def test_extract_records_in_one_script():
+    driver = FakeDriver(RECORDS)
+    result, message = WebFunctions().extract_records(driver, rows="%//table/tbody/tr", columns=COLUMNS, save_as="rows")
+    assert result, message
+    assert len(driver.scripts) == 1
+    script, (rows_selection, columns_selection) = driver.scripts[0]
+    assert script == EXTRACT_RECORDS_JS
+    # simple XPaths are sent as CSS selectors
+    assert rows_selection[1] == "table > tbody > tr"
+    assert [(column[0], column[2], column[3]) for column in columns_selection] == [("name", "./td[1]", "text"), ("link", "a", "href")]
+    assert driver.web_engine.results["rows"] == RECORDS
+
+
+def test_extract_records_as_dataframe():
+    driver = FakeDriver(RECORDS)
+    WebFunctions().extract_records(driver, rows="%//tr", columns=COLUMNS, save_as="rows", as_dataframe=True, script_timeout=5)
+    assert driver.script_timeout == 5
+    assert driver.web_engine.results["rows"].to_dict("records") == RECORDS
+
+
+def test_extract_records_appends_to_parquet(tmp_path):
+    for _ in range(2):
+        result, message = WebFunctions().extract_records(
+            FakeDriver(RECORDS), rows="%//tr", columns=COLUMNS, file_path=str(tmp_path), file_name="rows.parquet"
+        )
+        assert result, message
+    ParquetRowWriter.close_all()
+    df = pd.read_parquet(str(tmp_path / "rows.parquet"))
+    assert df[["name", "link"]].to_dict("records") == RECORDS * 2
+    assert "change_datetime" in df.columns
+
+
+def test_extract_records_invalid_selection():
+    result, message = WebFunctions().extract_records(FakeDriver(RECORDS), rows="!tr", columns=COLUMNS)
+    assert not result
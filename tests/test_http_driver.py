@@ -0,0 +1,132 @@
+from source.http_driver import HttpDriver, HttpElement, BrowserRequired
+from source.web_engine import WebEngine
+from selenium.webdriver.common.by import By
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+import threading
+import pytest
+
+
+class FormHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args) -> None:
+        ...
+
+    def _send(self, body:bytes, content_type:str="text/html", headers:dict=None) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path.startswith("/file"):
+            self._send(b"file content", "application/octet-stream", {"Content-Disposition": 'attachment; filename="report.bin"'})
+        elif self.path.startswith("/account"):
+            user = "user" if "session=1" in self.headers.get("Cookie", "") else "anonymous"
+            self._send(f"<p id='user'>{user}</p>".encode())
+        else:
+            self._send(
+                b"<form method='post' action='/login'><input name='username'><input name='password' type='password'>"
+                b"<button id='submit' name='action' value='login'>Login</button></form><a id='file' href='/file'>file</a>"
+                b"<span id='text'>text</span>"
+            )
+
+    def do_POST(self) -> None:
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        self._send(f"<p id='form'>{sorted(form.items())}</p>".encode(), headers={"Set-Cookie": "session=1; Path=/"})
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FormHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_local_file_and_links(tmp_path):
+    (tmp_path / "index.html").write_text("<title>Index</title><a id='next' href='next.html'>next</a>")
+    (tmp_path / "next.html").write_text("<p id='text'>next page</p>")
+    driver = HttpDriver()
+    driver.get(str(tmp_path / "index.html"))
+    assert driver.title == "Index"
+    driver.find_element(By.ID, "next").click()
+    assert driver.find_element(By.ID, "text").text == "next page"
+    assert driver.current_url == (tmp_path / "next.html").as_uri()
+
+
+def test_form_submit_and_cookies(base_url):
+    driver = HttpDriver()
+    driver.get(f"{base_url}/login")
+    driver.find_element(By.NAME, "username").send_keys("ana")
+    driver.find_element(By.NAME, "password").send_keys("secret")
+    driver.find_element(By.ID, "submit").click()
+    assert driver.find_element(By.ID, "form").text == "[('action', ['login']), ('password', ['secret']), ('username', ['ana'])]"
+    assert [cookie["name"] for cookie in driver.get_cookies()] == ["session"]
+
+    driver.get(f"{base_url}/account")
+    assert driver.find_element(By.ID, "user").text == "user"
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.get(f"{base_url}/account")
+    assert driver.find_element(By.ID, "user").text == "anonymous"
+
+
+def test_download(base_url, tmp_path):
+    driver = HttpDriver()
+    driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": str(tmp_path)})
+    driver.get(base_url)
+    driver.find_element(By.ID, "file").click()
+    assert (tmp_path / "report.bin").read_bytes() == b"file content"
+
+
+def test_browser_only_actions(base_url):
+    driver = HttpDriver()
+    driver.get(base_url)
+    with pytest.raises(BrowserRequired):
+        driver.find_element(By.ID, "text").click()
+    with pytest.raises(Exception):
+        driver.execute_cdp_cmd("Network.enable", {})
+    driver.quit()
+    assert driver.window_handles == []
+
+
+class ChromeElement(HttpElement):
+    def click(self) -> None:
+        self.parent.clicked.append(self.element.get("id"))
+
+
+# "Chrome" of the fallback: a HttpDriver that can click any element
+class FakeChrome(HttpDriver):
+    def __init__(self) -> None:
+        self.clicked = []
+        super().__init__()
+
+    def _set_document(self) -> None:
+        super()._set_document()
+        self.document = ChromeElement(self.document.element, self)
+
+    def execute_cdp_cmd(self, cmd:str, cmd_args:dict) -> dict:
+        return {}
+
+
+def test_click_falls_back_to_chrome(base_url, tmp_path, monkeypatch):
+    chrome_drivers = []
+    monkeypatch.setattr(WebEngine, "_get_chrome_driver", lambda self: chrome_drivers.append(FakeChrome()) or chrome_drivers[-1])
+    web_engine = WebEngine(
+        driver_backend="http", download_temp_path=str(tmp_path / "download_temp"),
+        commands=[
+            {"get": {"url": base_url}},
+            {"click": {"element": "#text"}},
+            {"click": {"element": "#file"}},
+        ],
+    )
+    driver = web_engine.driver
+    web_engine.execute_commands()
+    (chrome_driver,) = chrome_drivers
+    assert driver.fallback_driver is chrome_driver
+    # the failed step and the next ones are executed in Chrome, in the page of the HttpDriver
+    assert chrome_driver.clicked == ["text", "file"]
+    assert chrome_driver.current_url == base_url + "/"
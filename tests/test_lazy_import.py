@@ -0,0 +1,29 @@
+from source.lazy_import import LazyModule
+import sys
+import pytest
+
+
+def test_import_on_first_use(monkeypatch):
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    imported = []
+    colorsys = LazyModule("colorsys", plugin="colors", on_import=imported.append)
+    assert "colorsys" not in sys.modules
+    assert "not loaded" in repr(colorsys)
+
+    assert colorsys.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert [module.__name__ for module in imported] == ["colorsys"]
+    colorsys.hsv_to_rgb(0, 1, 1)
+    assert len(imported) == 1
+    assert "loaded" in repr(colorsys) and "not loaded" not in repr(colorsys)
+
+
+def test_missing_module():
+    missing = LazyModule("missing_module.sub", plugin="missing")
+    with pytest.raises(ImportError, match=r"the missing commands need 'missing_module.sub' \(pip install missing_module\)"):
+        missing.function()
+
+
+def test_engine_imports_without_desktop_packages():
+    import source.web_engine
+    for module_name in ("pyautogui", "pywinauto", "cv2"):
+        assert module_name not in sys.modules
@@ -0,0 +1,60 @@
+from source.background_writer import BackgroundWriter
+from source.log_store import LogStore
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize("extension", [".jsonl", ".csv", ".sqlite"])
+def test_append_records(tmp_path, extension):
+    path = str(tmp_path / "logs" / f"log{extension}")
+    log_store = LogStore(path)
+    log_store.add_record(True, "first")
+    log_store.add_record(False, "second")
+    records = log_store.read_records()
+    assert records["message"].tolist() == ["first", "second"]
+    log_store.close()
+
+    # a new store appends without reading the file back
+    log_store = LogStore(path)
+    log_store.add_record(True, "third")
+    log_store.close()
+    assert log_store.read_records()["message"].tolist() == ["first", "second", "third"]
+
+
+def test_jsonl_lines(tmp_path):
+    path = tmp_path / "log.jsonl"
+    log_store = LogStore(str(path), max_rows=1)
+    log_store.add_record("ok", "message with \"quotes\"")
+    log_store.close()
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_invalid_format(tmp_path):
+    with pytest.raises(Exception):
+        LogStore(str(tmp_path / "log.txt"))
+
+
+def test_merge_shards(tmp_path, monkeypatch):
+    path = str(tmp_path / "log.jsonl")
+    for shard, message in (("shard1", "first"), ("shard2", "second")):
+        monkeypatch.setattr(BackgroundWriter, "shard", shard)
+        log_store = LogStore(path)
+        log_store.add_record(True, message)
+        log_store.close()
+    monkeypatch.setattr(BackgroundWriter, "shard", False)
+
+    LogStore.merge_shards(path)
+    log_store = LogStore.get_writer(path)
+    assert log_store.read_records()["message"].tolist() == ["first", "second"]
+    LogStore.close_writer(path)
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["log.jsonl"]
+
+
+def test_export_excel(tmp_path):
+    pytest.importorskip("openpyxl")
+    log_store = LogStore.get_writer(str(tmp_path / "log.jsonl"))
+    log_store.add_record(True, "first")
+    (excel_path,) = [path for path in LogStore.export_all_excel() if path.startswith(str(tmp_path))]
+    log_store.close()
+    assert excel_path == str(tmp_path / "log.xlsx")
+    assert pd.read_excel(excel_path)["message"].tolist() == ["first"]
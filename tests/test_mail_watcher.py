@@ -0,0 +1,105 @@
+from email.message import EmailMessage
+from source.mail_watcher import MailWatcher, LocalMailboxBackend, get_mail_backend
+import datetime
+import mailbox
+import pytest
+
+
+def _add_message(local_mailbox:mailbox.Mailbox, sender:str, subject:str, body:str, date:datetime.datetime) -> None:
+    email_message = EmailMessage()
+    email_message["From"] = f"Sender <{sender}>"
+    email_message["To"] = "me@company.com"
+    email_message["Subject"] = subject
+    email_message["Date"] = date.astimezone().strftime("%a, %d %b %Y %H:%M:%S %z")
+    email_message.set_content(body)
+    local_mailbox.add(email_message)
+    local_mailbox.flush()
+
+
+@pytest.fixture(params=["maildir", "mbox"])
+def local_mailbox(request, tmp_path):
+    if request.param == "maildir":
+        path = str(tmp_path / "Maildir")
+        local_mailbox = mailbox.Maildir(path, create=True)
+    else:
+        path = str(tmp_path / "inbox.mbox")
+        local_mailbox = mailbox.mbox(path, create=True)
+    yield path, local_mailbox
+    local_mailbox.close()
+
+
+@pytest.fixture
+def since():
+    return datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(seconds=5)
+
+
+def test_backend_reads_new_messages_once(local_mailbox, since):
+    path, local_mailbox = local_mailbox
+    _add_message(local_mailbox, "token@bank.com", "Token", "Your token is 123456", datetime.datetime.now())
+
+    backend = get_mail_backend({"backend": "local", "path": path})
+    assert isinstance(backend, LocalMailboxBackend)
+    messages = backend.fetch_new(since)
+    assert len(messages) == 1
+    assert messages[0].sender == "token@bank.com"
+    assert messages[0].subject == "Token"
+    assert "123456" in messages[0].body
+    assert messages[0].received_time.tzinfo is None
+    assert backend.fetch_new(since) == []
+
+
+def test_unknown_backend():
+    with pytest.raises(Exception, match="not in mail backends"):
+        get_mail_backend({"backend": "pop3"})
+
+
+def test_watcher_routes_each_message_to_one_waiter(local_mailbox, since):
+    path, local_mailbox = local_mailbox
+    _add_message(local_mailbox, "token@bank.com", "Token", "Your token is 111111", datetime.datetime.now())
+    _add_message(local_mailbox, "token@bank.com", "Token", "Your token is 222222", datetime.datetime.now())
+    _add_message(local_mailbox, "news@shop.com", "Offers", "Nothing here", datetime.datetime.now())
+
+    watcher = MailWatcher(LocalMailboxBackend(path), poll_seconds=0.1)
+    try:
+        first = watcher.wait_message(since, 5, sender="TOKEN@bank.com", pattern=r"\d{6}")
+        second = watcher.wait_message(since, 5, sender="token@bank.com", pattern=r"\d{6}")
+        assert {first.body.strip(), second.body.strip()} == {"Your token is 111111", "Your token is 222222"}
+        assert watcher.wait_message(since, 0.3, sender="token@bank.com") is None
+        assert watcher.wait_message(since, 5, subject="Offers").sender == "news@shop.com"
+    finally:
+        watcher.stop()
+
+
+def test_watcher_waits_new_messages(local_mailbox, since):
+    path, local_mailbox = local_mailbox
+    watcher = MailWatcher(LocalMailboxBackend(path), poll_seconds=0.1)
+    try:
+        assert watcher.wait_message(since, 0.3) is None
+        _add_message(local_mailbox, "token@bank.com", "Token", "Your token is 333333", datetime.datetime.now())
+        mail_message = watcher.wait_message(since, 5, pattern=r"\d{6}")
+        assert mail_message is not None and "333333" in mail_message.body
+    finally:
+        watcher.stop()
+
+
+def test_messages_before_since_are_ignored(tmp_path, since):
+    # the maildir time is the delivery time, the mbox messages keep the "Date" header
+    path = str(tmp_path / "inbox.mbox")
+    local_mailbox = mailbox.mbox(path, create=True)
+    _add_message(local_mailbox, "token@bank.com", "Token", "Old token 000000", since - datetime.timedelta(hours=1))
+    local_mailbox.close()
+
+    watcher = MailWatcher(LocalMailboxBackend(path), poll_seconds=0.1)
+    try:
+        assert watcher.wait_message(since, 0.3) is None
+    finally:
+        watcher.stop()
+
+
+def test_get_watcher_is_shared(local_mailbox):
+    path, _ = local_mailbox
+    config = {"backend": "local", "path": path}
+    try:
+        assert MailWatcher.get_watcher(config) is MailWatcher.get_watcher(dict(config))
+    finally:
+        MailWatcher.stop_all()
@@ -0,0 +1,49 @@
+from source.metrics import Histogram, CommandMetrics
+import pytest
+
+
+def test_quantile_interpolates_inside_the_bucket():
+    histogram = Histogram()
+    for value in (0.2, 0.3, 0.4, 0.5):
+        histogram.observe(value)
+    # rank 2: 1 value in (0.1, 0.25], the 2nd is 1/3 of the 3 values in (0.25, 0.5]
+    assert histogram.quantile(0.5) == pytest.approx(0.25 + 0.25 / 3)
+    assert histogram.quantile(1) == pytest.approx(0.5)
+    assert 0.2 <= histogram.quantile(0.01) <= 0.25
+
+
+def test_quantile_single_value_and_empty():
+    histogram = Histogram()
+    assert histogram.quantile(0.5) == 0.0
+    histogram.observe(3)
+    assert histogram.quantile(0.5) == 3
+    assert histogram.quantile(0.99) == 3
+
+
+def test_quantile_infinite_bucket():
+    histogram = Histogram()
+    histogram.observe(1000)
+    histogram.observe(2000)
+    assert 1000 <= histogram.quantile(0.5) <= 2000
+
+
+def test_merge():
+    first, second = Histogram(), Histogram()
+    first.observe(0.01)
+    second.observe(2)
+    first.merge(second)
+    assert (first.count, first.min, first.max) == (2, 0.01, 2)
+    assert first.sum == pytest.approx(2.01)
+
+
+def test_command_metrics_export(tmp_path):
+    CommandMetrics.reset()
+    CommandMetrics.observe_command("get", "login", 1, "ok", 0.2)
+    CommandMetrics.observe_wait("limit", "login", 0.01)
+    prometheus_path, json_path = CommandMetrics.export(str(tmp_path))
+    text = open(prometheus_path).read()
+    assert 'web_engine_command_seconds_count{command="get",content="login",depth="1",outcome="ok"} 1' in text
+    assert 'le="+Inf"' in text
+    summary = CommandMetrics.get_summary()
+    assert summary["command_seconds"][0]["count"] == 1
+    CommandMetrics.reset()
@@ -0,0 +1,71 @@
+from source.page_snapshot import PageSnapshot
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+import pytest
+
+
+PAGE = """
+<html><body>
+    <h1 id="title">Users <script>var hidden = 1;</script></h1>
+    <table id="users">
+        <tr class="row first"><td class="name">Ana</td><td><a href="/users/1">open</a></td></tr>
+        <tr class="row"><td class="name">Bruno   Lima</td><td><a href="/users/2">open</a></td></tr>
+    </table>
+    <input type="hidden" name="token" value="abc">
+    <select name="state"><option value="sp">SP</option><option value="rj" selected>RJ</option></select>
+    <textarea name="notes">some notes</textarea>
+    <button id="save" disabled>Save</button>
+</body></html>
+"""
+
+
+class FakeDriver():
+    def __init__(self) -> None:
+        self.current_url = "http://host/page"
+        self.page_source_reads = 0
+        self.download_folder = "downloads"
+
+    @property
+    def page_source(self) -> str:
+        self.page_source_reads += 1
+        return PAGE
+
+
+@pytest.fixture
+def snapshot():
+    return PageSnapshot(FakeDriver())
+
+
+def test_selections(snapshot):
+    assert snapshot.find_element(By.ID, "title").text == "Users"
+    assert [row.find_element(By.CLASS_NAME, "name").text for row in snapshot.find_elements(By.CLASS_NAME, "row")] == ["Ana", "Bruno Lima"]
+    assert len(snapshot.find_elements(By.XPATH, "//table/tr")) == 2
+    assert len(snapshot.find_elements(By.TAG_NAME, "TD")) == 4
+    # the page is copied only once
+    assert snapshot.driver.page_source_reads == 1
+
+
+def test_attributes(snapshot):
+    assert snapshot.find_element(By.TAG_NAME, "a").get_attribute("href") == "http://host/users/1"
+    assert snapshot.find_element(By.NAME, "state").get_attribute("value") == "rj"
+    assert snapshot.find_element(By.NAME, "notes").get_attribute("value") == "some notes"
+    assert not snapshot.find_element(By.NAME, "token").is_displayed()
+    assert not snapshot.find_element(By.ID, "save").is_enabled()
+
+
+def test_read_only_and_not_found(snapshot):
+    with pytest.raises(Exception):
+        snapshot.find_element(By.ID, "save").click()
+    with pytest.raises(NoSuchElementException):
+        snapshot.find_element(By.ID, "missing")
+
+
+def test_delegates_to_the_driver(snapshot):
+    assert snapshot.download_folder == "downloads"
+
+
+def test_css_selections(snapshot):
+    assert [cell.text for cell in snapshot.find_elements(By.CSS_SELECTOR, "tr.row > td.name")] == ["Ana", "Bruno Lima"]
+    assert snapshot.find_element(By.CSS_SELECTOR, "tr.first a").get_attribute("href") == "http://host/users/1"
+    row = snapshot.find_elements(By.CSS_SELECTOR, "tr")[1]
+    assert row.find_element(By.CSS_SELECTOR, "td.name").text == "Bruno Lima"
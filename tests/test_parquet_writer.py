@@ -0,0 +1,123 @@
+from source.background_writer import BackgroundWriter
+from source.parquet_writer import ParquetRowWriter
+from source.web_functions import WebFunctions
+import pyarrow.parquet as pq
+import pytest
+
+
+def test_rows_and_new_columns(tmp_path):
+    path = str(tmp_path / "rows.parquet")
+    writer = ParquetRowWriter(path, columns=["a"], max_rows=2)
+    writer.add_rows([{"a": 1}, {"a": 2}, {"a": 3, "b": "x"}])
+    writer.close()
+    assert pq.read_table(path).to_pylist() == [{"a": "1", "b": None}, {"a": "2", "b": None}, {"a": "3", "b": "x"}]
+    assert [file.name for file in tmp_path.iterdir()] == ["rows.parquet"]
+
+
+def test_unknown_columns(tmp_path):
+    writer = ParquetRowWriter(str(tmp_path / "rows.parquet"), columns=["a"])
+    with pytest.raises(Exception):
+        writer.add_row({"c": 1}, create_columns=False)
+    writer.close()
+
+
+def test_existing_file_and_shared_writer(tmp_path):
+    path = str(tmp_path / "rows.parquet")
+    writer = ParquetRowWriter.get_writer(path, columns=["a"])
+    assert ParquetRowWriter.get_writer(path) is writer
+    writer.add_row({"a": 1})
+    ParquetRowWriter.close_writer(path)
+
+    # a new writer appends to the rows of the file
+    writer = ParquetRowWriter.get_writer(path)
+    assert writer is not ParquetRowWriter.get_writer(str(tmp_path / "other.parquet"), columns=["a"])
+    writer.add_row({"a": 2})
+    ParquetRowWriter.close_all()
+    assert pq.read_table(path).to_pylist() == [{"a": "1"}, {"a": "2"}]
+
+
+def test_release_writers(tmp_path):
+    class Engine():
+        ...
+
+    path = str(tmp_path / "rows.parquet")
+    first, second = Engine(), Engine()
+    writer = ParquetRowWriter.get_writer(path, user=first, columns=["a"])
+    assert ParquetRowWriter.get_writer(path, user=second) is writer
+    ParquetRowWriter.release_writers(first)
+    # still used by the second engine
+    assert not writer.closed
+    writer.add_row({"a": 1})
+    ParquetRowWriter.release_writers(second)
+    assert writer.closed
+    assert pq.read_table(path).to_pylist() == [{"a": "1"}]
+
+
+def test_background_writer_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        BackgroundWriter(str(tmp_path / "rows.txt"))
+
+
+def test_written_rows_survive_a_crash(tmp_path):
+    path = str(tmp_path / "rows.parquet")
+    writer = ParquetRowWriter(path, columns=["a"], max_rows=1)
+    writer.add_rows([{"a": 1}, {"a": 2}])
+    writer.flush()
+    # the writer is never closed: the next writer of the file merges the finished parts
+    ParquetRowWriter(path).close()
+    assert pq.read_table(path).to_pylist() == [{"a": "1"}, {"a": "2"}]
+
+
+def test_merge_shards(tmp_path, monkeypatch):
+    path = str(tmp_path / "rows.parquet")
+    for shard, row in (("shard1", {"a": 1}), ("shard2", {"b": 2})):
+        monkeypatch.setattr(BackgroundWriter, "shard", shard)
+        writer = ParquetRowWriter(path, columns=list(row))
+        writer.add_row(row)
+        writer.close()
+    monkeypatch.setattr(BackgroundWriter, "shard", False)
+
+    ParquetRowWriter.merge_shards(path)
+    assert pq.read_table(path).to_pylist() == [{"a": "1", "b": None}, {"a": None, "b": "2"}]
+    assert [file.name for file in tmp_path.iterdir()] == ["rows.parquet"]
+
+
+def test_file_without_columns(tmp_path):
+    with pytest.raises(Exception):
+        ParquetRowWriter(str(tmp_path / "missing.parquet"))
+
+
+class FakeEngine():
+    ...
+
+
+class FakeDriver():
+    def __init__(self, web_engine:FakeEngine) -> None:
+        self.web_engine = web_engine
+
+
+def test_create_parquet_file_keeps_writers_of_other_engines(tmp_path):
+    path = str(tmp_path / "rows.parquet")
+    first, second = FakeEngine(), FakeEngine()
+    result, message = WebFunctions().create_parquet_file(FakeDriver(first), ["a"], str(tmp_path), "rows.parquet")
+    assert result, message
+    writer = ParquetRowWriter.get_writer(path, user=first)
+    writer.add_row({"a": 1, "b": 2})
+
+    # the writer of the first engine is not closed by the second one, the columns added by it are validated
+    result, message = WebFunctions().create_parquet_file(FakeDriver(second), ["a", "b"], str(tmp_path), "rows.parquet")
+    assert result, message
+    assert ParquetRowWriter.get_open_writer(path) is writer
+    writer.add_row({"a": 3})
+    result, message = WebFunctions().create_parquet_file(FakeDriver(second), ["c"], str(tmp_path), "rows.parquet")
+    assert not result
+    result, message = WebFunctions().create_parquet_file(FakeDriver(second), ["a"], str(tmp_path), "rows.parquet", overwrite=True)
+    assert not result and "can't be overwritten" in str(message)
+
+    # the only user of the writer closes it
+    result, message = WebFunctions().create_parquet_file(FakeDriver(first), ["a"], str(tmp_path), "rows.parquet")
+    assert result, message
+    assert writer.closed
+    assert pq.read_table(path).to_pylist() == [
+        {"a": "1", "change_datetime": None, "b": "2"}, {"a": "3", "change_datetime": None, "b": None}
+    ]
@@ -0,0 +1,52 @@
+from source.profile_template import clone_profile, remove_profile
+import os
+import pytest
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    template_dir = tmp_path / "template"
+    (template_dir / "Default" / "Cache" / "Cache_Data").mkdir(parents=True)
+    (template_dir / "Default" / "Sessions").mkdir()
+    (template_dir / "Default" / "Preferences").write_text("{}")
+    (template_dir / "Default" / "Cache" / "Cache_Data" / "0123456789abcdef_0").write_bytes(b"cache entry")
+    (template_dir / "Default" / "Sessions" / "Session_1").write_bytes(b"session")
+    (template_dir / "SingletonLock").write_text("lock")
+    return template_dir
+
+
+def test_clone_profile(template_dir, tmp_path):
+    profile_dir = clone_profile(str(template_dir), str(tmp_path / "profiles"))
+    assert os.path.dirname(profile_dir) == str(tmp_path / "profiles")
+    assert open(os.path.join(profile_dir, "Default", "Preferences")).read() == "{}"
+    # the lock files and the sessions of the browser that built the template are skipped
+    assert not os.path.exists(os.path.join(profile_dir, "SingletonLock"))
+    assert not os.path.exists(os.path.join(profile_dir, "Default", "Sessions"))
+
+
+def test_cache_entries_are_not_hardlinks(template_dir, tmp_path):
+    template_entry = template_dir / "Default" / "Cache" / "Cache_Data" / "0123456789abcdef_0"
+    profile_dir = clone_profile(str(template_dir), str(tmp_path / "profiles"))
+    entry_path = os.path.join(profile_dir, "Default", "Cache", "Cache_Data", "0123456789abcdef_0")
+    assert os.stat(entry_path).st_nlink == 1
+
+    # Chrome rewrites the cache entries in place
+    with open(entry_path, "r+b") as entry:
+        entry.write(b"CHANGED")
+    assert template_entry.read_bytes() == b"cache entry"
+
+
+def test_remove_profile(template_dir, tmp_path):
+    class Driver():
+        profile_dir = clone_profile(str(template_dir), str(tmp_path / "profiles"))
+
+    driver = Driver()
+    profile_dir = driver.profile_dir
+    remove_profile(driver)
+    assert not os.path.exists(profile_dir)
+    assert driver.profile_dir is False
+
+
+def test_missing_template(tmp_path):
+    with pytest.raises(Exception, match="profile template does not exist"):
+        clone_profile(str(tmp_path / "missing"))
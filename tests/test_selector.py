@@ -0,0 +1,46 @@
+from source.selector import xpath_to_css, compile_selector
+from selenium.webdriver.common.by import By
+import pytest
+
+
+@pytest.mark.parametrize("xpath, css", [
+    ("//div[@id='x']/a", 'div[id="x"] > a'),
+    ("//table//tr[2]", "table tr:nth-of-type(2)"),
+    ("/html/body", "html:root > body"),
+    ("//a[@href]", "a[href]"),
+    ("//a[contains(@class, 'btn')]", 'a[class*="btn"]'),
+    ("//a[starts-with(@href, \"http\")]", 'a[href^="http"]'),
+    ("//*[@name='q']", '[name="q"]'),
+])
+def test_xpath_to_css(xpath, css):
+    assert xpath_to_css(xpath) == css
+
+
+@pytest.mark.parametrize("xpath", [
+    "//div[text()='x']",
+    "./td[1]",
+    "//*[2]",
+    "//a[contains(@class, '')]",
+    "//div[@id='x' and @class='y']",
+    "//DIV",
+    "(//a)[1]",
+])
+def test_xpath_to_css_not_safe(xpath):
+    assert xpath_to_css(xpath) is None
+
+
+def test_compile_selector():
+    assert compile_selector("#login") == (By.ID, "login")
+    assert compile_selector(".btn primary") == (By.CSS_SELECTOR, ".btn.primary")
+    assert compile_selector("%//div[@id='x']/a") == (By.CSS_SELECTOR, 'div[id="x"] > a')
+    assert compile_selector("&a.x, b.y") == (By.CSS_SELECTOR, "a.x, b.y")
+
+
+def test_compile_selector_scoped_xpath_is_not_rewritten():
+    assert compile_selector("%//td", scoped=True) == (By.XPATH, "//td")
+
+
+@pytest.mark.parametrize("element", ["!x", "#", "%//div[", "&a[", ""])
+def test_compile_selector_errors(element):
+    with pytest.raises(Exception):
+        compile_selector(element)
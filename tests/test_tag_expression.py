@@ -0,0 +1,48 @@
+from source.tag_expression import compile_tag_expression, _split_arguments, TagCall
+import pytest
+
+
+@pytest.mark.parametrize("param, arguments", [
+    ("#name", ["#name"]),
+    ("#link, href", ["#link", " href"]),
+    ("%//a[contains(@x, 'y')], href", ["%//a[contains(@x, 'y')]", " href"]),
+    ("'&a.x, b.y', href", ["'&a.x, b.y'", " href"]),
+    ("\"a, b\", name=value", ["\"a, b\"", " name=value"]),
+    ("", [""]),
+])
+def test_split_arguments(param, arguments):
+    assert _split_arguments(param) == arguments
+
+
+def test_compile_tag_expression():
+    expression = compile_tag_expression("Name - {text(#name)} / {attribute(#link, href)}")
+    assert expression.parts == (
+        "Name - ", TagCall("text", "#name", False), " / ", TagCall("attribute", "#link", False, ("href",)),
+    )
+
+
+def test_quoted_selector_with_commas():
+    (tag,) = compile_tag_expression("{attribute('&a.next, a.last', href)}").tags
+    assert tag.selector == "&a.next, a.last"
+    assert tag.args == ("href",)
+    assert tag.get_selectors() == ("&a.next, a.last",)
+
+
+def test_keyword_arguments_and_this():
+    (tag,) = compile_tag_expression("{function(this .row .cell, 'x', name=value)}").tags
+    assert tag.this
+    assert tag.get_selectors() == (".row", ".cell")
+    assert tag.args == ("x",)
+    assert tag.kwargs == (("name", "value"),)
+
+
+def test_escaped_braces_and_evaluate():
+    expression = compile_tag_expression("\\{literal\\} {text(#a)}")
+    assert expression.evaluate(lambda tag: "A") == "{literal} A"
+    assert compile_tag_expression("no tags").evaluate(None) == "no tags"
+
+
+@pytest.mark.parametrize("param", ["{text(#a}", "text}", "{text(#a) {x}", "{#a}"])
+def test_invalid_expressions(param):
+    with pytest.raises(Exception):
+        compile_tag_expression(param)
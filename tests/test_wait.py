@@ -0,0 +1,28 @@
+from source.web_functions import WebFunctions
+from selenium.common.exceptions import TimeoutException, JavascriptException, NoSuchWindowException, WebDriverException
+import pytest
+
+
+class FakeDriver():
+    def __init__(self, error:Exception) -> None:
+        self.error = error
+
+    def set_script_timeout(self, timeout) -> None:
+        ...
+
+    def execute_async_script(self, *args):
+        raise self.error
+
+
+@pytest.mark.parametrize("error", [
+    TimeoutException("script timeout"),
+    JavascriptException("javascript error"),
+    WebDriverException("javascript error: document unloaded while waiting for result"),
+])
+def test_retry_script_errors(error):
+    assert WebFunctions()._check_wait_element(FakeDriver(error), "APPEAR", ("css selector", "#name"), 0.1) is False
+
+
+def test_raise_other_errors():
+    with pytest.raises(NoSuchWindowException):
+        WebFunctions()._check_wait_element(FakeDriver(NoSuchWindowException("no such window")), "APPEAR", ("css selector", "#name"), 0.1)
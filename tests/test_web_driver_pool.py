@@ -0,0 +1,102 @@
+from source.web_driver_pool import WebDriverPool
+from source.web_engine import WebEngine
+import threading
+
+
+class FakeService():
+    def __init__(self) -> None:
+        self.connectable = True
+
+    def is_connectable(self) -> bool:
+        return self.connectable
+
+
+class FakeDriver():
+    def __init__(self) -> None:
+        self.service = FakeService()
+        self.window_handles = ["main"]
+        self.cdp_commands = []
+        self.profile_dir = False
+        self.switch_to = self
+
+    def window(self, window_handle) -> None:
+        ...
+
+    def default_content(self) -> None:
+        ...
+
+    def execute_cdp_cmd(self, command:str, params:dict) -> None:
+        self.cdp_commands.append((command, params))
+
+    def get(self, url:str) -> None:
+        ...
+
+    def quit(self) -> None:
+        self.window_handles = []
+
+
+class FakeEngine():
+    def __init__(self) -> None:
+        self.launched = []
+
+    def _launch_drive(self) -> FakeDriver:
+        self.launched.append(FakeDriver())
+        return self.launched[-1]
+
+
+def test_release_and_lease_again():
+    pool, engine = WebDriverPool(1), FakeEngine()
+    driver = pool.lease(engine)
+    pool.release(driver)
+    # a second release is ignored
+    pool.release(driver)
+    assert pool.lease(engine) is driver
+    assert len(engine.launched) == 1
+    assert ('Storage.clearDataForOrigin', {'origin': '*', 'storageTypes': 'all'}) in driver.cdp_commands
+    assert ('Network.clearBrowserCache', {}) in driver.cdp_commands
+    assert ('Network.clearBrowserCookies', {}) in driver.cdp_commands
+
+
+def test_launch_while_the_pool_has_room():
+    pool, engine = WebDriverPool(2), FakeEngine()
+    first, second = pool.lease(engine), pool.lease(engine)
+    assert first is not second
+    assert len(engine.launched) == 2
+
+
+def test_dead_driver_is_replaced():
+    pool, engine = WebDriverPool(1), FakeEngine()
+    driver = pool.lease(engine)
+    pool.release(driver)
+    driver.service.connectable = False
+    new_driver = pool.lease(engine)
+    assert new_driver is not driver
+    assert pool.drivers == [new_driver]
+
+
+def test_waiter_launches_after_a_discard():
+    pool, engine = WebDriverPool(1), FakeEngine()
+    driver = pool.lease(engine)
+    leased = []
+    waiter = threading.Thread(target=lambda: leased.append(pool._launch_or_wait(engine, wait_time=0.05)))
+    waiter.start()
+    # the slot is freed without a driver in "idle_drivers"
+    pool._discard(driver)
+    waiter.join(timeout=5)
+    assert leased and leased[0] is engine.launched[-1] and leased[0] is not driver
+
+
+def test_quit():
+    pool, engine = WebDriverPool(2), FakeEngine()
+    driver = pool.lease(engine)
+    pool.quit()
+    assert driver.window_handles == []
+    assert pool.drivers == []
+
+
+def test_performance_log_only_in_network_events_pools(tmp_path):
+    web_engine = WebEngine(driver_backend="http", commands=[{"get": {"url": "http://host"}}], download_temp_path=str(tmp_path / "download_temp"))
+    web_engine.driver_pool = WebDriverPool(1)
+    assert "goog:loggingPrefs" not in web_engine._get_webdrive_options().to_capabilities()
+    web_engine.driver_pool = WebDriverPool(1, network_events=True)
+    assert web_engine._get_webdrive_options().to_capabilities()["goog:loggingPrefs"] == {"performance": "ALL"}
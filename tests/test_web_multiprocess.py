@@ -0,0 +1,50 @@
+from source.web_multiprocess import WebMultiprocess, _execute_shard
+from source.metrics import CommandMetrics
+import os
+import pytest
+
+
+@pytest.fixture
+def contents(tmp_path):
+    contents = []
+    for index in range(2):
+        (tmp_path / f"page{index}.html").write_text(f"<p id='name'>name {index}</p>")
+        contents.append({
+            "driver_backend": "http",
+            "download_temp_path": str(tmp_path / "download_temp" / str(index)),
+            "commands": [{"get": {"url": str(tmp_path / f"page{index}.html")}}, {"print": {"value": "{text(#name)}"}}],
+        })
+    return contents
+
+
+def _get_count(state:dict, command:str) -> int:
+    return sum(histogram.count for labels, histogram in state["command_seconds"].items() if labels[0] == command)
+
+
+def test_shard_returns_only_its_metrics(contents):
+    # the same worker process can execute more than one shard
+    for _ in range(2):
+        indexes, result, _, shard_metrics = _execute_shard([(1, contents[1])], 1, False, False)
+        assert (indexes, result) == ([1], [True])
+        assert _get_count(shard_metrics, "get") == 1
+    CommandMetrics.reset()
+
+
+def test_execute_all_contents_and_remove_temporary_checkpoints(contents):
+    web_multiprocess = WebMultiprocess(contents, limit=1, processes=2, checkpoints=True)
+    checkpoints_folder = web_multiprocess.checkpoints
+    assert os.path.isdir(checkpoints_folder)
+    assert web_multiprocess.execute_all_contents() == [True, True]
+    assert _get_count(CommandMetrics.get_state(), "get") == 2
+    assert not os.path.exists(checkpoints_folder)
+    CommandMetrics.reset()
+
+
+def test_temporary_checkpoints_kept_between_attempts(contents):
+    web_multiprocess = WebMultiprocess(contents, limit=1, processes=2, checkpoints=True)
+    checkpoints_folder = web_multiprocess.checkpoints
+    assert web_multiprocess.execute_all_contents(quit_driver_pool=False) == [True, True]
+    assert os.path.isdir(checkpoints_folder)
+    assert web_multiprocess.execute_all_contents_util_no_errors() == [[True, True]]
+    assert not os.path.exists(checkpoints_folder)
+    CommandMetrics.reset()
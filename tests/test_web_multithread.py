@@ -0,0 +1,33 @@
+from source.web_multithread import WebEngineMultithread, WebMultithread
+import threading
+
+
+def test_startup_time(tmp_path):
+    (tmp_path / "page.html").write_text("<p id='name'>name</p>")
+    web_engine = WebEngineMultithread(
+        threading.BoundedSemaphore(1), {}, driver_backend="http", download_temp_path=str(tmp_path / "download_temp"),
+        commands=[{"get": {"url": str(tmp_path / "page.html")}}],
+    )
+    web_engine.execute_commands(is_multithread_command=True)
+    assert web_engine.startup_times["first_command"] >= 0
+
+
+def test_execute_all_contents(tmp_path):
+    contents = []
+    for index in range(3):
+        (tmp_path / f"page{index}.html").write_text(f"<p id='name'>name {index}</p>")
+        contents.append({
+            "driver_backend": "http",
+            "download_temp_path": str(tmp_path / "download_temp" / str(index)),
+            "commands": [{"get": {"url": str(tmp_path / f"page{index}.html")}}, {"print": {"value": "{text(#name)}"}}],
+        })
+    contents[1]["commands"][1] = {"click": {"element": "#missing"}}
+    assert WebMultithread(contents, limit=2).execute_all_contents() == [True, False, True]
+
+
+def test_pool_performance_log_only_for_network_events():
+    contents = [{"commands": [{"get": {"url": "http://host"}}]}]
+    assert WebMultithread(contents, reuse_drivers=True).driver_pool.network_events is False
+    contents.append({"commands": [{"wait": {"type_wait": "NETWORK_IDLE"}}], "network_events": True})
+    assert WebMultithread(contents, reuse_drivers=True).driver_pool.network_events is True
+    assert WebMultithread(contents).driver_pool is False